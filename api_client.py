@@ -0,0 +1,82 @@
+import aiohttp
+
+# Parâmetros do pool de conexões usado para falar com as APIs de produtos
+CONNECTION_LIMIT = 20
+CONNECTION_LIMIT_PER_HOST = 10
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+REQUEST_TIMEOUT = 30
+DEFAULT_HEADERS = {'Content-Type': 'application/json'}
+
+
+class ApiClient:
+    """
+    Cliente HTTP de longa duração para as APIs de produtos.
+
+    Mantém uma única aiohttp.ClientSession por execução, com pool de conexões
+    keep-alive e cache de DNS, para que POSTs e PUTs consecutivos reaproveitem
+    a mesma conexão TCP/TLS. Use como `async with ApiClient() as client:`.
+    """
+
+    def __init__(
+        self,
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        timeout=REQUEST_TIMEOUT,
+        headers=None,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.headers = DEFAULT_HEADERS if headers is None else headers
+        self.session = None
+
+    async def start(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.ttl_dns_cache,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self.headers,
+            )
+        return self
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def request(
+        self, method, url, json_data=None, data=None, headers=None
+    ):
+        """Executa a requisição e retorna (status, corpo da resposta)."""
+        await self.start()
+        async with self.session.request(
+            method, url, json=json_data, data=data, headers=headers
+        ) as response:
+            return response.status, await response.text()
+
+    async def get(self, url, headers=None):
+        return await self.request('GET', url, headers=headers)
+
+    async def post(self, url, json_data=None, data=None):
+        return await self.request('POST', url, json_data=json_data, data=data)
+
+    async def put(self, url, json_data=None, data=None):
+        return await self.request('PUT', url, json_data=json_data, data=data)
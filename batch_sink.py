@@ -0,0 +1,81 @@
+import asyncio
+
+
+class BatchSink:
+    """
+    Agrupa registros de várias URLs e os envia à API em lotes.
+
+    Um lote é enviado quando acumula `max_records` registros ou quando o
+    registro mais antigo espera `max_wait` segundos, o que ocorrer primeiro.
+    `submit` é uma corrotina que recebe a lista de registros e retorna True
+    em caso de sucesso. Se um lote falhar, ele é dividido ao meio e reenviado
+    até isolar as URLs responsáveis, de forma que o future devolvido por
+    `add` sempre traga o resultado da própria URL.
+
+    `add` não espera o envio do lote: quem adiciona registros segue adiante
+    e o lote enche com as URLs seguintes. Só a chamada que completa o lote
+    espera o envio dele.
+    """
+
+    def __init__(self, submit, max_records=100, max_wait=5.0):
+        self.submit = submit
+        self.max_records = max_records
+        self.max_wait = max_wait
+        self.pending = []
+        self.pending_records = 0
+        self.batches_sent = 0
+        self.records_sent = 0
+        self._timer = None
+
+    async def add(self, url, records):
+        """Enfileira os registros de uma URL e retorna o future do resultado do envio."""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((url, records, future))
+        self.pending_records += len(records)
+        if self.pending_records >= self.max_records:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.max_wait)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        """Envia imediatamente tudo o que estiver pendente."""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        batch, self.pending = self.pending, []
+        self.pending_records = 0
+        if batch:
+            await self._submit_batch(batch)
+
+    async def _submit_batch(self, batch):
+        records = [record for _, recs, _ in batch for record in recs]
+        self.batches_sent += 1
+        self.records_sent += len(records)
+        print(
+            f'Enviando lote com {len(records)} registros de {len(batch)} URLs'
+        )
+        try:
+            ok = await self.submit(records)
+        except Exception as e:
+            print(f'Erro ao enviar lote: {e}')
+            ok = False
+        if ok or len(batch) == 1:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(bool(ok))
+            return
+        meio = len(batch) // 2
+        await self._submit_batch(batch[:meio])
+        await self._submit_batch(batch[meio:])
+
+    async def close(self):
+        await self.flush()
+        print(
+            f'Lotes enviados: {self.batches_sent} ({self.records_sent} registros)'
+        )
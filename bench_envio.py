@@ -0,0 +1,108 @@
+"""
+Verificação offline do envio em lote à API.
+
+Grava uma página do corpus de benchmark (fixtures/extractors/beleza) num
+PageArchive temporário sob várias URLs, roda process_urls em modo replay
+(sem navegador) contra uma API simulada com latência fixa e confere que os
+lotes enchem até LOTE_MAX_REGISTROS registros e que a execução não fica
+esperando o timer dos lotes (LOTE_MAX_ESPERA). A verificação roda com o
+estágio de envio do pipeline e sem ele (WORKERS_ENVIO=0); se algum dos dois
+falhar, o script termina com código 1.
+
+    python bench_envio.py
+    python bench_envio.py --urls 500 --api-ms 200
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import scrape_combined_crawl4ai as scraper
+from page_archive import PageArchive
+
+PAGINA = os.path.join('fixtures', 'extractors', 'beleza', 'dois_vendedores.md')
+URL_BASE = 'https://www.belezanaweb.com.br/produto-{}/'
+DEFAULT_URLS = 150
+DEFAULT_API_MS = 50
+
+
+async def executar(urls, archive_path, api_ms, lote_max_registros, workers_envio):
+    lotes = []
+
+    async def api_simulada(data, client=None):
+        lotes.append(len(data))
+        await asyncio.sleep(api_ms / 1000)
+        return 201
+
+    scraper.send_to_api = api_simulada
+    inicio = time.monotonic()
+    # A saída de process_urls (uma linha por URL) só atrapalharia o resumo
+    with contextlib.redirect_stdout(io.StringIO()):
+        await scraper.process_urls(
+            urls,
+            replay=True,
+            # A API é simulada: o envio do replay pode ser liberado
+            enviar_replay=True,
+            arquivo_paginas=archive_path,
+            lote_max_registros=lote_max_registros,
+            workers_envio=workers_envio,
+            processos_extracao=0,
+            historico_db='',
+            relatorio_path='',
+            metricas_path='',
+        )
+    return time.monotonic() - inicio, lotes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--urls', type=int, default=DEFAULT_URLS)
+    parser.add_argument('--api-ms', type=int, default=DEFAULT_API_MS)
+    parser.add_argument(
+        '--lote', type=int, default=scraper.LOTE_MAX_REGISTROS or 100
+    )
+    args = parser.parse_args(argv)
+
+    with open(PAGINA, encoding='utf-8') as f:
+        markdown = f.read()
+    urls = [URL_BASE.format(i) for i in range(args.urls)]
+    falhas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        archive_path = os.path.join(tmp, 'paginas.dat')
+        with PageArchive(archive_path) as archive:
+            for url in urls:
+                archive.append(url, markdown, status=200)
+        for workers_envio in (scraper.WORKERS_ENVIO or 8, 0):
+            duracao, lotes = asyncio.run(
+                executar(
+                    urls, archive_path, args.api_ms, args.lote, workers_envio
+                )
+            )
+            registros = sum(lotes)
+            print(
+                f'workers_envio={workers_envio}: {registros} registros em '
+                f'{len(lotes)} lotes (maior {max(lotes, default=0)}), '
+                f'{duracao:.1f}s'
+            )
+            if registros >= args.lote and max(lotes) < args.lote:
+                falhas.append(
+                    f'workers_envio={workers_envio}: nenhum lote chegou a '
+                    f'{args.lote} registros'
+                )
+            if duracao >= scraper.LOTE_MAX_ESPERA:
+                falhas.append(
+                    f'workers_envio={workers_envio}: {duracao:.1f}s, os lotes '
+                    f'esperaram o timer de {scraper.LOTE_MAX_ESPERA:.0f}s'
+                )
+    for falha in falhas:
+        print(f'FALHA {falha}')
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
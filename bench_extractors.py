@@ -0,0 +1,426 @@
+"""
+Benchmark offline dos extratores sobre um corpus de páginas em Markdown.
+
+Cada extrator roda sobre os arquivos de fixtures/extractors/<extrator>/*.md
+e o resultado (páginas/s, pior tempo por página, pico de memória alocada
+por página e um digest da saída) é comparado com a baseline salva em
+fixtures/bench_baseline.json. Uma queda de desempenho acima da tolerância ou
+uma mudança na saída faz o script terminar com código 1. Os tempos da
+baseline só valem para a máquina em que foram medidos: gere-a de novo
+(--update-baseline) ao trocar de máquina ou de runner.
+
+    python bench_extractors.py                      # compara com a baseline
+    python bench_extractors.py --update-baseline    # grava uma nova baseline
+    python bench_extractors.py --capture URL ...    # salva páginas reais no corpus
+    python bench_extractors.py --capture URL --into details
+    python bench_extractors.py --parity             # compara os backends de details
+    python bench_extractors.py --convert            # gera o Markdown a partir do HTML
+
+O corpus inicial é sintético: as páginas têm os trechos que cada extrator
+procura, cercados de ruído (links, imagens, avaliações) para chegar ao
+tamanho de uma página real. Páginas capturadas com --capture são gravadas
+no diretório do extrator correspondente e passam a fazer parte do corpus.
+
+Os extratores que leem o HTML renderizado rodam sobre *.html: o backend
+DOM de details (details_dom) e a leitura estruturada da Amazon e do Mercado
+Livre (amazon_html, meli_html). --parity compara cada um com o extrator de
+Markdown nas páginas presentes nos dois diretórios: a saída crua inteira
+para details (os dois backends entregam os links das seções como
+[texto](url absoluta)) e as chaves das lojas (PARITY_KEYS) para os
+marketplaces, onde preço e imagem podem vir de fontes diferentes. No
+Mercado Livre o key_sku fica de fora: a leitura estruturada chaveia cada
+oferta pelo item_id do melidata, que o Markdown sem scripts não tem. O
+Markdown dessas páginas nunca é escrito à mão: vem de uma captura (HTML e
+Markdown da mesma página) ou de --convert, que passa cada HTML pela mesma
+conversão do Crawl4AI usada no crawl, com a URL do <link rel="canonical">
+da página (ou DETAILS_URL). Os tempos de details não incluem essa
+conversão, que o backend DOM dispensa no crawl e custa bem mais que as
+duas extrações.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import hashlib
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+from extractors import AmazonExtractor, BelezaExtractor, MeliExtractor, get_extractor
+
+CORPUS_DIR = os.path.join('fixtures', 'extractors')
+BASELINE_FILE = os.path.join('fixtures', 'bench_baseline.json')
+# data_hora fixo para que a saída dos extratores seja determinística
+DATA_HORA_FIXA = '2000-01-01T00:00:00Z'
+DEFAULT_ROUNDS = 30
+# Variação tolerada em relação à baseline antes de acusar regressão; folgada
+# o bastante para absorver o ruído da máquina e ainda pegar um regex que
+# deixou o extrator várias vezes mais lento
+DEFAULT_TOLERANCE = 0.5
+# URL usada para resolver os links relativos das páginas de details
+DETAILS_URL = 'https://www.belezanaweb.com.br/produto/'
+
+
+CANONICAL_RE = re.compile(r'<link[^>]+rel="canonical"[^>]+href="([^"]+)"')
+
+
+def page_url(page_html):
+    """URL da página pelo <link rel="canonical">; DETAILS_URL se não houver."""
+    match = CANONICAL_RE.search(page_html)
+    return match.group(1) if match else DETAILS_URL
+
+
+def extract_details(markdown, url=None):
+    # details importa o Crawl4AI; só é carregado quando o extrator é usado
+    from details import extract_data_from_markdown
+
+    return extract_data_from_markdown(markdown)
+
+
+def extract_details_dom(page_html, url=None):
+    from details import extract_data_from_html
+
+    return extract_data_from_html(page_html, url or page_url(page_html))
+
+
+def structured(extractor):
+    def extract(page_html, url=None):
+        return extractor.extract_structured(
+            page_html, url or page_url(page_html), DATA_HORA_FIXA
+        )
+
+    return extract
+
+
+EXTRACTORS = {
+    'amazon': lambda md, url=None: AmazonExtractor().extract(
+        md, DATA_HORA_FIXA, url
+    ),
+    'amazon_html': structured(AmazonExtractor()),
+    'beleza': lambda md, url=None: BelezaExtractor().extract(
+        md, DATA_HORA_FIXA, url
+    ),
+    'meli': lambda md, url=None: MeliExtractor().extract(
+        md, DATA_HORA_FIXA, url
+    ),
+    'meli_html': structured(MeliExtractor()),
+    'details': extract_details,
+    'details_dom': extract_details_dom,
+}
+# Extensão dos arquivos do corpus de cada extrator (o padrão é .md)
+CORPUS_SUFFIXES = {
+    'amazon_html': '.html',
+    'details_dom': '.html',
+    'meli_html': '.html',
+}
+# Campos que identificam as lojas na API; o key_sku do Mercado Livre é o
+# item_id do melidata, ausente no Markdown convertido sem os scripts
+PARITY_KEYS = ('sku', 'loja', 'key_loja', 'key_sku')
+MELI_PARITY_KEYS = ('sku', 'loja', 'key_loja')
+# Extratores que devem produzir a mesma saída (ou os mesmos campos) para a
+# mesma página: (Markdown, HTML, campos comparados ou None para todos)
+PARITY_PAIRS = (
+    ('details', 'details_dom', None),
+    ('amazon', 'amazon_html', PARITY_KEYS),
+    ('meli', 'meli_html', MELI_PARITY_KEYS),
+)
+MARKETPLACE_DIRS = {
+    'Amazon': 'amazon',
+    'Beleza na Web': 'beleza',
+    'Mercado Livre': 'meli',
+}
+
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    """Retorna {extrator: [(nome, markdown), ...]} com as páginas do corpus."""
+    corpus = {}
+    for nome in sorted(EXTRACTORS):
+        diretorio = os.path.join(corpus_dir, nome)
+        if not os.path.isdir(diretorio):
+            continue
+        paginas = []
+        sufixo = CORPUS_SUFFIXES.get(nome, '.md')
+        for arquivo in sorted(os.listdir(diretorio)):
+            if arquivo.endswith(sufixo):
+                with open(os.path.join(diretorio, arquivo), encoding='utf-8') as f:
+                    paginas.append((arquivo[: -len(sufixo)], f.read()))
+        if paginas:
+            corpus[nome] = paginas
+    return corpus
+
+
+def output_digest(resultados):
+    texto = json.dumps(resultados, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+
+
+def bench_extractor(extract, paginas, rounds=DEFAULT_ROUNDS):
+    """Mede um extrator sobre as páginas; retorna o resumo do benchmark."""
+    # Os extratores imprimem e logam o que capturam; no benchmark isso só atrapalha
+    logging.disable(logging.CRITICAL)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(
+            devnull
+        ):
+            return measure(extract, paginas, rounds)
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def measure(extract, paginas, rounds):
+    resultados = [extract(markdown) for _, markdown in paginas]  # aquecimento
+
+    tempos = {nome: [] for nome, _ in paginas}
+    gc.collect()
+    inicio = time.perf_counter()
+    for _ in range(rounds):
+        for nome, markdown in paginas:
+            t0 = time.perf_counter()
+            extract(markdown)
+            tempos[nome].append(time.perf_counter() - t0)
+    total = time.perf_counter() - inicio
+
+    # Alocações medidas numa passada separada: o tracemalloc deixa tudo mais lento
+    picos = {}
+    tracemalloc.start()
+    try:
+        for nome, markdown in paginas:
+            tracemalloc.reset_peak()
+            antes = tracemalloc.get_traced_memory()[0]
+            extract(markdown)
+            picos[nome] = (tracemalloc.get_traced_memory()[1] - antes) / 1024
+    finally:
+        tracemalloc.stop()
+
+    # Como no timeit, o menor tempo de cada página é o menos afetado por
+    # ruído da máquina; a pior página é a de maior tempo mínimo
+    minimos = {nome: min(ts) for nome, ts in tempos.items()}
+    pior = max(minimos, key=minimos.get)
+    return {
+        'paginas': len(paginas),
+        'paginas_por_segundo': len(paginas) * rounds / total,
+        'pior_pagina': pior,
+        'pior_pagina_ms': minimos[pior] * 1000,
+        'pico_kb_medio': statistics.mean(picos.values()),
+        'pico_kb_max': max(picos.values()),
+        'digest': output_digest(resultados),
+    }
+
+
+def compare(atual, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Retorna a lista de regressões de `atual` em relação à `baseline`."""
+    regressoes = []
+    for nome, resumo in sorted(atual.items()):
+        base = baseline.get(nome)
+        if base is None:
+            continue
+        if base['paginas'] != resumo['paginas']:
+            regressoes.append(
+                f"{nome}: corpus mudou ({base['paginas']} -> {resumo['paginas']} páginas), "
+                'atualize a baseline'
+            )
+            continue
+        if resumo['digest'] != base['digest']:
+            regressoes.append(f'{nome}: a saída do extrator mudou')
+        if resumo['paginas_por_segundo'] < base['paginas_por_segundo'] * (
+            1 - tolerance
+        ):
+            regressoes.append(
+                f"{nome}: {resumo['paginas_por_segundo']:.0f} páginas/s "
+                f"(baseline {base['paginas_por_segundo']:.0f})"
+            )
+        for chave, unidade in (('pior_pagina_ms', 'ms'), ('pico_kb_max', 'KB')):
+            if resumo[chave] > base[chave] * (1 + tolerance):
+                regressoes.append(
+                    f'{nome}: {chave} {resumo[chave]:.2f} {unidade} '
+                    f'(baseline {base[chave]:.2f} {unidade})'
+                )
+    return regressoes
+
+
+def parity(corpus):
+    """Retorna as diferenças entre os extratores de PARITY_PAIRS em cada página comum."""
+    diferencas = []
+    logging.disable(logging.CRITICAL)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(
+            devnull
+        ):
+            for referencia, candidato, campos in PARITY_PAIRS:
+                paginas = dict(corpus.get(candidato, []))
+                for nome, texto in corpus.get(referencia, []):
+                    if nome not in paginas:
+                        continue
+                    url = page_url(paginas[nome])
+                    esperado = EXTRACTORS[referencia](texto, url)
+                    obtido = EXTRACTORS[candidato](paginas[nome], url)
+                    # Sem dados estruturados na página, o crawl usa o Markdown
+                    if obtido is None:
+                        continue
+                    if campos is not None:
+                        esperado = [
+                            {campo: item.get(campo) for campo in campos}
+                            for item in esperado
+                        ]
+                        obtido = [
+                            {campo: item.get(campo) for campo in campos}
+                            for item in obtido
+                        ]
+                    if len(esperado) != len(obtido):
+                        diferencas.append(
+                            f'{candidato}/{nome}: {len(obtido)} itens '
+                            f'({referencia}: {len(esperado)})'
+                        )
+                        continue
+                    for a, b in zip(esperado, obtido):
+                        for campo in sorted(set(a) | set(b)):
+                            if a.get(campo) != b.get(campo):
+                                diferencas.append(
+                                    f'{candidato}/{nome}: {campo} = '
+                                    f'{b.get(campo)!r} ({referencia}: {a.get(campo)!r})'
+                                )
+    finally:
+        logging.disable(logging.NOTSET)
+    return diferencas
+
+
+def print_table(atual, baseline):
+    print(
+        f"{'extrator':<12}{'páginas':>8}{'pág/s':>12}{'base pág/s':>12}"
+        f"{'pior ms':>10}{'pico KB':>10}  pior página"
+    )
+    for nome, resumo in sorted(atual.items()):
+        base = baseline.get(nome, {}).get('paginas_por_segundo')
+        print(
+            f"{nome:<12}{resumo['paginas']:>8}{resumo['paginas_por_segundo']:>12.0f}"
+            f"{(f'{base:.0f}' if base else '-'):>12}"
+            f"{resumo['pior_pagina_ms']:>10.3f}{resumo['pico_kb_max']:>10.1f}"
+            f"  {resumo['pior_pagina']}"
+        )
+
+
+async def capture(urls, corpus_dir=CORPUS_DIR, into=None):
+    """
+    Renderiza as URLs com o Crawl4AI e salva o Markdown no corpus, no
+    diretório do marketplace da URL ou no do extrator `into`.
+    """
+    from crawl4ai import AsyncWebCrawler
+
+    async with AsyncWebCrawler(verbose=False) as crawler:
+        for url in urls:
+            extractor = get_extractor(url)
+            if extractor is None:
+                print(f'URL não reconhecida: {url}')
+                continue
+            result = await crawler.arun(url=url, bypass_cache=True)
+            nome = hashlib.sha256(url.encode('utf-8')).hexdigest()[:12]
+            conteudos = {
+                into or MARKETPLACE_DIRS[extractor.marketplace]: result.markdown
+            }
+            # Os extratores de HTML são comparados com o Markdown da mesma captura
+            for referencia, candidato, _ in PARITY_PAIRS:
+                if referencia in conteudos:
+                    conteudos[candidato] = result.html
+            for extrator, conteudo in conteudos.items():
+                diretorio = os.path.join(corpus_dir, extrator)
+                os.makedirs(diretorio, exist_ok=True)
+                caminho = os.path.join(
+                    diretorio,
+                    f'capturada_{nome}{CORPUS_SUFFIXES.get(extrator, ".md")}',
+                )
+                with open(caminho, 'w', encoding='utf-8') as f:
+                    f.write(str(conteudo or ''))
+                print(f'{url} -> {caminho}')
+
+
+def convert(corpus_dir=CORPUS_DIR):
+    """
+    Regrava o Markdown de cada página HTML dos extratores de PARITY_PAIRS
+    com a conversão do Crawl4AI, para que os dois lados venham da mesma
+    página.
+    """
+    from details import markdown_from_html
+
+    for referencia, candidato, _ in PARITY_PAIRS:
+        origem = os.path.join(corpus_dir, candidato)
+        destino = os.path.join(corpus_dir, referencia)
+        sufixo = CORPUS_SUFFIXES.get(candidato, '.md')
+        if not os.path.isdir(origem):
+            continue
+        os.makedirs(destino, exist_ok=True)
+        for arquivo in sorted(os.listdir(origem)):
+            if not arquivo.endswith(sufixo):
+                continue
+            with open(os.path.join(origem, arquivo), encoding='utf-8') as f:
+                page_html = f.read()
+            markdown = markdown_from_html(page_html, page_url(page_html))
+            caminho = os.path.join(destino, arquivo[: -len(sufixo)] + '.md')
+            with open(caminho, 'w', encoding='utf-8') as f:
+                f.write(markdown)
+            print(f'{arquivo} -> {caminho}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--only', nargs='*', choices=sorted(EXTRACTORS))
+    parser.add_argument('--corpus', default=CORPUS_DIR)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--capture', nargs='+', metavar='URL')
+    parser.add_argument('--into', choices=sorted(EXTRACTORS))
+    parser.add_argument('--parity', action='store_true')
+    parser.add_argument('--convert', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.capture:
+        asyncio.run(capture(args.capture, args.corpus, args.into))
+        return 0
+    if args.convert:
+        convert(args.corpus)
+        return 0
+
+    corpus = load_corpus(args.corpus)
+    if args.parity:
+        diferencas = parity(corpus)
+        for diferenca in diferencas:
+            print(f'DIVERGÊNCIA {diferenca}')
+        if not diferencas:
+            print('Backends com a mesma saída em todas as páginas comuns')
+        return 1 if diferencas else 0
+    if args.only:
+        corpus = {nome: corpus[nome] for nome in args.only if nome in corpus}
+    atual = {
+        nome: bench_extractor(EXTRACTORS[nome], paginas, args.rounds)
+        for nome, paginas in corpus.items()
+    }
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_table(atual, baseline)
+
+    if args.update_baseline:
+        baseline.update(atual)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline salva em {args.baseline}')
+        return 0
+
+    regressoes = compare(atual, baseline, args.tolerance)
+    for regressao in regressoes:
+        print(f'REGRESSÃO {regressao}')
+    return 1 if regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import asyncio
+
+try:
+    import psutil
+except ImportError:  # psutil é opcional: sem ele só o limite de páginas vale
+    psutil = None
+
+# Limites padrão para reciclar o navegador
+MAX_BROWSER_RSS_MB = 1500
+MAX_PAGES_PER_BROWSER = 200
+# A memória é medida a cada tantas páginas servidas
+RSS_CHECK_INTERVAL = 5
+
+
+# Marca na linha de comando dos processos do multiprocessing (workers do
+# ExtractionPool e o resource tracker), que não fazem parte do navegador
+MULTIPROCESSING_MARKER = 'multiprocessing'
+
+
+def is_multiprocessing(process):
+    try:
+        return any(MULTIPROCESSING_MARKER in parte for parte in process.cmdline())
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return False
+
+
+def child_pids():
+    """PIDs dos filhos diretos deste processo, fora os do multiprocessing."""
+    if psutil is None:
+        return set()
+    return {
+        child.pid
+        for child in psutil.Process().children()
+        if not is_multiprocessing(child)
+    }
+
+
+def browser_rss_mb(root_pids):
+    """Soma a memória residente (MB) de `root_pids` (driver e Chromium) e seus filhos."""
+    if psutil is None:
+        return 0.0
+    total = 0
+    for pid in root_pids:
+        try:
+            raiz = psutil.Process(pid)
+            processos = [raiz] + raiz.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+        for processo in processos:
+            try:
+                total += processo.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+    return total / (1024 * 1024)
+
+
+class BrowserWatchdog:
+    """
+    Envolve o AsyncWebCrawler e reinicia o navegador quando ele fica pesado.
+
+    Expõe `arun` e `crawler_strategy` como o próprio crawler, então pode ser
+    passado no lugar dele. Ao ultrapassar `max_rss_mb` de memória dos
+    processos do navegador (os filhos criados ao abrir o crawler, sem os do
+    pool de extração) ou `max_pages` páginas servidas, novas chamadas
+    de `arun` passam a aguardar; quando a última renderização em andamento
+    termina (ponto seguro), o crawler é fechado e recriado com `factory`, as
+    funções registradas em `on_start` são reaplicadas e as chamadas em
+    espera continuam — nenhuma URL da fila é perdida.
+    """
+
+    def __init__(
+        self,
+        factory,
+        max_rss_mb=MAX_BROWSER_RSS_MB,
+        max_pages=MAX_PAGES_PER_BROWSER,
+        check_interval=RSS_CHECK_INTERVAL,
+    ):
+        self.factory = factory
+        self.max_rss_mb = max_rss_mb
+        self.max_pages = max_pages
+        self.check_interval = check_interval
+        self.crawler = None
+        self.browser_pids = set()
+        self.start_callbacks = []
+        self.active = 0
+        self.pages_served = 0
+        self.restarts = 0
+        self.peak_rss_mb = 0.0
+        self.restarting = False
+        self.ready = asyncio.Event()
+
+    @property
+    def crawler_strategy(self):
+        return self.crawler.crawler_strategy
+
+    def on_start(self, callback):
+        """Registra `callback(crawler)`, aplicado agora e a cada reinício."""
+        self.start_callbacks.append(callback)
+        if self.crawler is not None:
+            callback(self.crawler)
+
+    async def start(self):
+        self.crawler = self.factory()
+        anteriores = child_pids()
+        await self.crawler.__aenter__()
+        self.browser_pids = child_pids() - anteriores
+        for callback in self.start_callbacks:
+            callback(self.crawler)
+        self.pages_served = 0
+        self.ready.set()
+        return self
+
+    async def close(self):
+        if self.crawler is not None:
+            await self.crawler.__aexit__(None, None, None)
+            self.crawler = None
+            self.browser_pids = set()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def should_recycle(self):
+        if self.max_pages and self.pages_served >= self.max_pages:
+            print(
+                f'Navegador serviu {self.pages_served} páginas, reiniciando'
+            )
+            return True
+        if (
+            self.max_rss_mb
+            and self.check_interval
+            and self.pages_served % self.check_interval == 0
+        ):
+            rss = browser_rss_mb(self.browser_pids)
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+            if rss >= self.max_rss_mb:
+                print(f'Navegador usando {rss:.0f} MB, reiniciando')
+                return True
+        return False
+
+    async def restart(self):
+        try:
+            await self.close()
+            await self.start()
+            self.restarts += 1
+        finally:
+            self.restarting = False
+            self.ready.set()
+
+    async def arun(self, *args, **kwargs):
+        url = str(kwargs.get('url', args[0] if args else ''))
+        while self.restarting:
+            await self.ready.wait()
+        self.active += 1
+        try:
+            return await self.crawler.arun(*args, **kwargs)
+        finally:
+            self.active -= 1
+            # Conversões de HTML bruto (raw:) não abrem página no navegador
+            if not url.startswith('raw:'):
+                self.pages_served += 1
+                if not self.restarting and self.should_recycle():
+                    self.restarting = True
+                    self.ready.clear()
+            if self.restarting and self.active == 0:
+                await self.restart()
+
+    def summary(self):
+        return (
+            f'{self.restarts} reinícios do navegador, '
+            f'pico de {self.peak_rss_mb:.0f} MB'
+        )
@@ -1,68 +1,195 @@
 import re
 import logging
 import asyncio
-import aiohttp
+import contextlib
+import functools
 from datetime import datetime
 from typing import List, Dict
-from crawl4ai import AsyncWebCrawler
+from urllib.parse import urljoin
+from crawl4ai import AsyncWebCrawler, CacheMode, CrawlerRunConfig
+from crawl4ai.content_scraping_strategy import (
+    ContentScrapingStrategy,
+    ScrapingResult,
+)
+from crawl4ai.markdown_generation_strategy import (
+    DefaultMarkdownGenerator,
+    MarkdownGenerationStrategy,
+)
+from crawl4ai.models import MarkdownGenerationResult
+from crawl4ai.utils import sanitize_input_encode
+from lxml import etree
+from api_client import ApiClient
+from browser_watchdog import BrowserWatchdog
+from extraction_pool import DEFAULT_EXTRACTION_WORKERS, ExtractionPool
+from fingerprint import UNCHANGED, FingerprintCache
+from page_archive import PageArchive, ReplayCrawler
+from politeness import (
+    PolitenessScheduler,
+    is_block_html,
+    is_block_page,
+    visible_text,
+)
+from resource_blocking import ResourceBlocker
+from retry_policy import (
+    FAIL_PARSE,
+    PERMANENT_FAILURES,
+    RetryPolicy,
+    classify_exception,
+    classify_response,
+)
+from sharding import filter_shard, parse_shard_args, shard_path
+from tab_pool import TabPool
+from recrawl import VolatilityTracker
+from work_queue import LANE_PARKED, LANE_RETRY, WorkQueue, run_workers
 import json
 import os
+import socket
 
 # Configura o logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Arquivo para persistir URLs com erro
+# Arquivo legado com as URLs com erro; só é lido para migrar para a fila
 FAILED_URLS_FILE = 'failed_urls.json'
 
+# Fila de trabalho persistente com tentativas e backoff por URL
+WORK_QUEUE_FILE = 'details_work_queue.db'
 
-def save_failed_urls(failed_urls: List[str]):
-    """Salva URLs com erro em um arquivo JSON."""
-    try:
-        with open(FAILED_URLS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(failed_urls, f, ensure_ascii=False, indent=2)
-        logger.info(
-            f'URLs com erro salvas em {FAILED_URLS_FILE}: {failed_urls}'
-        )
-    except Exception as e:
-        logger.error(f'Erro ao salvar URLs com erro: {e}')
+# Arquivo das páginas renderizadas (vazio desativa a captura) e modo replay;
+# o replay só envia para a API com ENVIAR_REPLAY=1
+PAGE_ARCHIVE_FILE = 'details_page_archive.dat'
+ARQUIVO_PAGINAS = os.getenv('ARQUIVO_PAGINAS_DETALHES', '')
+REPLAY = os.getenv('REPLAY', '0') == '1'
+ENVIAR_REPLAY = os.getenv('ENVIAR_REPLAY', '0') == '1'
+
+# Processos que extraem os dados do Markdown fora do event loop (0 desativa)
+PROCESSOS_EXTRACAO = int(
+    os.getenv('PROCESSOS_EXTRACAO', str(DEFAULT_EXTRACTION_WORKERS))
+)
+
+# Cache de conteúdo por URL para pular páginas inalteradas
+FINGERPRINTS_FILE = 'details_fingerprints.json'
+
+# Backend de extração: 'markdown' usa as regex sobre o Markdown; 'dom' lê os
+# campos direto do HTML renderizado e dispensa a limpeza e o Markdown do
+# Crawl4AI, que só é gerado como fallback quando o HTML não tem o SKU. Antes
+# de trocar, confira a paridade dos dois backends nas páginas capturadas
+# (bench_extractors.py --parity)
+BACKEND_DOM = 'dom'
+BACKEND_MARKDOWN = 'markdown'
+BACKEND_EXTRACAO = os.getenv('BACKEND_EXTRACAO', BACKEND_MARKDOWN)
 
 
-def load_failed_urls() -> List[str]:
+def load_failed_urls(path: str = FAILED_URLS_FILE) -> List[str]:
     """Carrega URLs com erro do arquivo JSON."""
-    if os.path.exists(FAILED_URLS_FILE):
+    if os.path.exists(path):
         try:
-            with open(FAILED_URLS_FILE, 'r', encoding='utf-8') as f:
+            with open(path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
             logger.error(f'Erro ao carregar URLs com erro: {e}')
     return []
 
 
-def extract_data_from_markdown(markdown: str) -> List[Dict]:
+# Padrões compilados uma única vez para a extração dos detalhes do produto
+SKU_RE = re.compile(r'\*\*Cod:\*\* (MP\d+|\d+)')
+LINK_RE = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+BOLD_RE = re.compile(r'\*\*([^\*]+)\*\*')
+IMAGE_RE = re.compile(r'!\[[^\]]*\]\([^\)]+\)')
+HEADING_RE = re.compile(r'#{1,3}\s*')
+WHITESPACE_RE = re.compile(r'\s*')
+
+# Títulos de seção; o prefixo literal ### deixa o re saltar direto para
+# cada candidato (uma alternância de rótulos testaria toda posição do texto)
+SECTION_HEADING_RE = re.compile(r'###\s*(Detalhes|Como Usar|Ação / Resultado)')
+LINK_GROUP_TAIL_RE = re.compile(
+    r'\s*((?:(?:\*\*\s*)?\[[^\]]+\]\([^\)]+\)(?:\s*\*\*)?\s*)+)'
+)
+BOLD_LINK_TAIL_RE = re.compile(r'\s*\*\*\s*\[([^\]]+)\]\([^\)]+\)\s*\*\*')
+# Padrão que deve seguir cada rótulo para que a ocorrência seja válida
+LABEL_TAILS = {
+    'Categorias': re.compile(r'\s*\n((?:\[[^\]]+\]\([^\)]+\)\s*)+)'),
+    'Tipos de Cabelo': LINK_GROUP_TAIL_RE,
+    'Condição dos Fios': LINK_GROUP_TAIL_RE,
+    'Desejo de Beleza': re.compile(r'\s*([^\n]+)'),
+    'Tamanho': BOLD_LINK_TAIL_RE,
+    'Propriedades': BOLD_LINK_TAIL_RE,
+    'Marca': BOLD_LINK_TAIL_RE,
+    'Linha': BOLD_LINK_TAIL_RE,
+}
+# Fim da seção Ação / Resultado
+ACAO_END_RE = re.compile(r'##|\n\s*Avaliações|\n\s*\[')
+
+
+def clean_text(text: str) -> str:
+    """Remove formatação Markdown e normaliza espaços."""
+    if text is None:
+        return ''
+    # Remove formatação Markdown como **texto**, ![...](...), ###, ##
+    if '**' in text:
+        text = BOLD_RE.sub(r'\1', text)
+    if '![' in text:
+        text = IMAGE_RE.sub('', text)
+    if '#' in text:
+        text = HEADING_RE.sub('', text)
+    # Substitui quebras de linha e espaços repetidos por um espaço
+    return ' '.join(text.split())
+
+
+def index_sections(markdown: str):
     """
-    Extrai dados do Markdown para o model ProductDetails e retorna uma lista de dicionários.
+    Indexa o Markdown uma única vez para todos os campos.
+
+    Retorna um dicionário com a primeira ocorrência válida de cada rótulo
+    (o match do padrão que o segue) e outro com as posições (início, fim)
+    de cada título de seção ###. Os rótulos são localizados com str.find,
+    que percorre o texto bem mais rápido que uma regex com alternância.
     """
-    products = []
-    logging.info('Extraindo dados do markdown')
+    labels = {}
+    for label, tail_re in LABEL_TAILS.items():
+        pos = markdown.find(label)
+        while pos != -1:
+            tail = tail_re.match(markdown, pos + len(label))
+            if tail:
+                labels[label] = tail
+                break
+            pos = markdown.find(label, pos + 1)
+    headings = {}
+    for heading in SECTION_HEADING_RE.finditer(markdown):
+        headings.setdefault(heading.group(1), []).append(heading.span())
+    return labels, headings
 
-    # Log parcial do Markdown para depuração
-    logging.debug(f'Markdown recebido:\n{markdown[:1000]}...')
 
-    # Extrai o SKU
-    try:
-        sku_pattern = r'\*\*Cod:\*\* (MP\d+|\d+)'
-        sku_match = re.search(sku_pattern, markdown)
-        sku = sku_match.group(1) if sku_match else None
-        if not sku:
-            logging.warning('SKU não encontrado no markdown')
-            return []
-    except re.error as e:
-        logging.error(f'Erro na regex de SKU: {e}')
-        return []
+def section_text(markdown: str, headings, name: str, terminators=()):
+    """
+    Retorna o texto da primeira seção `name` até o próximo título em
+    `terminators` (ou até o fim do documento), ou None se não houver seção.
+    """
+    if name not in headings:
+        return None
+    heading_end = headings[name][0][1]
+    if heading_end >= len(markdown):
+        return None
+    start = WHITESPACE_RE.match(markdown, heading_end).end()
+    end = min(
+        (
+            s
+            for terminator in terminators
+            for s, _ in headings.get(terminator, ())
+            if s > start
+        ),
+        default=len(markdown),
+    )
+    return markdown[start:end]
+
 
-    # Inicializa o dicionário com valores padrão
-    product = {
+def join_links(text: str) -> str:
+    return ','.join(clean_text(link) for link in LINK_RE.findall(text))
+
+
+def default_product(sku: str) -> Dict:
+    """Dicionário de ProductDetails com os valores padrão dos campos."""
+    return {
         'sku': sku,
         'categorias': 'Desconhecido',
         'tipos_de_cabelo': 'Desconhecido',
@@ -77,283 +204,717 @@ def extract_data_from_markdown(markdown: str) -> List[Dict]:
         'acao_resultado': 'Sem resultados',
     }
 
-    # Função auxiliar para limpar texto
-    def clean_text(text: str) -> str:
-        if text is None:
-            return ''
-        # Remove formatação Markdown como **texto**, ![...](...), ###, ##
-        text = re.sub(r'\*\*([^\*]+)\*\*', r'\1', text)
-        text = re.sub(r'!\[[^\]]*\]\([^\)]+\)', '', text)
-        text = re.sub(r'#{1,3}\s*', '', text)
-        # Substitui quebras de linha por espaço
-        text = re.sub(r'[\n\r]+', ' ', text)
-        return re.sub(r'\s+', ' ', text.strip())
-
-    # Extrai Categorias
-    try:
-        categorias_pattern = r'Categorias\s*\n((?:\[[^\]]+\]\([^\)]+\)\s*)+)'
-        categorias_match = re.search(categorias_pattern, markdown)
-        if categorias_match:
-            links = re.findall(
-                r'\[([^\]]+)\]\([^\)]+\)', categorias_match.group(1)
-            )
-            product['categorias'] = ','.join(
-                clean_text(link) for link in links
-            )
-    except re.error as e:
-        logging.error(f'Erro na regex de Categorias: {e}')
 
-    # Extrai Tipos de Cabelo
-    try:
-        tipos_cabelo_pattern = r'Tipos de Cabelo\s*[\n\s]*((?:(?:\*\*\s*)?\[[^\]]+\]\([^\)]+\)(?:\s*\*\*)?\s*)+)'
-        tipos_cabelo_match = re.search(
-            tipos_cabelo_pattern, markdown, re.DOTALL
-        )
-        if tipos_cabelo_match:
-            links = re.findall(
-                r'\[([^\]]+)\]\([^\)]+\)', tipos_cabelo_match.group(1)
-            )
-            product['tipos_de_cabelo'] = ','.join(
-                clean_text(link) for link in links
-            )
-        else:
-            logging.warning('Tipos de Cabelo não encontrado no Markdown')
-    except re.error as e:
-        logging.error(f'Erro na regex de Tipos de Cabelo: {e}')
+def extract_data_from_markdown(markdown: str) -> List[Dict]:
+    """
+    Extrai dados do Markdown para o model ProductDetails e retorna uma lista de dicionários.
+    """
+    products = []
+    logging.info('Extraindo dados do markdown')
 
-    # Extrai Condição dos Fios
-    try:
-        condicoes_pattern = r'Condição dos Fios\s*[\n\s]*((?:(?:\*\*\s*)?\[[^\]]+\]\([^\)]+\)(?:\s*\*\*)?\s*)+)'
-        condicoes_match = re.search(condicoes_pattern, markdown, re.DOTALL)
-        if condicoes_match:
-            links = re.findall(
-                r'\[([^\]]+)\]\([^\)]+\)', condicoes_match.group(1)
-            )
-            product['condicoes_dos_fios'] = ','.join(
-                clean_text(link) for link in links
-            )
-        else:
-            logging.warning('Condição dos Fios não encontrada no Markdown')
-    except re.error as e:
-        logging.error(f'Erro na regex de Condição dos Fios: {e}')
+    # Log parcial do Markdown para depuração
+    logging.debug(f'Markdown recebido:\n{markdown[:1000]}...')
 
-    # Extrai Desejo de Beleza
-    try:
-        desejo_pattern = r'Desejo de Beleza\s*([^\n]+)'
-        desejo_match = re.search(desejo_pattern, markdown)
-        if desejo_match:
-            product['desejo_de_beleza'] = clean_text(
-                desejo_match.group(1).replace('  ', ',')
-            )
-    except re.error as e:
-        logging.error(f'Erro na regex de Desejo de Beleza: {e}')
+    # Extrai o SKU
+    sku_match = SKU_RE.search(markdown)
+    sku = sku_match.group(1) if sku_match else None
+    if not sku:
+        logging.warning('SKU não encontrado no markdown')
+        return []
 
-    # Extrai Tamanho
-    try:
-        tamanho_pattern = r'Tamanho\s*\*\*\s*\[([^\]]+)\]\([^\)]+\)\s*\*\*'
-        tamanho_match = re.search(tamanho_pattern, markdown)
-        if tamanho_match:
-            product['tamanho'] = clean_text(tamanho_match.group(1))
-    except re.error as e:
-        logging.error(f'Erro na regex de Tamanho: {e}')
-
-    # Extrai Propriedades
-    try:
-        propriedades_pattern = (
-            r'Propriedades\s*\*\*\s*\[([^\]]+)\]\([^\)]+\)\s*\*\*'
+    product = default_product(sku)
+
+    labels, headings = index_sections(markdown)
+
+    # Grupos de links: Categorias, Tipos de Cabelo, Condição dos Fios
+    if 'Categorias' in labels:
+        product['categorias'] = join_links(labels['Categorias'].group(1))
+    if 'Tipos de Cabelo' in labels:
+        product['tipos_de_cabelo'] = join_links(
+            labels['Tipos de Cabelo'].group(1)
         )
-        propriedades_match = re.search(propriedades_pattern, markdown)
-        if propriedades_match:
-            product['propriedades'] = clean_text(propriedades_match.group(1))
-        else:
-            logging.info(
-                'Propriedades não encontrado no Markdown, mantendo vazio'
-            )
-    except re.error as e:
-        logging.error(f'Erro na regex de Propriedades: {e}')
+    else:
+        logging.warning('Tipos de Cabelo não encontrado no Markdown')
+    if 'Condição dos Fios' in labels:
+        product['condicoes_dos_fios'] = join_links(
+            labels['Condição dos Fios'].group(1)
+        )
+    else:
+        logging.warning('Condição dos Fios não encontrada no Markdown')
 
-    # Extrai Marca
-    try:
-        marca_pattern = r'Marca\s*\*\*\s*\[([^\]]+)\]\([^\)]+\)\s*\*\*'
-        marca_match = re.search(marca_pattern, markdown)
-        if marca_match:
-            product['marca'] = clean_text(marca_match.group(1))
-        else:
-            logging.warning('Marca não encontrada no Markdown')
-    except re.error as e:
-        logging.error(f'Erro na regex de Marca: {e}')
+    if 'Desejo de Beleza' in labels:
+        product['desejo_de_beleza'] = clean_text(
+            labels['Desejo de Beleza'].group(1).replace('  ', ',')
+        )
 
-    # Extrai Linha
-    try:
-        linha_pattern = r'Linha\s*\*\*\s*\[([^\]]+)\]\([^\)]+\)\s*\*\*'
-        linha_match = re.search(linha_pattern, markdown)
-        if linha_match:
-            product['linha'] = clean_text(linha_match.group(1))
-    except re.error as e:
-        logging.error(f'Erro na regex de Linha: {e}')
-
-    # Extrai Detalhes
-    try:
-        detalhes_pattern = r'###\s*Detalhes\s*([\s\S]+?)(?=(###\s*Como Usar|###\s*Ação / Resultado|$))'
-        detalhes_match = re.search(detalhes_pattern, markdown, re.DOTALL)
-        if detalhes_match:
-            product['detalhes'] = clean_text(detalhes_match.group(1))
-    except re.error as e:
-        logging.error(f'Erro na regex de Detalhes: {e}')
-
-    # Extrai Como Usar
-    try:
-        como_usar_pattern = (
-            r'###\s*Como Usar\s*([\s\S]+?)(?=(###\s*Ação / Resultado|$))'
+    # Links únicos em negrito: Tamanho, Propriedades, Marca, Linha
+    for label, field in (
+        ('Tamanho', 'tamanho'),
+        ('Propriedades', 'propriedades'),
+        ('Marca', 'marca'),
+        ('Linha', 'linha'),
+    ):
+        if label in labels:
+            product[field] = clean_text(labels[label].group(1))
+    if 'Propriedades' not in labels:
+        logging.info('Propriedades não encontrado no Markdown, mantendo vazio')
+    if 'Marca' not in labels:
+        logging.warning('Marca não encontrada no Markdown')
+
+    # Seções de texto: Detalhes, Como Usar, Ação / Resultado
+    detalhes = section_text(
+        markdown, headings, 'Detalhes', ('Como Usar', 'Ação / Resultado')
+    )
+    if detalhes is not None:
+        product['detalhes'] = clean_text(detalhes)
+    como_usar = section_text(
+        markdown, headings, 'Como Usar', ('Ação / Resultado',)
+    )
+    if como_usar is not None:
+        product['como_usar'] = clean_text(como_usar)
+    acao = section_text(markdown, headings, 'Ação / Resultado')
+    if acao is not None:
+        acao_end = ACAO_END_RE.search(acao, 1)
+        product['acao_resultado'] = clean_text(
+            acao[: acao_end.start()] if acao_end else acao
         )
-        como_usar_match = re.search(como_usar_pattern, markdown, re.DOTALL)
-        if como_usar_match:
-            como_usar_text = como_usar_match.group(1)
-            product['como_usar'] = clean_text(como_usar_text)
-    except re.error as e:
-        logging.error(f'Erro na regex de Como Usar: {e}')
-
-    # Extrai Ação / Resultado
-    try:
-        acao_pattern = r'###\s*Ação / Resultado\s*([\s\S]+?)(?=(##|\n\s*Avaliações|\n\s*\[|$))'
-        acao_match = re.search(acao_pattern, markdown, re.DOTALL)
-        if acao_match:
-            product['acao_resultado'] = clean_text(acao_match.group(1))
-        else:
-            logging.warning('Ação / Resultado não encontrado no Markdown')
-    except re.error as e:
-        logging.error(f'Erro na regex de Ação / Resultado: {e}')
+    else:
+        logging.warning('Ação / Resultado não encontrado no Markdown')
 
     products.append(product)
     logging.info(f'Extraídos {len(products)} itens do markdown')
     return products
 
 
-async def crawl_url(crawler, url):
+# Rótulos de cada campo no HTML e como o valor que os segue é lido: grupo de
+# links, link único ou lista de textos
+DOM_FIELDS = {
+    'Categorias': ('categorias', 'grupo'),
+    'Tipos de Cabelo': ('tipos_de_cabelo', 'grupo'),
+    'Condição dos Fios': ('condicoes_dos_fios', 'grupo'),
+    'Tamanho': ('tamanho', 'link'),
+    'Propriedades': ('propriedades', 'link'),
+    'Marca': ('marca', 'link'),
+    'Linha': ('linha', 'link'),
+    'Desejo de Beleza': ('desejo_de_beleza', 'texto'),
+}
+SECTION_HEADINGS = ('Detalhes', 'Como Usar', 'Ação / Resultado')
+BLOCK_HEADINGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+DOM_SKU_RE = re.compile(r'\s*(MP\d+|\d+)')
+# Parser reaproveitado entre as páginas; sem índice de ids nem espaços vazios.
+# A página é passada em bytes UTF-8: com str, o lxml recusa documentos que
+# tragam declaração de encoding
+HTML_PARSER = etree.HTMLParser(
+    encoding='utf-8',
+    remove_blank_text=True,
+    remove_comments=True,
+    collect_ids=False,
+)
+
+
+def node_text(node) -> str:
+    return ' '.join(''.join(node.itertext()).split())
+
+
+def markdown_text(node, base_url='') -> str:
     """
-    Extrai dados de uma URL e retorna uma lista de ProductDetails.
+    Texto do nó no formato que as seções têm no Markdown depois do
+    clean_text: links continuam como [texto](url), com a URL absoluta, e
+    imagens são descartadas.
     """
-    logging.info(f'Extraindo dados da URL: {url}')
-    try:
-        result = await crawler.arun(
-            url,
-            timeout=60,
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            },
+    partes = []
+
+    def visitar(elemento):
+        if elemento.tag == 'img':
+            return
+        href = elemento.get('href') if elemento.tag == 'a' else None
+        if href:
+            texto = node_text(elemento)
+            partes.append(f'[{texto}]({urljoin(base_url, href)})')
+        else:
+            partes.append(elemento.text or '')
+            for filho in elemento.iterchildren(etree.Element):
+                visitar(filho)
+                partes.append(filho.tail or '')
+
+    visitar(node)
+    return ' '.join(''.join(partes).split())
+
+
+def markdown_from_html(page_html: str, url: str = '') -> str:
+    """
+    Converte o HTML renderizado em Markdown com as mesmas etapas que o
+    Crawl4AI aplica no `arun` (limpeza do HTML e geração do Markdown).
+    """
+    config = CrawlerRunConfig()
+    params = config.__dict__.copy()
+    params.pop('url', None)
+    scraped = config.scraping_strategy.scrap(url, page_html, **params)
+    return DefaultMarkdownGenerator().generate_markdown(
+        cleaned_html=sanitize_input_encode(scraped.cleaned_html), base_url=url
+    ).raw_markdown
+
+
+class SkipScraping(ContentScrapingStrategy):
+    """
+    Não limpa o HTML: com o backend DOM os campos são lidos do HTML bruto e
+    a limpeza do Crawl4AI (a etapa mais cara do `arun`) seria descartada.
+    """
+
+    logger = None
+
+    def scrap(self, url, html, **kwargs):
+        return ScrapingResult(cleaned_html='', success=True)
+
+    async def ascrap(self, url, html, **kwargs):
+        return self.scrap(url, html, **kwargs)
+
+
+class SkipMarkdown(MarkdownGenerationStrategy):
+    """Não gera o Markdown; ver SkipScraping."""
+
+    def generate_markdown(self, cleaned_html, base_url='', **kwargs):
+        return MarkdownGenerationResult(
+            raw_markdown='', markdown_with_citations='', references_markdown=''
         )
-        markdown_content = result.markdown
-        products = extract_data_from_markdown(markdown_content)
-        if not products:
-            logging.warning(f'Sem dados ou SKU não encontrado para {url}')
-        logging.info(f'Extraídos {len(products)} itens da URL {url}')
-        return products
-    except Exception as e:
-        logging.error(f'Erro ao crawlear a URL {url}: {e}')
+
+
+# Uma instância só: o Crawl4AI reaproveita o contexto do navegador pela
+# assinatura da config, que inclui o gerador de Markdown
+SKIP_MARKDOWN = SkipMarkdown()
+# Tempo máximo (ms) de carregamento de uma página no navegador
+RENDER_TIMEOUT_MS = 60 * 1000
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+@functools.lru_cache(maxsize=256)
+def render_config(session_id=None, backend=BACKEND_MARKDOWN):
+    """
+    Config do `arun` de uma página; o Crawl4AI 0.5 ignora os argumentos
+    avulsos do `arun` (session_id, timeout...). Com o backend DOM, só busca
+    e renderiza a página. Montar uma CrawlerRunConfig custa dezenas de ms,
+    então cada combinação é montada uma vez.
+    """
+    estrategias = {}
+    if backend == BACKEND_DOM:
+        estrategias = {
+            'scraping_strategy': SkipScraping(),
+            'markdown_generator': SKIP_MARKDOWN,
+        }
+    return CrawlerRunConfig(
+        session_id=session_id,
+        cache_mode=CacheMode.BYPASS,
+        page_timeout=RENDER_TIMEOUT_MS,
+        user_agent=USER_AGENT,
+        **estrategias,
+    )
+
+
+def bold_link(node):
+    """O link de um nó em negrito com um link (ou de um link em negrito); senão None."""
+    if node.tag == 'a':
+        return node if next(node.iter('strong', 'b'), None) is not None else None
+    if node.tag in ('strong', 'b') and not (node.text or '').strip():
+        return next(node.iter('a'), None)
+    return None
+
+
+def inline_links(node):
+    """Links seguidos (em negrito ou não) a partir de `node`, só com espaços entre eles."""
+    links = []
+    while node is not None:
+        link = node if node.tag == 'a' else bold_link(node)
+        if link is None:
+            break
+        links.append(link)
+        if (node.tail or '').strip():
+            break
+        node = node.getnext()
+    return links
+
+
+def label_value(label, kind):
+    """
+    Valor que segue o rótulo dentro do mesmo bloco, conforme o tipo do
+    campo; None se não houver. Só vale o que vem logo depois do rótulo: o
+    resto da linha (texto), o link em negrito seguinte (link) ou os links do
+    elemento seguinte (grupo), como nos padrões do Markdown.
+    """
+    if kind == 'texto':
+        textos = [label.tail or '']
+        for node in label.itersiblings(etree.Element):
+            textos.append(''.join(node.itertext()))
+            textos.append(node.tail or '')
+        return ' '.join(' '.join(textos).split()) or None
+    if (label.tail or '').strip():
+        return None
+    seguinte = label.getnext()
+    if seguinte is None:
+        return None
+    if kind == 'link':
+        link = bold_link(seguinte)
+        return node_text(link) or None if link is not None else None
+    links = inline_links(seguinte)
+    if not links and seguinte.tag not in ('a', 'strong', 'b'):
+        # Grupo num bloco próprio logo abaixo do rótulo
+        links = inline_links(seguinte[0]) if len(seguinte) else []
+    textos = [node_text(link) for link in links]
+    return ','.join(texto for texto in textos if texto) or None
+
+
+def section_name(node):
+    if node.tag == 'h3':
+        nome = node_text(node)
+        if nome in SECTION_HEADINGS:
+            return nome
+    return None
+
+
+def is_section_end(node, terminators):
+    return any(section_name(h) in terminators for h in node.iter('h3'))
+
+
+def is_acao_end(node):
+    # Equivalente ao fim da seção no Markdown: outro título, "Avaliações"
+    # ou um bloco que começa com um link
+    if next(node.iter(*BLOCK_HEADINGS), None) is not None:
+        return True
+    if node_text(node).startswith('Avaliações'):
+        return True
+    return node.tag == 'a' or (
+        len(node) > 0 and node[0].tag == 'a' and not (node.text or '').strip()
+    )
+
+
+def section_text_dom(heading, terminators=(), acao=False, base_url=''):
+    """
+    Texto dos elementos que seguem o título até um dos `terminators` (ou,
+    na seção Ação / Resultado, até o fim equivalente ao do Markdown),
+    subindo pelos ancestrais quando o título é o último irmão.
+    """
+    partes = []
+    node = heading
+    while node is not None:
+        for irmao in node.itersiblings(etree.Element):
+            if is_section_end(irmao, terminators) or (
+                acao and is_acao_end(irmao)
+            ):
+                return ' '.join(partes)
+            partes.append(markdown_text(irmao, base_url))
+        node = node.getparent()
+    return ' '.join(partes)
+
+
+def extract_data_from_html(page_html: str, base_url: str = '') -> List[Dict]:
+    """
+    Extrai os dados do HTML renderizado para o model ProductDetails, no mesmo
+    formato de `extract_data_from_markdown`, lendo cada campo pela posição
+    no DOM em vez de regex sobre o Markdown. `base_url` resolve os links
+    relativos das seções, como o Crawl4AI faz no Markdown.
+    """
+    if not page_html:
         return []
+    doc = etree.fromstring(page_html.encode('utf-8'), HTML_PARSER)
+    if doc is None:
+        return []
+    etree.strip_elements(doc, 'script', 'style', with_tail=False)
+
+    # Uma única passada localiza o SKU, os rótulos e os títulos de seção
+    sku = None
+    labels = {}
+    headings = {}
+    for node in doc.iter(etree.Element):
+        texto = node.text
+        if not texto or len(texto) > 40:
+            continue
+        texto = texto.strip()
+        if texto in DOM_FIELDS:
+            labels.setdefault(texto, []).append(node)
+        elif texto in SECTION_HEADINGS and node.tag == 'h3':
+            headings.setdefault(texto, node)
+        elif sku is None and texto == 'Cod:' and node.tag in ('strong', 'b'):
+            sku_match = DOM_SKU_RE.match(node.tail or '')
+            sku = sku_match.group(1) if sku_match else None
+    if not sku:
+        logging.warning('SKU não encontrado no HTML')
+        return []
+    product = default_product(sku)
 
+    # Vale a primeira ocorrência de cada rótulo seguida de um valor
+    for label, nodes in labels.items():
+        campo, kind = DOM_FIELDS[label]
+        for node in nodes:
+            valor = label_value(node, kind)
+            if valor is not None:
+                product[campo] = valor
+                break
+    for label in ('Tipos de Cabelo', 'Condição dos Fios', 'Marca'):
+        if label not in labels:
+            logging.warning(f'{label} não encontrado no HTML')
 
-async def send_to_api(data):
+    if 'Detalhes' in headings:
+        product['detalhes'] = section_text_dom(
+            headings['Detalhes'],
+            ('Como Usar', 'Ação / Resultado'),
+            base_url=base_url,
+        )
+    if 'Como Usar' in headings:
+        product['como_usar'] = section_text_dom(
+            headings['Como Usar'], ('Ação / Resultado',), base_url=base_url
+        )
+    if 'Ação / Resultado' in headings:
+        product['acao_resultado'] = section_text_dom(
+            headings['Ação / Resultado'], acao=True, base_url=base_url
+        )
+    else:
+        logging.warning('Ação / Resultado não encontrado no HTML')
+
+    logging.info('Extraído 1 item do HTML')
+    return [product]
+
+
+async def crawl_url(
+    crawler,
+    url,
+    scheduler=None,
+    fingerprints=None,
+    tab_pool=None,
+    retry_policy=None,
+    archive=None,
+    extraction_pool=None,
+    backend=BACKEND_MARKDOWN,
+):
     """
-    Envia os dados para a API hospedada.
+    Extrai dados de uma URL e retorna uma lista de ProductDetails.
+    Se `scheduler` for informado, respeita o ritmo de requisições do host.
+    Com `fingerprints`, retorna UNCHANGED se o conteúdo não mudou desde a
+    última execução bem-sucedida. Com `tab_pool`, reaproveita uma aba aberta.
+    Falhas são classificadas e retentadas conforme `retry_policy`. Com
+    `archive` (PageArchive), cada página nova é gravada para replay. Com
+    `extraction_pool` (ExtractionPool), a extração roda fora do event loop.
+    Com `backend` BACKEND_DOM, o Crawl4AI só renderiza a página, os campos
+    são lidos do HTML e o Markdown só é gerado se o HTML não tiver o SKU ou
+    não puder ser lido.
     """
-    api_url = 'https://streamlit-apirest.onrender.com/api/productsdetails'
-    async with aiohttp.ClientSession() as session:
+    extraction_pool = extraction_pool or ExtractionPool(0)
+    if retry_policy is None:
+        retry_policy = RetryPolicy()
+    attempt = 0
+    while True:
+        attempt += 1
+        logging.info(f'Extraindo dados da URL: {url} (Tentativa {attempt})')
         try:
-            # Envia a lista diretamente
-            json_data = json.dumps(data, ensure_ascii=False)
-            logging.info(f'Enviando dados para {api_url}: {json_data}')
-            async with session.post(
-                api_url,
-                data=json_data,
-                headers={'Content-Type': 'application/json'},
-            ) as response:
-                response_text = await response.text()
-                logging.info(
-                    f'Status da resposta (POST): {response.status}, Resposta: {response_text}'
+            if scheduler:
+                await scheduler.acquire(url)
+            async with (
+                tab_pool.borrow(url) if tab_pool else contextlib.nullcontext()
+            ) as session_id:
+                result = await crawler.arun(
+                    url, config=render_config(session_id, backend)
                 )
-                return response.status
-        except json.JSONDecodeError as e:
-            logging.error(f'Erro ao serializar JSON: {e}')
-            return None
+            markdown_content = result.markdown
+            page_html = getattr(result, 'html', None)
+            status = getattr(result, 'status_code', None)
+            dom = backend == BACKEND_DOM and bool(page_html)
+            bloqueada = (
+                is_block_html(page_html)
+                if dom
+                else is_block_page(markdown_content)
+            )
+            if scheduler:
+                scheduler.report(url, status=status, blocked=bloqueada)
+            classe = classify_response(
+                status,
+                bloqueada,
+                getattr(result, 'success', True),
+                getattr(result, 'error_message', None),
+            )
+            if classe is None:
+                if fingerprints and (
+                    # Sem o Markdown, o fingerprint usa o texto visível do HTML
+                    fingerprints.check(url, visible_text(page_html), BACKEND_DOM)
+                    if dom
+                    else fingerprints.check(url, markdown_content)
+                ):
+                    logging.info(
+                        f'Conteúdo inalterado para {url}, extração dispensada'
+                    )
+                    return UNCHANGED
+                if archive is not None:
+                    archive.append(
+                        url,
+                        markdown_content,
+                        html=page_html,
+                        status=status,
+                    )
+                products = []
+                if dom:
+                    try:
+                        products = await extraction_pool.run(
+                            extract_data_from_html,
+                            page_html,
+                            url,
+                            size=len(page_html),
+                        )
+                    except Exception as e:
+                        logging.warning(
+                            f'Backend DOM falhou em {url} ({e}), usando o Markdown'
+                        )
+                if not products and not markdown_content and page_html:
+                    # O arun do backend DOM não gera o Markdown da página
+                    markdown_content = await extraction_pool.run(
+                        markdown_from_html,
+                        page_html,
+                        url,
+                        size=len(page_html),
+                    )
+                if not products:
+                    products = await extraction_pool.run(
+                        extract_data_from_markdown,
+                        str(markdown_content or ''),
+                        size=len(markdown_content or ''),
+                    )
+                logging.info(f'Extraídos {len(products)} itens da URL {url}')
+                if products:
+                    return products
+                logging.warning(f'Sem dados ou SKU não encontrado para {url}')
+                classe = FAIL_PARSE
         except Exception as e:
-            logging.error(f'Erro ao enviar dados para a API (POST): {e}')
-            return None
+            logging.error(f'Erro ao crawlear a URL {url}: {e}')
+            classe = classify_exception(e)
+        if not await retry_policy.next_attempt(url, classe, attempt):
+            return []
+
+
+async def send_to_api(data, client=None):
+    """
+    Envia os dados para a API hospedada.
+    Usa o ApiClient compartilhado da execução quando informado.
+    """
+    api_url = 'https://streamlit-apirest.onrender.com/api/productsdetails'
+    if client is None:
+        async with ApiClient() as client:
+            return await send_to_api(data, client)
+    try:
+        # Envia a lista diretamente
+        json_data = json.dumps(data, ensure_ascii=False)
+        logging.info(f'Enviando dados para {api_url}: {json_data}')
+        status, response_text = await client.post(
+            api_url, data=json_data.encode('utf-8')
+        )
+        logging.info(
+            f'Status da resposta (POST): {status}, Resposta: {response_text}'
+        )
+        return status
+    except json.JSONDecodeError as e:
+        logging.error(f'Erro ao serializar JSON: {e}')
+        return None
+    except Exception as e:
+        logging.error(f'Erro ao enviar dados para a API (POST): {e}')
+        return None
 
 
-async def update_to_api(data):
+async def update_to_api(data, client=None):
     """
     Implementação futura para PUT, se necessário.
     """
     pass
 
 
-async def process_urls(urls):
+async def process_urls(
+    urls,
+    shard_index=0,
+    shard_count=1,
+    arquivo_paginas=ARQUIVO_PAGINAS,
+    replay=REPLAY,
+    enviar_replay=ENVIAR_REPLAY,
+    processos_extracao=PROCESSOS_EXTRACAO,
+    backend_extracao=BACKEND_EXTRACAO,
+):
     """
-    Processa URLs sequencialmente, coleta URLs com erro e as move para o início da lista.
+    Processa URLs pela fila de trabalho persistente (WorkQueue): um worker na
+    raia normal e outro na raia de retry, onde as URLs com erro aguardam o
+    backoff. Cada URL volta à fila após um intervalo que cresce enquanto
+    seu conteúdo não muda (VolatilityTracker). Com `shard_count` > 1,
+    processa só as URLs do shard `shard_index`, com arquivos de estado
+    próprios do shard.
+
+    Com `arquivo_paginas`, as páginas renderizadas são gravadas num
+    PageArchive; com `replay`, as URLs com captura no arquivo são extraídas
+    de novo, em sequência, sem navegador nem fila, e só são enviadas para a
+    API com `enviar_replay`. A extração das
+    páginas grandes roda em `processos_extracao` processos (ExtractionPool),
+    com o backend `backend_extracao` (Markdown ou DOM).
     """
-    total_urls = len(urls)
-    logging.info(f'Total de URLs a processar: {total_urls}')
+    failed_urls_path = shard_path(FAILED_URLS_FILE, shard_index, shard_count)
+    queue_path = shard_path(WORK_QUEUE_FILE, shard_index, shard_count)
+    archive_path = shard_path(
+        arquivo_paginas or (PAGE_ARCHIVE_FILE if replay else ''),
+        shard_index,
+        shard_count,
+    )
+    archive = PageArchive(archive_path) if archive_path else None
+    extraction_pool = ExtractionPool(processos_extracao)
+    urls = filter_shard(urls, shard_index, shard_count)
 
-    # Carrega URLs com erro de execuções anteriores
-    failed_urls = load_failed_urls()
-    logging.info(f'URLs com erro carregadas: {failed_urls}')
+    if replay:
+        arquivadas = set(archive.urls())
+        urls = [url for url in urls if url in arquivadas]
+        total_urls = len(urls)
+        logging.info(f'Replay de {total_urls} URLs a partir de {archive_path}')
+        queue = None
+        scheduler = None
+        # No replay a página é sempre a mesma: não há o que retentar
+        retry_policy = RetryPolicy(max_attempts=1)
+        volatility = None
+        fingerprints = None
+    else:
+        queue = WorkQueue(queue_path, permanent_errors=PERMANENT_FAILURES)
+        queue.sync_catalog(urls)
 
-    # Adiciona URLs com erro no início da lista, evitando duplicatas
-    urls = failed_urls + [url for url in urls if url not in failed_urls]
-    logging.info(f'Lista de URLs atualizada com {len(urls)} itens')
+        # Migra as URLs com erro do arquivo JSON antigo para a raia de retry
+        if queue.created:
+            failed_urls = filter_shard(
+                load_failed_urls(failed_urls_path), shard_index, shard_count
+            )
+            logging.info(f'URLs com erro migradas para a fila: {failed_urls}')
+            queue.import_failed(failed_urls)
 
-    # Lista para armazenar URLs que falharam na execução atual
-    current_failed_urls = []
+        contagem = queue.counts()
+        total_urls = sum(contagem.values())
+        logging.info(
+            f'Total de URLs na fila: {total_urls} ({contagem.get(LANE_RETRY, 0)} na raia de retry, {contagem.get(LANE_PARKED, 0)} estacionadas, shard {shard_index + 1}/{shard_count})'
+        )
+        scheduler = PolitenessScheduler()
+        retry_policy = RetryPolicy()
+        volatility = VolatilityTracker(queue_path)
+        fingerprints = FingerprintCache(
+            shard_path(FINGERPRINTS_FILE, shard_index, shard_count)
+        )
 
-    async with AsyncWebCrawler(verbose=True) as crawler:
+    async with (
+        (
+            ReplayCrawler(archive)
+            if replay
+            else BrowserWatchdog(lambda: AsyncWebCrawler(verbose=True))
+        ) as crawler,
+        ApiClient() as client,
+    ):
+        blocker = None
+        tab_pool = None
+        if not replay:
+            blocker = ResourceBlocker()
+            crawler.on_start(blocker.install)
+            tab_pool = TabPool(crawler, default_tabs=1)
         processed_count = 0
         api_url = 'http://127.0.0.1:8000/api/productsdetails'
-        for url in urls:
+
+        async def processar(url):
+            nonlocal processed_count
             processed_count += 1
             logging.info(
                 f'Processando {processed_count}/{total_urls} URLs: {url}'
             )
             try:
-                result = await crawl_url(crawler, url)
+                result = await crawl_url(
+                    crawler,
+                    url,
+                    scheduler,
+                    fingerprints,
+                    tab_pool,
+                    retry_policy,
+                    archive if not replay else None,
+                    extraction_pool,
+                    backend_extracao,
+                )
+                if result is UNCHANGED:
+                    volatility.observe(url, changed=False)
+                    return True, None
                 logger.info(
                     f'Resultado para {url}:\n{json.dumps(result, ensure_ascii=False, indent=2)}'
                 )
 
-                if result:
-                    post_status = await send_to_api(result)
-                    if post_status in (200, 201):
-                        logging.info(
-                            f'Dados enviados com sucesso para {url}, POST concluído.'
-                        )
-                    elif post_status == 400:
-                        put_status = await update_to_api(result)
-                        if put_status != 202:
-                            logging.warning(
-                                f'Falha ao atualizar dados para {api_url} (Status: {put_status})'
-                            )
-                            current_failed_urls.append(url)
-                    else:
-                        logging.warning(
-                            f'Falha ao enviar dados para {api_url} (Status: {post_status})'
-                        )
-                        current_failed_urls.append(url)
-                else:
+                if not result:
                     logging.warning(
-                        f'Falha ou sem dados para {url}, marcando para reprocessamento'
+                        f'Falha ou sem dados para {url}, reagendando na fila de retry'
+                    )
+                    return False, retry_policy.last_failure.pop(url, FAIL_PARSE)
+                if replay and not enviar_replay:
+                    logging.info(f'Simulação: dados de {url} não enviados')
+                    return True, None
+                post_status = await send_to_api(result, client)
+                if post_status in (200, 201):
+                    logging.info(
+                        f'Dados enviados com sucesso para {url}, POST concluído.'
                     )
-                    current_failed_urls.append(url)
+                    if fingerprints is not None:
+                        fingerprints.commit(url)
+                    if volatility is not None:
+                        volatility.observe(url, changed=True)
+                    return True, None
+                if post_status == 400:
+                    put_status = await update_to_api(result, client)
+                    if put_status != 202:
+                        logging.warning(
+                            f'Falha ao atualizar dados para {api_url} (Status: {put_status})'
+                        )
+                        return False, 'api'
+                    if fingerprints is not None:
+                        fingerprints.commit(url)
+                    if volatility is not None:
+                        volatility.observe(url, changed=True)
+                    return True, None
+                logging.warning(
+                    f'Falha ao enviar dados para {api_url} (Status: {post_status})'
+                )
+                return False, 'api'
             except Exception as e:
                 logging.error(f'Erro geral ao processar {url}: {e}')
-                current_failed_urls.append(url)
+                return False, type(e).__name__
+
+        try:
+            if replay:
+                falhas = []
+                for url in urls:
+                    sucesso, _ = await processar(url)
+                    if not sucesso:
+                        falhas.append(url)
+            else:
+                _, falhas, _ = await run_workers(
+                    queue,
+                    processar,
+                    owner=f'{socket.gethostname()}-{os.getpid()}',
+                    interval_for=volatility.interval,
+                )
+        finally:
+            if queue is not None:
+                queue.close()
+            # O estado da execução é salvo mesmo se ela for interrompida
+            if fingerprints is not None:
+                fingerprints.save()
+            if volatility is not None:
+                logging.info(f'Recrawl adaptativo: {volatility.summary()}')
+                volatility.close()
+            if archive is not None:
+                logging.info(f'Arquivo de páginas: {archive.summary()}')
+                archive.close()
+            if tab_pool is not None:
+                await tab_pool.close()
+            extraction_pool.close()
+            logging.info(f'Pool de extração: {extraction_pool.summary()}')
 
         logging.info(
             f'Processamento concluído: {processed_count}/{total_urls} URLs processadas'
         )
-        logging.info(f'URLs com erro nesta execução: {current_failed_urls}')
-
-        # Salva URLs com erro para a próxima execução
-        save_failed_urls(current_failed_urls)
+        logging.info(f'URLs com erro nesta execução: {falhas}')
+        logging.info(f'Falhas por classe: {retry_policy.summary()}')
+        if not replay:
+            logging.info(
+                f'Conteúdo inalterado: {fingerprints.skipped} URLs puladas sem extração'
+            )
+            logging.info(f'Recursos bloqueados: {blocker.summary()}')
+            logging.info(f'Pool de abas: {tab_pool.summary()}')
+        logging.info(f'Navegador: {crawler.summary()}')
 
 
 if __name__ == '__main__':
@@ -721,8 +1282,11 @@ if __name__ == '__main__':
         'https://www.belezanaweb.com.br/widi-care-super-poderosas-shampoo-300ml/',
         'https://www.belezanaweb.com.br/brae-gorgeous-volume-condicionador-250ml/',
     ]
+    shard_index, shard_count = parse_shard_args()
     try:
-        asyncio.run(process_urls(beleza_na_web_urls))
+        asyncio.run(
+            process_urls(beleza_na_web_urls, shard_index, shard_count)
+        )
     except Exception as e:
         logging.error(f'Erro ao executar o crawler: {e}')
         raise
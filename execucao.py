@@ -3,9 +3,10 @@ import asyncio
 import requests
 from datetime import datetime
 from scrape_combined_crawl4ai import process_urls
+from sharding import parse_shard_args
 
 
-async def run_combined_crawler():
+async def run_combined_crawler(shard_index=0, shard_count=1):
 
     print(f'Executando scrape_combined_crawl4ai.py às {datetime.now()}')
     try:
@@ -58,9 +59,12 @@ async def run_combined_crawler():
             'https://www.belezanaweb.com.br/cadiveu-professional-acai-oil-oleo-de-tratamento-60ml/ofertas-marketplace',
             'https://www.belezanaweb.com.br/cadiveu-professional-acai-oil-oleo-de-acai-110ml/ofertas-marketplace',
         ]
-        await process_urls(combined_urls)
+        await process_urls(
+            combined_urls, shard_index=shard_index, shard_count=shard_count
+        )
     except Exception as e:
         print(f'Erro ao executar scrape_combined_crawl4ai.py: {e}')
 
 if __name__ == '__main__':
-    asyncio.run(run_combined_crawler())
+    shard_index, shard_count = parse_shard_args()
+    asyncio.run(run_combined_crawler(shard_index, shard_count))
@@ -0,0 +1,82 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Processos do pool de extração; um por núcleo, até o teto (0 extrai no
+# próprio event loop)
+MAX_EXTRACTION_WORKERS = 4
+DEFAULT_EXTRACTION_WORKERS = min(MAX_EXTRACTION_WORKERS, os.cpu_count() or 1)
+# Páginas menores que isso são extraídas no event loop: o custo de enviar o
+# texto ao processo seria maior que o da própria extração
+MIN_OFFLOAD_BYTES = 32 * 1024
+
+
+class ExtractionPool:
+    """
+    Executa os extratores (regex sobre o Markdown) num ProcessPoolExecutor,
+    para que o parsing de uma página grande não trave o event loop e, com
+    ele, todas as renderizações e requisições em andamento.
+
+    `run(func, *args, size=...)` roda `func` num processo do pool e aguarda
+    o resultado sem bloquear o loop; `func` precisa ser uma função de
+    módulo (importável pelo processo filho) e os argumentos, só texto e
+    valores simples, que vão serializados para o filho. Com `workers=0` ou
+    `size` abaixo de `min_offload_bytes`, `func` roda direto no loop.
+
+    Os processos são criados com 'spawn' e sob demanda: não herdam o
+    navegador nem as conexões abertas do processo principal.
+    """
+
+    def __init__(
+        self,
+        workers=DEFAULT_EXTRACTION_WORKERS,
+        min_offload_bytes=MIN_OFFLOAD_BYTES,
+    ):
+        self.workers = max(0, workers)
+        self.min_offload_bytes = min_offload_bytes
+        self.executor = None
+        if self.workers:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        self.offloaded = 0
+        self.inline = 0
+        self.offloaded_seconds = 0.0
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    async def run(self, func, *args, size=None):
+        if self.executor is None or (
+            size is not None and size < self.min_offload_bytes
+        ):
+            self.inline += 1
+            return func(*args)
+        inicio = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, func, *args
+            )
+        finally:
+            self.offloaded += 1
+            self.offloaded_seconds += time.perf_counter() - inicio
+
+    def summary(self):
+        if not self.workers:
+            return 'desativado (extração no event loop)'
+        medio = self.offloaded_seconds / self.offloaded if self.offloaded else 0
+        return (
+            f'{self.workers} processos, {self.offloaded} páginas extraídas no '
+            f'pool ({medio * 1000:.0f} ms em média), {self.inline} no event loop'
+        )
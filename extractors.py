@@ -0,0 +1,699 @@
+import html as html_lib
+import json
+import re
+from datetime import datetime
+
+from politeness import host_from_url
+
+DATA_HORA_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def parse_preco_brl(valor):
+    """Converte um preço no formato brasileiro ('1.234,56') para float."""
+    return float(valor.replace('.', '').replace(',', '.'))
+
+
+JSON_LD_RE = re.compile(
+    r'<script[^>]*application/ld\+json[^>]*>(.*?)</script>',
+    re.DOTALL | re.IGNORECASE,
+)
+META_RE = re.compile(r'<meta\s[^>]*>', re.IGNORECASE)
+ATTR_RE = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+
+def json_ld_products(html):
+    """Objetos schema.org Product dos blocos JSON-LD do HTML, na ordem da página."""
+    pendentes = []
+    for bloco in JSON_LD_RE.findall(html):
+        try:
+            pendentes.append(json.loads(bloco))
+        except json.JSONDecodeError:
+            continue
+    while pendentes:
+        dado = pendentes.pop(0)
+        if isinstance(dado, list):
+            pendentes[:0] = dado
+        elif isinstance(dado, dict):
+            tipo = dado.get('@type')
+            tipos = tipo if isinstance(tipo, list) else [tipo]
+            if 'Product' in tipos:
+                yield dado
+            if isinstance(dado.get('@graph'), list):
+                pendentes[:0] = dado['@graph']
+
+
+def json_ld_offers(produto):
+    """Ofertas de um Product (Offer, lista de Offer ou AggregateOffer)."""
+    ofertas = produto.get('offers') or []
+    if isinstance(ofertas, dict):
+        ofertas = ofertas.get('offers') or [ofertas]
+    return [oferta for oferta in ofertas if isinstance(oferta, dict)]
+
+
+def json_ld_image(produto):
+    imagem = produto.get('image')
+    if isinstance(imagem, list):
+        imagem = imagem[0] if imagem else None
+    if isinstance(imagem, dict):
+        imagem = imagem.get('url')
+    return imagem
+
+
+def json_ld_rating(produto):
+    nota = (produto.get('aggregateRating') or {}).get('ratingValue')
+    try:
+        return float(str(nota).replace(',', '.')) if nota is not None else None
+    except ValueError:
+        return None
+
+
+def meta_tags(html):
+    """Conteúdo das meta tags do HTML indexado por `property` ou `name` (og:title...)."""
+    tags = {}
+    for tag in META_RE.findall(html):
+        attrs = {
+            nome.lower(): html_lib.unescape(duplas or simples)
+            for nome, duplas, simples in ATTR_RE.findall(tag)
+        }
+        chave = attrs.get('property') or attrs.get('name')
+        if chave and 'content' in attrs:
+            tags.setdefault(chave, attrs['content'])
+    return tags
+
+
+class MarketplaceExtractor:
+    """
+    Extrator de dados de um marketplace a partir do Markdown da página.
+
+    Subclasses definem `marketplace`, `hosts` e
+    `extract(markdown, data_hora, url)`, usando padrões compilados uma única
+    vez como atributos de classe. As que sabem ler os dados estruturados da
+    página (JSON-LD, estado embutido) também implementam
+    `extract_structured(html, url, data_hora)`; as duas leituras devem dar
+    as mesmas chaves (key_loja, key_sku) para a mesma página, exceto o
+    key_sku do Mercado Livre, que é o item_id do melidata quando a página o
+    traz e o SKU do catálogo quando não.
+    """
+
+    marketplace = None
+    hosts = ()
+
+    @staticmethod
+    def timestamp():
+        return datetime.now().strftime(DATA_HORA_FORMAT)
+
+    @staticmethod
+    def key_loja(nome_loja):
+        return nome_loja.lower().replace(' ', '_').replace('.', '')
+
+    def extract(self, markdown, data_hora=None, url=None):
+        """
+        Extrai as lojas do Markdown da página. Com `url`, o SKU da URL tem
+        precedência sobre o encontrado nos links do Markdown.
+        """
+        raise NotImplementedError
+
+    def extract_structured(self, html, url, data_hora=None):
+        """
+        Extrai as lojas direto do HTML bruto, sem gerar o Markdown. Retorna
+        None quando a página não tem os dados estruturados necessários; nesse
+        caso vale o `extract` sobre o Markdown.
+        """
+        return None
+
+    @classmethod
+    def has_structured(cls):
+        """Indica se o extrator implementa `extract_structured`."""
+        return cls.extract_structured is not MarketplaceExtractor.extract_structured
+
+    def extract_many(self, markdowns):
+        """Extrai uma lista de páginas; todas compartilham o mesmo data_hora."""
+        data_hora = self.timestamp()
+        return [self.extract(markdown, data_hora) for markdown in markdowns]
+
+    def loja(
+        self,
+        sku,
+        nome_loja,
+        preco_final,
+        data_hora,
+        key_loja,
+        key_sku,
+        descricao,
+        review,
+        imagem,
+    ):
+        return {
+            'sku': sku,
+            'loja': nome_loja,
+            'preco_final': preco_final,
+            'data_hora': data_hora,
+            'marketplace': self.marketplace,
+            'change_price': 0,
+            'key_loja': key_loja,
+            'key_sku': key_sku,
+            'descricao': descricao,
+            'review': review,
+            'imagem': imagem,
+            'status': 'ativo',
+        }
+
+
+class AmazonExtractor(MarketplaceExtractor):
+    """Extrai SKU, descrição, loja, preço, review, imagem e outros dados do Markdown (Amazon)."""
+
+    marketplace = 'Amazon'
+    hosts = ('amazon.com.br',)
+
+    sku_re = re.compile(r'https://www\.amazon\.com\.br/.*/dp/([A-Z0-9]{10})')
+    desc_re = re.compile(r'Este item:?\s*([^\n]+?)\s*(?=R\$|\n)', re.MULTILINE)
+    img_desc_re = re.compile(
+        r'!\[([^\]]+?)\]\(https://images-na\.ssl-images-amazon\.com'
+    )
+    # O vendedor de terceiros vem como link para o perfil dele na Amazon
+    loja_re = re.compile(
+        r'Enviado de e vendido por\s*(?:\[([^\]]+)\]\([^\)]*\)'
+        r'|(Amazon\.com\.br|[^\n.]+?)(?:\.|\n|$))'
+    )
+    json_preco_re = re.compile(r'"priceAmount":([\d.]+)')
+    preco_re = re.compile(
+        r'R\$([\d,.]+?)(?=\s*\(R\$\s*[\d,.]+/Mililitros\)|$)'
+    )
+    review_re = re.compile(
+        r'(\d+\.\d+)\s*(?:de\s*5\s*estrelas|out\s*of\s*5\s*stars)'
+    )
+    img_re = re.compile(
+        r'!\[.*?\]\((https://images-na\.ssl-images-amazon\.com/images/I/.*?\.jpg)\)'
+    )
+    sku_url_re = re.compile(r'/dp/([A-Z0-9]{10})')
+    html_titulo_re = re.compile(r'id="productTitle"[^>]*>\s*([^<]+?)\s*<')
+    html_loja_re = re.compile(
+        r'id="sellerProfileTriggerId"[^>]*>\s*([^<]+?)\s*<'
+    )
+    html_img_re = re.compile(r'"hiRes":"(https://[^"]+?\.jpg)"')
+    # Preço do buy box: estado do checkout expresso e preço principal; o
+    # priceAmount de outros blocos (carrosséis, variações) não é do ASIN
+    html_checkout_re = re.compile(
+        r'turbo-checkout-page-state[^>]*>(.*?)</script>', re.DOTALL
+    )
+    html_core_preco_re = re.compile(
+        r'id="corePrice_feature_div"(?:(?!</div>).)*?'
+        r'class="a-offscreen">\s*R\$\s*([\d.,]+)',
+        re.DOTALL,
+    )
+
+    @staticmethod
+    def do_asin(dado, sku):
+        # Sem sku/url, o dado não aponta para outro produto
+        referencias = [str(dado.get(campo) or '') for campo in ('sku', 'url')]
+        return not any(referencias) or any(sku in ref for ref in referencias)
+
+    def oferta_principal(self, html, sku):
+        """Produto e oferta JSON-LD do ASIN; a oferta é {} se houver mais de um preço."""
+        produtos = list(json_ld_products(html))
+        produto = next(
+            (
+                produto
+                for produto in produtos
+                if sku in str(produto.get('sku') or produto.get('url') or '')
+            ),
+            produtos[0] if len(produtos) == 1 else {},
+        )
+        ofertas = [
+            oferta
+            for oferta in json_ld_offers(produto)
+            if oferta.get('price') is not None and self.do_asin(oferta, sku)
+        ]
+        if len({str(oferta['price']) for oferta in ofertas}) != 1:
+            return produto, {}
+        return produto, ofertas[0]
+
+    def preco_buy_box(self, html):
+        """Preço do buy box, ou 0.0 se ausente ou se as fontes divergirem."""
+        precos = {
+            float(valor)
+            for estado in self.html_checkout_re.findall(html)
+            for valor in self.json_preco_re.findall(estado)
+        }
+        core_match = self.html_core_preco_re.search(html)
+        if core_match:
+            precos.add(parse_preco_brl(core_match.group(1)))
+        return precos.pop() if len(precos) == 1 else 0.0
+
+    def extract_structured(self, html, url, data_hora=None):
+        # SKU (ASIN) da URL; preço e vendedor da oferta JSON-LD do ASIN ou,
+        # sem ela, do buy box. Preço ambíguo retorna None (usa o Markdown)
+        sku_match = self.sku_url_re.search(url)
+        if not sku_match:
+            return None
+        sku = sku_match.group(1)
+        metas = meta_tags(html)
+
+        try:
+            produto, oferta = self.oferta_principal(html, sku)
+            if oferta:
+                preco_final = float(oferta['price'])
+            else:
+                preco_final = self.preco_buy_box(html)
+        except ValueError:
+            return None
+
+        titulo_match = self.html_titulo_re.search(html)
+        descricao = produto.get('name') or (
+            html_lib.unescape(titulo_match.group(1)) if titulo_match else None
+        )
+        if not preco_final or not descricao:
+            return None
+
+        loja_match = self.html_loja_re.search(html)
+        nome_loja = (oferta.get('seller') or {}).get('name')
+        if not nome_loja:
+            nome_loja = (
+                html_lib.unescape(loja_match.group(1))
+                if loja_match
+                else 'Amazon.com.br'
+            )
+        review = json_ld_rating(produto)
+        if review is None:
+            review_match = self.review_re.search(html)
+            review = float(review_match.group(1)) if review_match else 4.5
+        img_match = self.html_img_re.search(html)
+        imagem = (
+            json_ld_image(produto)
+            or (img_match.group(1) if img_match else None)
+            or metas.get('og:image')
+            or 'Imagem não encontrada'
+        )
+
+        key_loja = self.key_loja(nome_loja)
+        return [
+            self.loja(
+                sku,
+                nome_loja,
+                preco_final,
+                data_hora or self.timestamp(),
+                key_loja,
+                f'{key_loja}_{sku}',
+                descricao.strip(),
+                review,
+                imagem,
+            )
+        ]
+
+    def extract(self, markdown, data_hora=None, url=None):
+        # Extrai SKU (ASIN) da URL da página ou, sem ela, do primeiro link
+        # de produto no Markdown (que pode ser o de um produto relacionado)
+        sku_match = self.sku_url_re.search(url or '') or self.sku_re.search(
+            markdown
+        )
+        sku = sku_match.group(1) if sku_match else None
+        if not sku:
+            print('SKU não encontrado no Markdown (Amazon)')
+            return []
+
+        # Extrai descrição (nome do produto)
+        desc_match = self.desc_re.search(markdown)
+        descricao = desc_match.group(1).strip() if desc_match else None
+        # Fallback: usa o título da imagem
+        if not descricao or 'devolvido' in descricao.lower():
+            img_desc_match = self.img_desc_re.search(markdown)
+            descricao = (
+                img_desc_match.group(1).strip()
+                if img_desc_match
+                else 'Descrição não encontrada'
+            )
+        print(f'Descrição capturada (Amazon): {descricao!r}')
+
+        # Extrai loja (quem envia)
+        loja_match = self.loja_re.search(markdown)
+        nome_loja = (
+            (loja_match.group(1) or loja_match.group(2)).strip()
+            if loja_match
+            else 'Amazon.com.br'
+        )
+
+        # Extrai preço (prioriza priceAmount do JSON)
+        preco_final = 0.0
+        json_preco_match = self.json_preco_re.search(markdown)
+        if json_preco_match:
+            try:
+                preco_final = float(json_preco_match.group(1))
+            except ValueError:
+                print(
+                    f'Erro ao converter preço do JSON (Amazon): {json_preco_match.group(1)}'
+                )
+        else:
+            # Fallback: usa a regex original
+            preco_match = self.preco_re.search(markdown)
+            if preco_match:
+                try:
+                    preco_final = parse_preco_brl(preco_match.group(1))
+                except ValueError:
+                    print(
+                        f'Erro ao converter preço (Amazon): {preco_match.group(1)}'
+                    )
+
+        # Extrai review (fallback)
+        review_match = self.review_re.search(markdown)
+        review = float(review_match.group(1)) if review_match else 4.5
+
+        # Extrai imagem
+        img_match = self.img_re.search(markdown)
+        imagem = img_match.group(1) if img_match else 'Imagem não encontrada'
+
+        key_loja = self.key_loja(nome_loja)
+        return [
+            self.loja(
+                sku,
+                nome_loja,
+                preco_final,
+                data_hora or self.timestamp(),
+                key_loja,
+                f'{key_loja}_{sku}',
+                descricao,
+                review,
+                imagem,
+            )
+        ]
+
+
+class BelezaExtractor(MarketplaceExtractor):
+    """Extrai SKU, descrição, review, imagem e dados de lojas do Markdown (Beleza na Web)."""
+
+    marketplace = 'Beleza na Web'
+    hosts = ('belezanaweb.com.br',)
+
+    sku_re = re.compile(r'\*\*Cod:\*\* (MP\d+|\d+)')
+    desc_re = re.compile(
+        r'\[Voltar para a página do produto\]\(https://www\.belezanaweb\.com\.br/(.+?)\)'
+    )
+    review_re = re.compile(r'Review[:\s]*(\d+[\.,]\d+|\d+)')
+    img_re = re.compile(
+        r'!\[.*?\]\((https://res\.cloudinary\.com/beleza-na-web/image/upload/.*?/v1/imagens/product/.*?/.*?\.(?:png|jpg))\)'
+    )
+    img_empty_re = re.compile(r'!\[\]\((https?://[^\s)]+)\)')
+    loja_re = re.compile(r'Vendido por \*\*(.*?)\*\* Entregue por Beleza na Web')
+    preco_com_desconto_re = re.compile(r'-[\d]+%.*?\nR\$ ([\d,\.]+)')
+    preco_venda_re = re.compile(r'(?<!De )R\$ ([\d,\.]+)(?!\s*3x)')
+    bloco_re = re.compile(
+        r'(?=Vendido por \*\*.*?\*\* Entregue por Beleza na Web)'
+    )
+
+    def extract(self, markdown, data_hora=None, url=None):
+        # Extrai SKU
+        sku_match = self.sku_re.search(markdown)
+        sku = sku_match.group(1) if sku_match else None
+        if not sku:
+            print('SKU não encontrado no Markdown (Beleza na Web)')
+            return []
+
+        # Extrai descrição
+        desc_match = self.desc_re.search(markdown)
+        if desc_match:
+            url_text = desc_match.group(1)
+            descricao = ' '.join(
+                word.capitalize() for word in url_text.split('-')
+            )
+            descricao = descricao.replace('Condicionador ', 'Condicionador - ')
+        else:
+            descricao = 'Descrição não encontrada'
+        print(f'Descrição capturada (Beleza na Web): {descricao!r}')
+
+        # Extrai review
+        review_match = self.review_re.search(markdown)
+        review = (
+            float(review_match.group(1).replace(',', '.'))
+            if review_match
+            else 4.5
+        )
+
+        # Extrai imagem
+        img_match = self.img_re.search(markdown)
+        if img_match:
+            imagem = img_match.group(1)
+        else:
+            img_empty_match = self.img_empty_re.search(markdown)
+            imagem = (
+                img_empty_match.group(1)
+                if img_empty_match
+                else 'Imagem não encontrada'
+            )
+
+        # Extrai lojas e preços
+        data_hora = data_hora or self.timestamp()
+        lojas = []
+        for bloco in self.bloco_re.split(markdown):
+            if 'Vendido por' not in bloco:
+                continue
+            loja_match = self.loja_re.search(bloco)
+            nome_loja = loja_match.group(1) if loja_match else 'Beleza na Web'
+            preco_match = self.preco_com_desconto_re.search(
+                bloco
+            ) or self.preco_venda_re.search(bloco)
+            preco_final = (
+                parse_preco_brl(preco_match.group(1)) if preco_match else 0.0
+            )
+            key_loja = nome_loja.lower().replace(' ', '')
+            lojas.append(
+                self.loja(
+                    sku,
+                    nome_loja,
+                    preco_final,
+                    data_hora,
+                    key_loja,
+                    f'{key_loja}_{sku}',
+                    descricao,
+                    review,
+                    imagem,
+                )
+            )
+        return lojas
+
+
+class MeliExtractor(MarketplaceExtractor):
+    """Extrai SKU, descrição, loja, preço, review, imagem e outros dados do Markdown (Mercado Livre)."""
+
+    marketplace = 'Mercado Livre'
+    hosts = ('mercadolivre.com.br',)
+
+    sku_re = re.compile(r'/p/([A-Z0-9]+)')
+    desc_re = re.compile(
+        r'# \[([^\]]+?)\]\(https://www\.mercadolivre\.com\.br/.*?\)'
+    )
+    img_desc_re = re.compile(r'!\[([^\]]+?)\]\(https://http2\.mlstatic\.com')
+    review_re = re.compile(r'(\d+\.\d+)\s*(?:de\s*5\s*estrelas|out\s*of\s*5)')
+    img_re = re.compile(
+        r'!\[.*?\]\((https://http2\.mlstatic\.com/D_NQ_NP_.*?\.jpg)\)'
+    )
+    melidata_re = re.compile(
+        r'melidata\("add",\s*"event_data",\s*(\{.*?\})\);', re.DOTALL
+    )
+    loja_re = re.compile(r'Vendido por\s*\*\*([^\*]+)\*\*')
+    preco_re = re.compile(r'R\$ ([\d,.]+)')
+    bloco_re = re.compile(r'(?=Vendido por\s*\*\*.*?\*\*)')
+
+    def lojas_melidata(
+        self,
+        melidata_data,
+        sku,
+        descricao,
+        review,
+        imagem,
+        data_hora,
+    ):
+        lojas = []
+        for item in melidata_data.get('items', []):
+            nome_loja = item.get('seller_name', 'Mercado Livre')
+            # Usa item_id como SKU específico do vendedor
+            item_id = item.get('item_id', sku)
+            key_loja = self.key_loja(nome_loja)
+            lojas.append(
+                self.loja(
+                    sku,
+                    nome_loja,
+                    float(item.get('price', 0.0)),
+                    data_hora,
+                    key_loja,
+                    f'{key_loja}_{item_id}',
+                    descricao,
+                    review,
+                    imagem,
+                )
+            )
+        return lojas
+
+    def extract_structured(self, html, url, data_hora=None):
+        # SKU da URL, vendedores e preços do melidata embutido no HTML e
+        # nome, imagem e nota do JSON-LD (ou das meta tags og:)
+        sku_match = self.sku_re.search(url)
+        melidata_match = self.melidata_re.search(html)
+        if not sku_match or not melidata_match:
+            return None
+        try:
+            melidata_data = json.loads(melidata_match.group(1))
+        except json.JSONDecodeError:
+            return None
+        produto = next(json_ld_products(html), {})
+        metas = meta_tags(html)
+        descricao = produto.get('name') or metas.get('og:title')
+        if not descricao:
+            return None
+        review = json_ld_rating(produto)
+        if review is None:
+            review_match = self.review_re.search(html)
+            review = float(review_match.group(1)) if review_match else 4.5
+        imagem = (
+            json_ld_image(produto)
+            or metas.get('og:image')
+            or 'Imagem não encontrada'
+        )
+        # key_sku usa o item_id de cada oferta, como o `extract` quando o
+        # Markdown traz o melidata
+        lojas = self.lojas_melidata(
+            melidata_data,
+            sku_match.group(1),
+            descricao.strip(),
+            review,
+            imagem,
+            data_hora or self.timestamp(),
+        )
+        return lojas or None
+
+    def extract(self, markdown, data_hora=None, url=None):
+        # Extrai SKU (catalog_product_id) da URL ou Melidata
+        sku_match = self.sku_re.search(url or '') or self.sku_re.search(
+            markdown
+        )
+        sku = sku_match.group(1) if sku_match else None
+        if not sku:
+            print('SKU não encontrado no Markdown (Mercado Livre)')
+            return []
+
+        # Extrai descrição (nome do produto)
+        desc_match = self.desc_re.search(markdown)
+        descricao = desc_match.group(1).strip() if desc_match else None
+        if not descricao:
+            # Fallback: usa o título da imagem ou texto visível
+            img_desc_match = self.img_desc_re.search(markdown)
+            descricao = (
+                img_desc_match.group(1).strip()
+                if img_desc_match
+                else 'Descrição não encontrada'
+            )
+        print(f'Descrição capturada (Mercado Livre): {descricao!r}')
+
+        # Extrai review (avaliações)
+        review_match = self.review_re.search(markdown)
+        review = float(review_match.group(1)) if review_match else 4.5
+
+        # Extrai imagem
+        img_match = self.img_re.search(markdown)
+        imagem = img_match.group(1) if img_match else 'Imagem não encontrada'
+
+        data_hora = data_hora or self.timestamp()
+        lojas = []
+
+        # Tenta extrair dados do Melidata (JSON embutido no script)
+        melidata_match = self.melidata_re.search(markdown)
+        if melidata_match:
+            try:
+                lojas = self.lojas_melidata(
+                    json.loads(melidata_match.group(1)),
+                    sku,
+                    descricao,
+                    review,
+                    imagem,
+                    data_hora,
+                )
+            except json.JSONDecodeError as e:
+                print(f'Erro ao parsear Melidata JSON: {e}')
+
+        # Fallback: extrai dados do HTML/Markdown se Melidata não estiver disponível
+        if not lojas:
+            for bloco in self.bloco_re.split(markdown):
+                if 'Vendido por' not in bloco:
+                    continue
+                loja_match = self.loja_re.search(bloco)
+                preco_match = self.preco_re.search(bloco)
+                nome_loja = (
+                    loja_match.group(1).strip()
+                    if loja_match
+                    else 'Mercado Livre'
+                )
+                preco_final = 0.0
+                if preco_match:
+                    try:
+                        preco_final = parse_preco_brl(preco_match.group(1))
+                    except ValueError:
+                        print(
+                            f'Erro ao converter preço (Mercado Livre): {preco_match.group(1)}'
+                        )
+                key_loja = self.key_loja(nome_loja)
+                lojas.append(
+                    self.loja(
+                        sku,
+                        nome_loja,
+                        preco_final,
+                        data_hora,
+                        key_loja,
+                        f'{key_loja}_{sku}',
+                        descricao,
+                        review,
+                        imagem,
+                    )
+                )
+
+        if not lojas:
+            print('Nenhum vendedor encontrado no Markdown (Mercado Livre)')
+
+        return lojas
+
+
+# Registro de extratores indexado pelo domínio (sem subdomínio)
+EXTRACTORS = {}
+
+
+def register_extractor(extractor):
+    """Registra um extrator para todos os domínios que ele atende."""
+    for host in extractor.hosts:
+        EXTRACTORS[host] = extractor
+    return extractor
+
+
+def get_extractor(url):
+    """Retorna o extrator do domínio da URL (ou de um domínio pai) ou None."""
+    host = host_from_url(url)
+    while host:
+        extractor = EXTRACTORS.get(host)
+        if extractor is not None:
+            return extractor
+        _, _, host = host.partition('.')
+    return None
+
+
+def extract_for_url(url, markdown, data_hora=None):
+    """
+    Aplica o extrator do domínio da URL; retorna None se a URL não for
+    reconhecida. Função de módulo, para poder rodar num ExtractionPool.
+    """
+    extractor = get_extractor(url)
+    if extractor is None:
+        return None
+    return extractor.extract(markdown, data_hora, url)
+
+
+def extract_structured_for_url(url, html, data_hora=None):
+    """
+    Aplica o `extract_structured` do extrator do domínio da URL; retorna
+    None se a URL não for reconhecida ou a página não tiver dados
+    estruturados. Função de módulo, para poder rodar num ExtractionPool.
+    """
+    extractor = get_extractor(url)
+    if extractor is None:
+        return None
+    return extractor.extract_structured(html, url, data_hora)
+
+
+register_extractor(AmazonExtractor())
+register_extractor(BelezaExtractor())
+register_extractor(MeliExtractor())
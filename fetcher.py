@@ -0,0 +1,117 @@
+import json
+import os
+
+from api_client import ApiClient
+
+# Cabeçalhos usados no fetch HTTP simples (sem navegador)
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
+}
+
+TIER_HTTP = 'http'
+TIER_BROWSER = 'navegador'
+
+# Validadores HTTP (ETag/Last-Modified) da última resposta processada por URL
+VALIDATORS_FILE = 'http_validators.json'
+
+
+class HttpFetcher(ApiClient):
+    """Cliente HTTP com pool próprio para baixar páginas sem renderização."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('headers', HTTP_HEADERS)
+        super().__init__(**kwargs)
+
+    async def fetch(self, url, headers=None):
+        """Executa um GET e retorna (status, corpo, cabeçalhos da resposta)."""
+        await self.start()
+        async with self.session.get(url, headers=headers) as response:
+            corpo = await response.text() if response.status != 304 else ''
+            return response.status, corpo, response.headers.copy()
+
+
+class ConditionalCache:
+    """
+    Guarda ETag/Last-Modified por URL para requisições condicionais.
+
+    `headers_for` monta If-None-Match/If-Modified-Since a partir dos
+    validadores confirmados; `update` guarda os da resposta atual como
+    pendentes e `commit` os confirma depois que os dados da URL foram
+    enviados com sucesso, para que um 304 nunca esconda um envio que falhou.
+    """
+
+    def __init__(self, path=VALIDATORS_FILE):
+        self.path = path
+        self.saved = self.load()
+        self.pending = {}
+        self.not_modified = 0
+
+    def load(self):
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f'Erro ao carregar {self.path}: {e}')
+        return {}
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.saved, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f'Erro ao salvar {self.path}: {e}')
+
+    def headers_for(self, url):
+        validadores = self.saved.get(url, {})
+        headers = {}
+        if validadores.get('etag'):
+            headers['If-None-Match'] = validadores['etag']
+        if validadores.get('last_modified'):
+            headers['If-Modified-Since'] = validadores['last_modified']
+        return headers
+
+    def update(self, url, response_headers):
+        validadores = {
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+        }
+        if any(validadores.values()):
+            self.pending[url] = validadores
+
+    def commit(self, url):
+        validadores = self.pending.pop(url, None)
+        if validadores is not None:
+            self.saved[url] = validadores
+
+
+async def render_raw_html(crawler, html):
+    """Converte HTML já baixado em Markdown com o Crawl4AI, sem abrir página no navegador."""
+    result = await crawler.arun(url=f'raw:{html}', bypass_cache=True)
+    return result.markdown or ''
+
+
+class FetchTierStats:
+    """Contabiliza, por marketplace, em qual camada de fetch cada URL foi resolvida."""
+
+    def __init__(self):
+        self.counts = {}
+
+    def record(self, marketplace, tier):
+        por_tier = self.counts.setdefault(marketplace or 'Desconhecido', {})
+        por_tier[tier] = por_tier.get(tier, 0) + 1
+
+    def summary(self):
+        linhas = []
+        for marketplace, por_tier in sorted(self.counts.items()):
+            total = sum(por_tier.values())
+            http = por_tier.get(TIER_HTTP, 0)
+            linhas.append(
+                f'{marketplace}: {http}/{total} via HTTP, '
+                f'{por_tier.get(TIER_BROWSER, 0)}/{total} via navegador'
+            )
+        return '; '.join(linhas)
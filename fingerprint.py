@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import re
+
+# Arquivo com a impressão digital do conteúdo de cada URL na última execução
+FINGERPRINTS_FILE = 'page_fingerprints.json'
+
+# Normalizações aplicadas antes do hash: trechos que mudam a cada
+# carregamento sem alterar os dados (horários, parâmetros de rastreamento)
+DEFAULT_NORMALIZERS = (
+    # Data/hora ISO 8601
+    (re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2})?(?:\.\d+)?Z?'), ''),
+    # Datas e horários no formato brasileiro
+    (re.compile(r'\b\d{2}/\d{2}(?:/\d{4})?(?:,?\s*\d{2}:\d{2}(?::\d{2})?)?'), ''),
+    # Timestamps em milissegundos/segundos (JSON embutido)
+    (re.compile(r'\b1\d{9}(?:\d{3})?\b'), ''),
+    # Parâmetros de rastreamento em URLs
+    (
+        re.compile(
+            r'([?&])(?:utm_\w+|ref_?|_encoding|pd_rd_\w+|pf_rd_\w+|psc|qid|sr|rdc'
+            r'|tracking_id|c_id|c_uid|c_element_\w+|reco_\w+|sid|searchVariation)'
+            r'=[^&\s)"\']*'
+        ),
+        r'\1',
+    ),
+    # Espaços repetidos
+    (re.compile(r'\s+'), ' '),
+)
+
+# Valor retornado por crawl_url quando a página não mudou desde a última execução
+UNCHANGED = object()
+
+
+def fingerprint(content, normalizers=DEFAULT_NORMALIZERS):
+    """Calcula o hash do conteúdo após as normalizações."""
+    for pattern, replacement in normalizers:
+        content = pattern.sub(replacement, content)
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class FingerprintCache:
+    """
+    Cache de impressões digitais de conteúdo por URL.
+
+    `check` compara o conteúdo atual com o da última execução e guarda o novo
+    hash como pendente; `commit` o confirma depois que os dados da URL foram
+    enviados com sucesso, para que uma falha não faça a URL ser pulada na
+    próxima execução. `save` grava o cache em disco ao final da execução.
+    """
+
+    def __init__(self, path=FINGERPRINTS_FILE, normalizers=DEFAULT_NORMALIZERS):
+        self.path = path
+        self.normalizers = normalizers
+        self.saved = self.load()
+        self.pending = {}
+        self.skipped = 0
+
+    def load(self):
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f'Erro ao carregar {self.path}: {e}')
+        return {}
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.saved, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f'Erro ao salvar {self.path}: {e}')
+
+    def check(self, url, content, tier=''):
+        """Retorna True se o conteúdo (obtido pela camada `tier`) não mudou."""
+        chave = f'{tier}:{fingerprint(content, self.normalizers)}'
+        if self.saved.get(url) == chave:
+            self.pending.pop(url, None)
+            self.skipped += 1
+            return True
+        self.pending[url] = chave
+        return False
+
+    def commit(self, url):
+        chave = self.pending.pop(url, None)
+        if chave is not None:
+            self.saved[url] = chave
@@ -0,0 +1,201 @@
+import contextlib
+import json
+import os
+import time
+from datetime import datetime
+
+# Arquivos do relatório da execução (JSON) e das métricas para o textfile
+# collector do node_exporter (Prometheus)
+RUN_REPORT_FILE = 'run_report.json'
+PROMETHEUS_FILE = 'crawler_metrics.prom'
+
+# Etapas medidas por URL e unidade de cada uma
+STAGE_QUEUE_WAIT = 'fila_espera'
+STAGE_FETCH_HTTP = 'fetch_http'
+STAGE_RENDER = 'renderizacao'
+STAGE_CONVERT = 'conversao_html'
+STAGE_MARKDOWN = 'markdown'
+STAGE_EXTRACT = 'extracao'
+STAGE_API_POST = 'api_post'
+STAGE_API_PUT = 'api_put'
+STAGE_URL = 'url_total'
+STAGE_UNITS = {STAGE_MARKDOWN: 'bytes'}
+DEFAULT_UNIT = 'seconds'
+# Profundidade das filas entre os estágios do pipeline ('profundidade_envio')
+STAGE_DEPTH_PREFIX = 'profundidade_'
+DEPTH_UNIT = 'items'
+
+QUANTILES = (0.5, 0.95, 0.99)
+PROMETHEUS_PREFIX = 'crawler'
+
+
+def percentile(values, q):
+    """Percentil `q` (0 a 1) de uma lista ordenada, com interpolação linear."""
+    if not values:
+        return 0.0
+    posicao = (len(values) - 1) * q
+    inferior = int(posicao)
+    superior = min(inferior + 1, len(values) - 1)
+    return values[inferior] + (values[superior] - values[inferior]) * (
+        posicao - inferior
+    )
+
+
+def stage_unit(stage):
+    if stage.startswith(STAGE_DEPTH_PREFIX):
+        return DEPTH_UNIT
+    return STAGE_UNITS.get(stage, DEFAULT_UNIT)
+
+
+def prometheus_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def write_atomic(path, content):
+    # O textfile collector pode ler o arquivo a qualquer momento: escreve
+    # num temporário e troca de uma vez
+    temporario = f'{path}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temporario, path)
+
+
+class RunMetrics:
+    """
+    Métricas de uma execução: amostras por etapa e marketplace, contadores
+    e valores finais da execução.
+
+    `observe` registra uma amostra (segundos, bytes ou itens, conforme
+    `stage_unit`), `timer` mede a duração de um bloco e `count` incrementa um
+    contador. `report` agrega as amostras em p50/p95/p99 por marketplace;
+    `write_json` e `write_prometheus` exportam o resultado.
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.started = time.monotonic()
+        self.samples = {}
+        self.counters = {}
+        self.run = {}
+
+    def observe(self, stage, marketplace, value):
+        por_marketplace = self.samples.setdefault(stage, {})
+        por_marketplace.setdefault(marketplace or 'Desconhecido', []).append(
+            value
+        )
+
+    @contextlib.contextmanager
+    def timer(self, stage, marketplace):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, marketplace, time.perf_counter() - inicio)
+
+    def count(self, name, marketplace, n=1):
+        por_marketplace = self.counters.setdefault(name, {})
+        chave = marketplace or 'Desconhecido'
+        por_marketplace[chave] = por_marketplace.get(chave, 0) + n
+
+    def set(self, name, value):
+        """Registra um valor final da execução (sucessos, falhas...)."""
+        self.run[name] = value
+
+    def report(self):
+        etapas = {}
+        for stage, por_marketplace in sorted(self.samples.items()):
+            etapas[stage] = {'unidade': stage_unit(stage)}
+            for marketplace, valores in sorted(por_marketplace.items()):
+                ordenados = sorted(valores)
+                resumo = {
+                    'amostras': len(ordenados),
+                    'soma': sum(ordenados),
+                    'max': ordenados[-1],
+                }
+                for q in QUANTILES:
+                    resumo[f'p{round(q * 100)}'] = percentile(ordenados, q)
+                etapas[stage][marketplace] = resumo
+        return {
+            'inicio': self.started_at.isoformat(timespec='seconds'),
+            'duracao_segundos': time.monotonic() - self.started,
+            'execucao': self.run,
+            'etapas': etapas,
+            'contadores': self.counters,
+        }
+
+    def write_json(self, path=RUN_REPORT_FILE, report=None):
+        write_atomic(
+            path,
+            json.dumps(report or self.report(), ensure_ascii=False, indent=2),
+        )
+
+    def prometheus_lines(self, report=None):
+        report = report or self.report()
+        linhas = []
+        familias = {}
+        for stage, por_marketplace in report['etapas'].items():
+            unidade = por_marketplace['unidade']
+            familias.setdefault(unidade, []).append((stage, por_marketplace))
+        for unidade, etapas in sorted(familias.items()):
+            nome = f'{PROMETHEUS_PREFIX}_stage_{unidade}'
+            linhas.append(
+                f'# HELP {nome} Distribuição por etapa e marketplace na última execução.'
+            )
+            linhas.append(f'# TYPE {nome} summary')
+            for stage, por_marketplace in etapas:
+                for marketplace, resumo in por_marketplace.items():
+                    if marketplace == 'unidade':
+                        continue
+                    labels = (
+                        f'stage="{prometheus_label(stage)}",'
+                        f'marketplace="{prometheus_label(marketplace)}"'
+                    )
+                    for q in QUANTILES:
+                        linhas.append(
+                            f'{nome}{{{labels},quantile="{q}"}} '
+                            f"{resumo[f'p{round(q * 100)}']}"
+                        )
+                    linhas.append(f"{nome}_sum{{{labels}}} {resumo['soma']}")
+                    linhas.append(
+                        f"{nome}_count{{{labels}}} {resumo['amostras']}"
+                    )
+        if report['contadores']:
+            nome = f'{PROMETHEUS_PREFIX}_events'
+            linhas.append(
+                f'# HELP {nome} Eventos por marketplace na última execução.'
+            )
+            linhas.append(f'# TYPE {nome} gauge')
+            for evento, por_marketplace in sorted(report['contadores'].items()):
+                for marketplace, valor in sorted(por_marketplace.items()):
+                    linhas.append(
+                        f'{nome}{{event="{prometheus_label(evento)}",'
+                        f'marketplace="{prometheus_label(marketplace)}"}} {valor}'
+                    )
+        nome = f'{PROMETHEUS_PREFIX}_run'
+        linhas.append(f'# HELP {nome} Valores finais da última execução.')
+        linhas.append(f'# TYPE {nome} gauge')
+        linhas.append(
+            f'{nome}{{name="duracao_segundos"}} {report["duracao_segundos"]}'
+        )
+        for chave, valor in sorted(report['execucao'].items()):
+            if isinstance(valor, (int, float)):
+                linhas.append(
+                    f'{nome}{{name="{prometheus_label(chave)}"}} {valor}'
+                )
+        return linhas
+
+    def write_prometheus(self, path=PROMETHEUS_FILE, report=None):
+        write_atomic(path, '\n'.join(self.prometheus_lines(report)) + '\n')
+
+    def summary(self):
+        partes = []
+        for stage in (STAGE_RENDER, STAGE_FETCH_HTTP, STAGE_EXTRACT, STAGE_URL):
+            valores = sorted(
+                v for vs in self.samples.get(stage, {}).values() for v in vs
+            )
+            if valores:
+                partes.append(
+                    f'{stage} p50 {percentile(valores, 0.5):.2f}s / '
+                    f'p95 {percentile(valores, 0.95):.2f}s'
+                )
+        return ', '.join(partes)
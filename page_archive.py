@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import struct
+import time
+import zlib
+
+# Arquivo de páginas capturadas (dados) e o índice ao lado dele
+ARCHIVE_FILE = 'page_archive.dat'
+INDEX_SUFFIX = '.idx.db'
+COMPRESSION_LEVEL = 6
+
+# Cada registro é gravado como <tamanho: uint32 big-endian><JSON comprimido>
+RECORD_HEADER = struct.Struct('>I')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT NOT NULL,
+    captured_at REAL NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    tier TEXT,
+    status INTEGER
+);
+CREATE INDEX IF NOT EXISTS pages_url ON pages (url, captured_at);
+"""
+
+
+class PageArchive:
+    """
+    Arquivo append-only das páginas renderizadas, para reprocessá-las sem
+    navegador.
+
+    Cada captura (URL, HTML, Markdown, status e camada de fetch) é gravada
+    comprimida com zlib no fim do arquivo de dados; um índice SQLite guarda
+    URL, horário, offset e tamanho de cada registro, de forma que a última
+    captura de uma URL (ou a última antes de um horário) é lida com um seek,
+    sem percorrer o arquivo.
+    """
+
+    def __init__(self, path=ARCHIVE_FILE, compression_level=COMPRESSION_LEVEL):
+        self.path = path
+        self.compression_level = compression_level
+        self.data = open(path, 'a+b')
+        self.index = sqlite3.connect(f'{path}{INDEX_SUFFIX}', timeout=30)
+        self.index.row_factory = sqlite3.Row
+        self.index.executescript(SCHEMA)
+        self.written = 0
+        self.bytes_raw = 0
+        self.bytes_stored = 0
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def append(self, url, markdown, html=None, status=None, tier=None):
+        """Grava uma captura da URL no fim do arquivo e a registra no índice."""
+        agora = time.time()
+        bruto = json.dumps(
+            {
+                'url': url,
+                'captured_at': agora,
+                'status': status,
+                'tier': tier,
+                'markdown': str(markdown or ''),
+                'html': html,
+            },
+            ensure_ascii=False,
+        ).encode('utf-8')
+        comprimido = zlib.compress(bruto, self.compression_level)
+        self.data.seek(0, os.SEEK_END)
+        offset = self.data.tell()
+        self.data.write(RECORD_HEADER.pack(len(comprimido)))
+        self.data.write(comprimido)
+        self.data.flush()
+        # O índice só aponta para registros já gravados por completo
+        with self.index:
+            self.index.execute(
+                'INSERT INTO pages (url, captured_at, offset, length, tier, status) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    url,
+                    agora,
+                    offset + RECORD_HEADER.size,
+                    len(comprimido),
+                    tier,
+                    status,
+                ),
+            )
+        self.written += 1
+        self.bytes_raw += len(bruto)
+        self.bytes_stored += len(comprimido) + RECORD_HEADER.size
+
+    def read(self, offset, length):
+        self.data.seek(offset)
+        return json.loads(zlib.decompress(self.data.read(length)))
+
+    def latest(self, url, before=None):
+        """Última captura da URL (opcionalmente anterior a `before`), ou None."""
+        row = self.index.execute(
+            'SELECT offset, length FROM pages WHERE url = ? AND captured_at <= ? '
+            'ORDER BY captured_at DESC LIMIT 1',
+            (url, before if before is not None else float('inf')),
+        ).fetchone()
+        return self.read(row['offset'], row['length']) if row else None
+
+    def urls(self, before=None):
+        """URLs com ao menos uma captura (anterior a `before`, se informado)."""
+        return [
+            row['url']
+            for row in self.index.execute(
+                'SELECT DISTINCT url FROM pages WHERE captured_at <= ? ORDER BY url',
+                (before if before is not None else float('inf'),),
+            )
+        ]
+
+    def summary(self):
+        if not self.written:
+            return 'nenhuma página gravada'
+        return (
+            f'{self.written} páginas gravadas, '
+            f'{self.bytes_raw / 1_000_000:.1f} MB -> '
+            f'{self.bytes_stored / 1_000_000:.1f} MB comprimidos'
+        )
+
+
+class ReplayResult:
+    """Resposta no formato do CrawlResult do Crawl4AI, lida do arquivo."""
+
+    def __init__(self, url, markdown='', html=None, status_code=None):
+        self.url = url
+        self.markdown = markdown
+        self.html = html
+        self.status_code = status_code
+        self.success = True
+        self.error_message = None
+
+
+class ReplayCrawler:
+    """
+    Substitui o AsyncWebCrawler lendo as páginas do PageArchive.
+
+    `arun` devolve a última captura da URL em vez de abrir o navegador;
+    URLs sem captura respondem 404, o que a política de retentativas trata
+    como falha permanente.
+    """
+
+    crawler_strategy = None
+
+    def __init__(self, archive, before=None):
+        self.archive = archive
+        self.before = before
+        self.served = 0
+        self.missing = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+    def on_start(self, callback):
+        pass
+
+    async def arun(self, *args, **kwargs):
+        url = str(kwargs.get('url', args[0] if args else ''))
+        registro = self.archive.latest(url, self.before)
+        if registro is None:
+            self.missing += 1
+            return ReplayResult(url, status_code=404)
+        self.served += 1
+        return ReplayResult(
+            url,
+            markdown=registro['markdown'],
+            html=registro['html'],
+            status_code=registro['status'] or 200,
+        )
+
+    def summary(self):
+        return (
+            f'replay de {self.served} páginas do arquivo '
+            f'({self.missing} sem captura)'
+        )
@@ -0,0 +1,200 @@
+import asyncio
+import contextlib
+import time
+
+from metrics import STAGE_DEPTH_PREFIX
+
+
+class Done:
+    """Resultado final de um item que não precisa passar pelos estágios seguintes."""
+
+    def __init__(self, result):
+        self.result = result
+
+
+class Stage:
+    """
+    Estágio do pipeline: `workers` tarefas consumindo uma fila de entrada
+    limitada a `capacity` itens.
+
+    `busy_seconds` soma o tempo em que os workers estiveram processando e
+    `blocked_seconds` o tempo em que quem alimenta o estágio esperou por
+    espaço na fila (backpressure).
+    """
+
+    def __init__(self, name, handler=None, workers=1, capacity=None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.capacity = max(1, capacity or 2 * self.workers)
+        self.queue = asyncio.Queue(maxsize=self.capacity)
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.processed = 0
+        self.max_depth = 0
+
+    @contextlib.contextmanager
+    def busy(self):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.busy_seconds += time.perf_counter() - inicio
+            self.processed += 1
+
+    def utilization(self, elapsed):
+        if elapsed <= 0:
+            return 0.0
+        return min(1.0, self.busy_seconds / (self.workers * elapsed))
+
+
+def encadear(origem, destino):
+    """Copia o resultado (ou a exceção) do future `origem` para `destino`."""
+    if destino.done():
+        return
+    if origem.cancelled():
+        destino.cancel()
+    elif origem.exception() is not None:
+        destino.set_exception(origem.exception())
+    else:
+        destino.set_result(origem.result())
+
+
+class Pipeline:
+    """
+    Estágios assíncronos ligados por filas limitadas.
+
+    O primeiro estágio pode ser uma fonte externa (`source`), cujos workers
+    só medem a própria ocupação e entregam itens com `put`. Cada estágio de
+    `add_stage` tem workers próprios; o retorno do handler segue para o
+    próximo estágio, a menos que seja um `Done`, e o do último estágio
+    resolve o future devolvido por `put`. Um handler também pode retornar
+    um future (o envio de um lote, por exemplo): o worker fica livre e o
+    future de `put` é resolvido quando ele for. Quando a fila de um estágio enche,
+    `put` (ou o worker do estágio anterior) espera, de forma que um estágio
+    lento segura os anteriores em vez de acumular itens em memória.
+
+    Com `metrics` (RunMetrics), a profundidade de cada fila é amostrada a
+    cada item enfileirado.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self.stages = []
+        self.tasks = []
+        self.started = None
+        self.finished = None
+
+    def source(self, name, workers=1):
+        stage = Stage(name, workers=workers)
+        self.stages.append(stage)
+        return stage
+
+    def add_stage(self, name, handler, workers=1, capacity=None):
+        stage = Stage(name, handler, workers, capacity)
+        self.stages.append(stage)
+        return stage
+
+    @property
+    def handled(self):
+        return [stage for stage in self.stages if stage.handler is not None]
+
+    async def __aenter__(self):
+        self.started = time.monotonic()
+        estagios = self.handled
+        for indice, stage in enumerate(estagios):
+            proximo = estagios[indice + 1] if indice + 1 < len(estagios) else None
+            self.tasks.extend(
+                asyncio.create_task(self._worker(stage, proximo))
+                for _ in range(stage.workers)
+            )
+        return self
+
+    async def join(self):
+        """Aguarda até todos os itens entregues passarem por todos os estágios."""
+        for stage in self.handled:
+            await stage.queue.join()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            await self.join()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.finished = time.monotonic()
+
+    async def _enqueue(self, stage, entrada):
+        inicio = time.perf_counter()
+        await stage.queue.put(entrada)
+        stage.blocked_seconds += time.perf_counter() - inicio
+        profundidade = stage.queue.qsize()
+        stage.max_depth = max(stage.max_depth, profundidade)
+        if self.metrics is not None:
+            self.metrics.observe(
+                f'{STAGE_DEPTH_PREFIX}{stage.name}', 'Todos', profundidade
+            )
+
+    async def put(self, item):
+        """Entrega um item ao primeiro estágio e retorna o future do resultado final."""
+        future = asyncio.get_running_loop().create_future()
+        await self._enqueue(self.handled[0], (item, future))
+        return future
+
+    async def _worker(self, stage, proximo):
+        while True:
+            item, future = await stage.queue.get()
+            try:
+                with stage.busy():
+                    resultado = await stage.handler(item)
+                if isinstance(resultado, asyncio.Future):
+                    resultado.add_done_callback(
+                        lambda origem, future=future: encadear(origem, future)
+                    )
+                elif isinstance(resultado, Done) or proximo is None:
+                    if not future.done():
+                        future.set_result(
+                            resultado.result
+                            if isinstance(resultado, Done)
+                            else resultado
+                        )
+                else:
+                    await self._enqueue(proximo, (resultado, future))
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                stage.queue.task_done()
+
+    def report(self):
+        """Ocupação, tempo bloqueado e profundidade máxima da fila de cada estágio."""
+        decorrido = 0.0
+        if self.started is not None:
+            decorrido = (self.finished or time.monotonic()) - self.started
+        return {
+            stage.name: {
+                'workers': stage.workers,
+                'capacidade': stage.capacity,
+                'processados': stage.processed,
+                'utilizacao': stage.utilization(decorrido),
+                'bloqueado_segundos': stage.blocked_seconds,
+                'profundidade_max': stage.max_depth,
+            }
+            for stage in self.stages
+        }
+
+    def summary(self):
+        partes = []
+        for nome, resumo in self.report().items():
+            texto = f"{nome} {resumo['utilizacao']:.0%} ocupado"
+            if resumo['bloqueado_segundos'] >= 0.1:
+                texto += f", {resumo['bloqueado_segundos']:.0f}s em backpressure"
+            if resumo['profundidade_max']:
+                texto += (
+                    f", fila máx. {resumo['profundidade_max']}/{resumo['capacidade']}"
+                )
+            partes.append(texto)
+        return '; '.join(partes)
@@ -0,0 +1,212 @@
+import asyncio
+import re
+import time
+from urllib.parse import urlparse
+
+# Taxa (requisições/s) e rajada padrão por host
+DEFAULT_HOST_LIMITS = {
+    'www.amazon.com.br': (0.5, 2),
+    'www.belezanaweb.com.br': (1.0, 3),
+    'www.mercadolivre.com.br': (0.5, 2),
+}
+DEFAULT_LIMIT = (1.0, 2)
+
+# Status HTTP que indicam throttling por parte do servidor
+THROTTLE_STATUSES = (429, 503)
+
+# Bloqueios seguidos do GET simples (sem navegador) até a camada HTTP ser
+# suspensa no host, e por quanto tempo (s)
+HTTP_BLOCK_LIMIT = 3
+HTTP_PAUSE = 30 * 60
+
+# Trechos que aparecem em páginas de bloqueio/CAPTCHA
+BLOCK_MARKERS = (
+    'captcha',
+    'digite os caracteres que você vê',
+    'robot check',
+    'api-services-support@amazon.com',
+    'access denied',
+    'acesso negado',
+    'verifique que você não é um robô',
+)
+
+
+def host_from_url(url):
+    """Retorna o host normalizado de uma URL (aceita URLs sem esquema)."""
+    if '://' not in url:
+        url = f'https://{url}'
+    return (urlparse(url).hostname or '').lower()
+
+
+# Trechos do HTML bruto: scripts, estilos e comentários (invisíveis; um
+# script de reCAPTCHA no <head> não faz da página uma página de bloqueio),
+# tags e texto
+HTML_TOKEN_RE = re.compile(
+    r'<(script|style|noscript|template)\b.*?</\1\s*>|<!--.*?-->|<[^>]*>|[^<]+',
+    re.IGNORECASE | re.DOTALL,
+)
+SPACES_RE = re.compile(r'\s+')
+# Quanto do início da página is_block_page examina
+BLOCK_SAMPLE_CHARS = 5000
+
+
+def is_block_page(content):
+    """Indica se o conteúdo parece uma página de bloqueio ou CAPTCHA."""
+    if not content:
+        return False
+    amostra = content[:BLOCK_SAMPLE_CHARS].lower()
+    return any(marker in amostra for marker in BLOCK_MARKERS)
+
+
+def visible_text(html, limit=None):
+    """Texto visível de um HTML bruto, sem scripts, estilos e tags; com
+    `limit`, para de ler a página ao juntar tantos caracteres."""
+    partes = []
+    total = 0
+    for token in HTML_TOKEN_RE.finditer(html or ''):
+        trecho = token.group()
+        if trecho.startswith('<'):
+            continue
+        partes.append(trecho)
+        total += len(trecho)
+        if limit is not None and total >= limit:
+            break
+    return SPACES_RE.sub(' ', ' '.join(partes)).strip()
+
+
+def is_block_html(html):
+    """Como is_block_page, mas sobre o texto visível de um HTML bruto."""
+    return is_block_page(visible_text(html, limit=2 * BLOCK_SAMPLE_CHARS))
+
+
+class TokenBucket:
+    """Balde de tokens com taxa ajustável: `rate` tokens/s, até `burst` acumulados."""
+
+    def __init__(self, rate, burst):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(
+            self.burst, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    async def acquire(self):
+        """Aguarda até haver um token disponível e o consome."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PolitenessScheduler:
+    """
+    Controla o ritmo de requisições por host.
+
+    Cada host tem seu próprio TokenBucket. Respostas 429/503 ou páginas de
+    bloqueio reduzem a taxa do host (e impõem uma pausa); uma sequência de
+    respostas normais devolve a taxa gradualmente ao valor configurado.
+
+    O GET simples da camada HTTP é reportado à parte (`report_http`): sites
+    que recusam clientes sem navegador respondem 503 ou CAPTCHA a ele sem
+    que o host esteja sobrecarregado, então esses bloqueios não reduzem a
+    taxa usada pelo navegador. Depois de `http_block_limit` bloqueios
+    seguidos, `http_allowed` suspende a camada HTTP no host por `http_pause`
+    segundos.
+    """
+
+    def __init__(
+        self,
+        host_limits=None,
+        default_limit=DEFAULT_LIMIT,
+        slowdown=0.5,
+        speedup=1.25,
+        min_rate=0.05,
+        cooldown=30.0,
+        recovery_streak=5,
+        http_block_limit=HTTP_BLOCK_LIMIT,
+        http_pause=HTTP_PAUSE,
+    ):
+        self.host_limits = dict(DEFAULT_HOST_LIMITS)
+        if host_limits:
+            self.host_limits.update(host_limits)
+        self.default_limit = default_limit
+        self.slowdown = slowdown
+        self.speedup = speedup
+        self.min_rate = min_rate
+        self.cooldown = cooldown
+        self.recovery_streak = recovery_streak
+        self.http_block_limit = http_block_limit
+        self.http_pause = http_pause
+        self.buckets = {}
+        self.streaks = {}
+        self.http_blocks = {}
+        self.http_paused_until = {}
+
+    def bucket(self, url):
+        host = host_from_url(url)
+        if host not in self.buckets:
+            rate, burst = self.host_limits.get(host, self.default_limit)
+            self.buckets[host] = TokenBucket(rate, burst)
+            self.streaks[host] = 0
+        return self.buckets[host]
+
+    async def acquire(self, url):
+        """Aguarda a vez do host da URL antes de uma requisição."""
+        await self.bucket(url).acquire()
+
+    def report(self, url, status=None, blocked=False):
+        """Registra o resultado de uma requisição e ajusta a taxa do host."""
+        bucket = self.bucket(url)
+        host = host_from_url(url)
+        if blocked or status in THROTTLE_STATUSES:
+            self.streaks[host] = 0
+            bucket.rate = max(self.min_rate, bucket.rate * self.slowdown)
+            bucket.tokens = 0.0
+            bucket.blocked_until = time.monotonic() + self.cooldown
+            print(
+                f'Throttling detectado em {host} (status={status}, bloqueio={blocked}); '
+                f'nova taxa: {bucket.rate:.2f} req/s'
+            )
+            return
+        self.streaks[host] += 1
+        if (
+            bucket.rate < bucket.base_rate
+            and self.streaks[host] >= self.recovery_streak
+        ):
+            self.streaks[host] = 0
+            bucket.rate = min(bucket.base_rate, bucket.rate * self.speedup)
+
+    def report_http(self, url, status=None, blocked=False):
+        """Registra o resultado de um GET da camada HTTP sem mexer na taxa do host."""
+        host = host_from_url(url)
+        if not (blocked or status in THROTTLE_STATUSES):
+            self.http_blocks[host] = 0
+            self.report(url, status=status)
+            return
+        self.http_blocks[host] = self.http_blocks.get(host, 0) + 1
+        if self.http_blocks[host] >= self.http_block_limit:
+            self.http_blocks[host] = 0
+            self.http_paused_until[host] = time.monotonic() + self.http_pause
+            print(
+                f'Camada HTTP bloqueada em {host} (status={status}, bloqueio={blocked}); '
+                f'suspensa por {self.http_pause:.0f}s'
+            )
+
+    def http_allowed(self, url):
+        """Indica se a camada HTTP pode ser usada no host da URL."""
+        host = host_from_url(url)
+        return time.monotonic() >= self.http_paused_until.get(host, 0.0)
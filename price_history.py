@@ -0,0 +1,137 @@
+import json
+import sqlite3
+from datetime import datetime
+
+# Banco local com a última observação de cada key_sku
+PRICE_HISTORY_DB = 'price_history.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    key_sku TEXT PRIMARY KEY,
+    sku TEXT NOT NULL,
+    marketplace TEXT,
+    loja TEXT,
+    preco_final REAL,
+    status TEXT,
+    observed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seller_sets (
+    sku TEXT NOT NULL,
+    marketplace TEXT NOT NULL,
+    key_skus TEXT NOT NULL,
+    PRIMARY KEY (sku, marketplace)
+);
+"""
+
+
+class PriceHistory:
+    """
+    Histórico local de preços por key_sku (SQLite).
+
+    `annotate` preenche `change_price` com a variação em relação à última
+    observação e retorna apenas os registros que mudaram (preço, status ou
+    conjunto de vendedores do SKU). `record` grava os registros como nova
+    observação e deve ser chamado só depois que a API os aceitar, para que
+    uma falha de envio não esconda a alteração na próxima execução.
+    """
+
+    def __init__(self, path=PRICE_HISTORY_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def last_observation(self, key_sku):
+        return self.conn.execute(
+            'SELECT preco_final, status FROM observations WHERE key_sku = ?',
+            (key_sku,),
+        ).fetchone()
+
+    def seller_set(self, sku, marketplace):
+        row = self.conn.execute(
+            'SELECT key_skus FROM seller_sets WHERE sku = ? AND marketplace = ?',
+            (sku, marketplace),
+        ).fetchone()
+        return set(json.loads(row['key_skus'])) if row else None
+
+    @staticmethod
+    def group_by_sku(registros):
+        grupos = {}
+        for registro in registros:
+            chave = (registro['sku'], registro['marketplace'])
+            grupos.setdefault(chave, []).append(registro)
+        return grupos
+
+    def annotate(self, registros):
+        """Calcula change_price de cada registro e retorna os que mudaram."""
+        alterados = []
+        for (sku, marketplace), grupo in self.group_by_sku(registros).items():
+            vendedores = {registro['key_sku'] for registro in grupo}
+            vendedores_mudaram = vendedores != self.seller_set(
+                sku, marketplace
+            )
+            for registro in grupo:
+                anterior = self.last_observation(registro['key_sku'])
+                if anterior is None:
+                    registro['change_price'] = 0
+                    alterados.append(registro)
+                    continue
+                variacao = round(
+                    registro['preco_final'] - (anterior['preco_final'] or 0.0),
+                    2,
+                )
+                registro['change_price'] = variacao
+                if (
+                    vendedores_mudaram
+                    or variacao != 0
+                    or registro['status'] != anterior['status']
+                ):
+                    alterados.append(registro)
+        return alterados
+
+    def record(self, registros):
+        """Grava os registros como a observação mais recente de cada key_sku."""
+        agora = datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO observations '
+                '(key_sku, sku, marketplace, loja, preco_final, status, observed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (
+                        registro['key_sku'],
+                        registro['sku'],
+                        registro['marketplace'],
+                        registro['loja'],
+                        registro['preco_final'],
+                        registro['status'],
+                        agora,
+                    )
+                    for registro in registros
+                ],
+            )
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO seller_sets (sku, marketplace, key_skus) '
+                'VALUES (?, ?, ?)',
+                [
+                    (
+                        sku,
+                        marketplace,
+                        json.dumps(
+                            sorted(registro['key_sku'] for registro in grupo)
+                        ),
+                    )
+                    for (sku, marketplace), grupo in self.group_by_sku(
+                        registros
+                    ).items()
+                ],
+            )
@@ -0,0 +1,142 @@
+import sqlite3
+import time
+
+from work_queue import SUCCESS_INTERVAL, WORK_QUEUE_DB
+
+# Limites padrão do intervalo de recrawl de cada URL (s)
+MIN_RECRAWL_INTERVAL = SUCCESS_INTERVAL
+MAX_RECRAWL_INTERVAL = 24 * 60 * 60
+# Peso da observação mais recente nas médias móveis
+VOLATILITY_ALPHA = 0.3
+# Probabilidade de mudança que se aceita acumular entre dois crawls: 0.5
+# recrawleia a URL cerca de duas vezes por alteração esperada
+TARGET_CHANGE_PROBABILITY = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS volatility (
+    url TEXT PRIMARY KEY,
+    observations INTEGER NOT NULL DEFAULT 0,
+    changes INTEGER NOT NULL DEFAULT 0,
+    change_rate REAL NOT NULL DEFAULT 1,
+    mean_gap REAL NOT NULL DEFAULT 0,
+    interval REAL NOT NULL DEFAULT 0,
+    last_observed REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class VolatilityTracker:
+    """
+    Estatísticas de volatilidade por URL e intervalo de recrawl adaptativo.
+
+    A cada extração bem-sucedida, `observe(url, changed)` atualiza duas
+    médias móveis exponenciais: a fração de crawls em que os dados mudaram
+    e o tempo médio entre crawls. A razão entre elas estima a taxa de
+    mudança da URL, e o intervalo até o próximo crawl é escolhido para que a
+    probabilidade acumulada de mudança fique em TARGET_CHANGE_PROBABILITY,
+    dentro de [min_interval, max_interval]. URLs novas começam como voláteis
+    (intervalo mínimo) e se espaçam à medida que permanecem estáveis; uma
+    mudança aproxima o próximo crawl de novo.
+
+    As estatísticas ficam no mesmo banco da fila de trabalho, que usa o
+    intervalo como próximo horário elegível da URL.
+    """
+
+    def __init__(
+        self,
+        path=WORK_QUEUE_DB,
+        min_interval=MIN_RECRAWL_INTERVAL,
+        max_interval=MAX_RECRAWL_INTERVAL,
+        alpha=VOLATILITY_ALPHA,
+        target=TARGET_CHANGE_PROBABILITY,
+    ):
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.alpha = alpha
+        self.target = target
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def next_interval(self, change_rate, mean_gap):
+        if change_rate <= 0:
+            return self.max_interval
+        intervalo = self.target * mean_gap / change_rate
+        return min(self.max_interval, max(self.min_interval, intervalo))
+
+    def observe(self, url, changed):
+        """Registra uma extração da URL e retorna o novo intervalo de recrawl (s)."""
+        agora = time.time()
+        row = self.conn.execute(
+            'SELECT * FROM volatility WHERE url = ?', (url,)
+        ).fetchone()
+        mudou = 1.0 if changed else 0.0
+        if row is None:
+            observacoes, mudancas = 1, int(changed)
+            # Sem histórico, a URL é tratada como volátil até provar o contrário
+            taxa = self.alpha * mudou + (1 - self.alpha)
+            intervalo_medio = self.min_interval
+        else:
+            observacoes = row['observations'] + 1
+            mudancas = row['changes'] + int(changed)
+            intervalo_real = max(agora - row['last_observed'], 1.0)
+            taxa = self.alpha * mudou + (1 - self.alpha) * row['change_rate']
+            intervalo_medio = (
+                self.alpha * intervalo_real
+                + (1 - self.alpha) * row['mean_gap']
+            )
+        intervalo = self.next_interval(taxa, intervalo_medio)
+        if changed and row is not None:
+            # A média reage devagar a uma mudança depois de um longo período
+            # estável; o intervalo anterior é ao menos reduzido à metade
+            intervalo = min(
+                intervalo, max(self.min_interval, row['interval'] / 2)
+            )
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO volatility '
+                '(url, observations, changes, change_rate, mean_gap, interval, last_observed) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    url,
+                    observacoes,
+                    mudancas,
+                    taxa,
+                    intervalo_medio,
+                    intervalo,
+                    agora,
+                ),
+            )
+        return intervalo
+
+    def interval(self, url):
+        """Intervalo de recrawl atual da URL (o mínimo se ela nunca foi observada)."""
+        row = self.conn.execute(
+            'SELECT interval FROM volatility WHERE url = ?', (url,)
+        ).fetchone()
+        return row['interval'] if row else self.min_interval
+
+    def summary(self):
+        row = self.conn.execute(
+            'SELECT COUNT(*) AS total, '
+            'SUM(interval <= ?) AS no_minimo, '
+            'SUM(interval >= ?) AS no_maximo, '
+            'AVG(interval) AS medio FROM volatility',
+            (self.min_interval, self.max_interval),
+        ).fetchone()
+        if not row['total']:
+            return 'sem observações'
+        return (
+            f"{row['total']} URLs, intervalo médio de {row['medio'] / 60:.0f} min "
+            f"({row['no_minimo']} no mínimo, {row['no_maximo']} no máximo)"
+        )
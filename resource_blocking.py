@@ -0,0 +1,149 @@
+import weakref
+from urllib.parse import urlparse
+
+from extractors import get_extractor
+
+# Tipos de recurso do Playwright que os extratores não usam
+# (as imagens são lidas do markup, não dos pixels)
+DEFAULT_BLOCKED_TYPES = frozenset({'image', 'media', 'font', 'stylesheet'})
+
+# Domínios de anúncios e rastreadores bloqueados em todos os marketplaces
+TRACKER_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googlesyndication.com',
+    'googleadservices.com',
+    'doubleclick.net',
+    'facebook.net',
+    'connect.facebook.com',
+    'hotjar.com',
+    'clarity.ms',
+    'bat.bing.com',
+    'criteo.com',
+    'criteo.net',
+    'analytics.tiktok.com',
+    'nr-data.net',
+    'newrelic.com',
+    'amazon-adsystem.com',
+    'scorecardresearch.com',
+    'taboola.com',
+    'outbrain.com',
+)
+
+# Perfis por marketplace: tipos de recurso e hosts adicionais bloqueados
+BLOCKING_PROFILES = {
+    'Amazon': {
+        'resource_types': DEFAULT_BLOCKED_TYPES,
+        'blocked_hosts': ('fls-na.amazon.com', 'unagi.amazon.com.br'),
+    },
+    'Beleza na Web': {
+        'resource_types': DEFAULT_BLOCKED_TYPES,
+        'blocked_hosts': (),
+    },
+    'Mercado Livre': {
+        'resource_types': DEFAULT_BLOCKED_TYPES,
+        'blocked_hosts': (),
+    },
+}
+
+# Tamanho médio estimado (bytes) de cada tipo de recurso bloqueado,
+# usado para estimar a economia de banda
+ESTIMATED_SIZES = {
+    'image': 40_000,
+    'media': 500_000,
+    'font': 30_000,
+    'stylesheet': 25_000,
+    'script': 60_000,
+    'xhr': 5_000,
+    'fetch': 5_000,
+}
+
+
+def host_matches(request_url, patterns):
+    """Indica se a URL pertence a algum host (ou prefixo host/caminho) da lista."""
+    parsed = urlparse(request_url)
+    host = (parsed.hostname or '').lower()
+    host_path = f'{host}{parsed.path}'
+    for pattern in patterns:
+        if '/' in pattern:
+            if host_path.startswith(pattern):
+                return True
+        elif host == pattern or host.endswith(f'.{pattern}'):
+            return True
+    return False
+
+
+class ResourceBlocker:
+    """
+    Intercepta as requisições das páginas do Playwright e aborta recursos
+    desnecessários conforme o perfil do marketplace da URL.
+
+    Instale com `install(crawler)` depois de abrir o AsyncWebCrawler. As
+    requisições bloqueadas e os bytes economizados (estimados pelo tipo de
+    recurso) são contabilizados por marketplace em `stats`.
+    """
+
+    def __init__(self, profiles=None, tracker_hosts=TRACKER_HOSTS):
+        self.profiles = profiles if profiles is not None else BLOCKING_PROFILES
+        self.tracker_hosts = tracker_hosts
+        self.stats = {}
+        # Perfil atual de cada página; páginas reutilizadas entre URLs
+        # recebem a rota uma única vez e só têm o perfil atualizado
+        self.page_profiles = weakref.WeakKeyDictionary()
+
+    def install(self, crawler):
+        crawler.crawler_strategy.set_hook('before_goto', self.before_goto)
+
+    def profile_for(self, url):
+        extractor = get_extractor(url)
+        marketplace = extractor.marketplace if extractor else None
+        return marketplace, self.profiles.get(marketplace)
+
+    def should_block(self, profile, resource_type, request_url):
+        if host_matches(request_url, self.tracker_hosts):
+            return True
+        if profile is None:
+            return False
+        if resource_type in profile.get('resource_types', ()):
+            return True
+        return host_matches(request_url, profile.get('blocked_hosts', ()))
+
+    def record(self, marketplace, resource_type, blocked):
+        stats = self.stats.setdefault(
+            marketplace or 'Desconhecido',
+            {'requisicoes': 0, 'bloqueadas': 0, 'bytes_economizados': 0},
+        )
+        stats['requisicoes'] += 1
+        if blocked:
+            stats['bloqueadas'] += 1
+            stats['bytes_economizados'] += ESTIMATED_SIZES.get(
+                resource_type, 0
+            )
+
+    async def before_goto(self, page, context=None, url=None, **kwargs):
+        already_routed = page in self.page_profiles
+        self.page_profiles[page] = self.profile_for(url or '')
+        if already_routed:
+            return page
+
+        async def handle(route):
+            request = route.request
+            marketplace, profile = self.page_profiles.get(page, (None, None))
+            blocked = self.should_block(
+                profile, request.resource_type, request.url
+            )
+            self.record(marketplace, request.resource_type, blocked)
+            if blocked:
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await page.route('**/*', handle)
+        return page
+
+    def summary(self):
+        return '; '.join(
+            f"{marketplace}: {s['bloqueadas']}/{s['requisicoes']} requisições bloqueadas, "
+            f"~{s['bytes_economizados'] / 1_000_000:.1f} MB economizados"
+            for marketplace, s in sorted(self.stats.items())
+        )
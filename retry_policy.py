@@ -0,0 +1,151 @@
+import asyncio
+import random
+
+import aiohttp
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from politeness import THROTTLE_STATUSES
+
+# Classes de falha de uma tentativa de crawl
+FAIL_NETWORK = 'rede'
+FAIL_TIMEOUT = 'timeout'
+FAIL_BLOCKED = 'bloqueio'
+FAIL_PARSE = 'sem_dados'
+FAIL_NOT_FOUND = 'nao_encontrado'
+FAIL_ERROR = 'erro'
+# Classes que não se resolvem com o tempo: na fila de trabalho, a URL é
+# estacionada depois de algumas falhas em vez de voltar à raia de retry.
+# Página sem dados não entra: uma mudança de layout ou um bloqueio servido
+# com status 200 estacionaria o catálogo inteiro
+PERMANENT_FAILURES = (FAIL_NOT_FOUND,)
+
+# Status HTTP de páginas que não existem mais (não adianta tentar de novo)
+NOT_FOUND_STATUSES = (404, 410)
+# Status HTTP que indicam bloqueio do crawler
+BLOCK_STATUSES = (403,) + THROTTLE_STATUSES
+
+# Trechos de mensagens de erro do navegador por classe de falha
+TIMEOUT_MARKERS = ('timeout', 'timed out')
+NETWORK_MARKERS = (
+    'net::err_',
+    'connection',
+    'econnreset',
+    'socket',
+    'target closed',
+    'browser has been closed',
+)
+
+
+class RetryRule:
+    """Orçamento de tentativas e backoff exponencial com jitter de uma classe de falha."""
+
+    def __init__(self, attempts, base, cap):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt):
+        # Equal jitter: metade fixa e metade aleatória, para que retentativas
+        # de várias URLs não se alinhem sem nunca chegar a espera zero
+        atraso = min(self.cap, self.base * 2 ** (attempt - 1))
+        return atraso / 2 + random.uniform(0, atraso / 2)
+
+
+# Regras padrão: attempts é o total de tentativas (incluindo a primeira)
+DEFAULT_RULES = {
+    FAIL_NETWORK: RetryRule(attempts=3, base=2, cap=15),
+    FAIL_TIMEOUT: RetryRule(attempts=2, base=5, cap=30),
+    FAIL_BLOCKED: RetryRule(attempts=2, base=20, cap=60),
+    FAIL_PARSE: RetryRule(attempts=2, base=3, cap=10),
+    FAIL_NOT_FOUND: RetryRule(attempts=1, base=0, cap=0),
+    FAIL_ERROR: RetryRule(attempts=1, base=0, cap=0),
+}
+
+
+def classify_message(message):
+    """Classifica uma mensagem de erro do navegador (rede, timeout ou erro)."""
+    texto = (message or '').lower()
+    if any(marker in texto for marker in TIMEOUT_MARKERS):
+        return FAIL_TIMEOUT
+    if any(marker in texto for marker in NETWORK_MARKERS):
+        return FAIL_NETWORK
+    return FAIL_ERROR
+
+
+def classify_exception(exc):
+    """Classifica uma exceção levantada durante o crawl."""
+    if isinstance(exc, (asyncio.TimeoutError, PlaywrightTimeoutError)):
+        return FAIL_TIMEOUT
+    if isinstance(exc, (aiohttp.ClientError, ConnectionError)):
+        return FAIL_NETWORK
+    if isinstance(exc, PlaywrightError):
+        classe = classify_message(str(exc))
+        return FAIL_NETWORK if classe == FAIL_ERROR else classe
+    return classify_message(str(exc))
+
+
+def classify_response(status=None, blocked=False, success=True, error=None):
+    """Classifica a resposta de uma renderização; retorna None se ela foi bem-sucedida."""
+    if status in NOT_FOUND_STATUSES:
+        return FAIL_NOT_FOUND
+    if blocked or status in BLOCK_STATUSES:
+        return FAIL_BLOCKED
+    if not success:
+        classe = classify_message(error)
+        return FAIL_NETWORK if classe == FAIL_ERROR else classe
+    if status is not None and status >= 500:
+        return FAIL_NETWORK
+    return None
+
+
+class RetryPolicy:
+    """
+    Decide se e quando uma URL deve ser tentada de novo conforme a classe da
+    falha: erros de rede e timeouts são retentados com backoff curto,
+    bloqueios esperam mais, páginas sem dados têm uma segunda chance e 404
+    ou erros inesperados não são retentados. As falhas são contabilizadas
+    por classe em `stats`, e a última classe de cada URL fica em
+    `last_failure` para ser gravada na fila de trabalho.
+    """
+
+    def __init__(self, rules=None, max_attempts=None):
+        self.rules = dict(DEFAULT_RULES)
+        self.rules.update(rules or {})
+        self.max_attempts = max_attempts
+        self.stats = {}
+        self.last_failure = {}
+
+    def should_retry(self, classe, attempt):
+        limite = self.rules[classe].attempts
+        if self.max_attempts:
+            limite = min(limite, self.max_attempts)
+        return attempt < limite
+
+    def delay(self, classe, attempt):
+        return self.rules[classe].delay(attempt)
+
+    def record(self, url, classe, gave_up):
+        stats = self.stats.setdefault(classe, {'falhas': 0, 'esgotadas': 0})
+        stats['falhas'] += 1
+        if gave_up:
+            stats['esgotadas'] += 1
+            self.last_failure[url] = classe
+
+    async def next_attempt(self, url, classe, attempt):
+        """Registra a falha e aguarda o backoff; retorna False se a URL deve ser abandonada."""
+        gave_up = not self.should_retry(classe, attempt)
+        self.record(url, classe, gave_up)
+        if gave_up:
+            print(f'Desistindo de {url} após {attempt} tentativa(s) ({classe})')
+            return False
+        atraso = self.delay(classe, attempt)
+        print(f'Falha ({classe}) em {url}, nova tentativa em {atraso:.1f}s')
+        await asyncio.sleep(atraso)
+        return True
+
+    def summary(self):
+        return ', '.join(
+            f"{classe}: {s['falhas']} falhas ({s['esgotadas']} sem retentativa restante)"
+            for classe, s in sorted(self.stats.items())
+        )
@@ -1,472 +1,1062 @@
 import asyncio
-import re
+import contextlib
+import functools
 import json
-from datetime import datetime
-import aiohttp
-from crawl4ai import AsyncWebCrawler
+from dataclasses import dataclass
+from crawl4ai import AsyncWebCrawler, CacheMode, CrawlerRunConfig
 import os
-from playwright.async_api import Error as PlaywrightError
+import socket
+import time
+from api_client import ApiClient
+from batch_sink import BatchSink
+from browser_watchdog import (
+    MAX_BROWSER_RSS_MB,
+    MAX_PAGES_PER_BROWSER,
+    BrowserWatchdog,
+)
+from extractors import (
+    AmazonExtractor,
+    BelezaExtractor,
+    MeliExtractor,
+    extract_for_url,
+    extract_structured_for_url,
+    get_extractor,
+)
+from extraction_pool import DEFAULT_EXTRACTION_WORKERS, ExtractionPool
+from fingerprint import FINGERPRINTS_FILE, UNCHANGED, FingerprintCache
+from fetcher import (
+    TIER_BROWSER,
+    TIER_HTTP,
+    VALIDATORS_FILE,
+    ConditionalCache,
+    FetchTierStats,
+    HttpFetcher,
+    render_raw_html,
+)
+from metrics import (
+    PROMETHEUS_FILE,
+    RUN_REPORT_FILE,
+    STAGE_API_POST,
+    STAGE_API_PUT,
+    STAGE_CONVERT,
+    STAGE_EXTRACT,
+    STAGE_FETCH_HTTP,
+    STAGE_MARKDOWN,
+    STAGE_QUEUE_WAIT,
+    STAGE_RENDER,
+    STAGE_URL,
+    RunMetrics,
+)
+from page_archive import ARCHIVE_FILE, PageArchive, ReplayCrawler
+from pipeline import Pipeline
+from politeness import PolitenessScheduler, is_block_html, is_block_page
+from price_history import PRICE_HISTORY_DB, PriceHistory
+from recrawl import MAX_RECRAWL_INTERVAL, MIN_RECRAWL_INTERVAL, VolatilityTracker
+from resource_blocking import ResourceBlocker
+from retry_policy import (
+    FAIL_PARSE,
+    PERMANENT_FAILURES,
+    RetryPolicy,
+    classify_exception,
+    classify_response,
+)
+from sharding import filter_shard, shard_path
+from tab_pool import MAX_USES_PER_TAB, TabPool
+from work_queue import (
+    LANE_PARKED,
+    LANE_RETRY,
+    WORK_QUEUE_DB,
+    WorkQueue,
+    run_workers,
+)
 
 
 def extract_data_from_markdown_amazon(markdown):
     """Extrai SKU, descrição, loja, preço, review, imagem e outros dados do Markdown (Amazon)."""
-    lojas = []
-
-    # Extrai SKU (ASIN) da URL no Markdown
-    sku_pattern = r'https://www\.amazon\.com\.br/.*/dp/([A-Z0-9]{10})'
-    sku_match = re.search(sku_pattern, markdown)
-    sku = sku_match.group(1) if sku_match else None
-    if not sku:
-        print('SKU não encontrado no Markdown (Amazon)')
-        return []
+    return AmazonExtractor().extract(markdown)
 
-    # Extrai descrição (nome do produto)
-    desc_pattern = r'Este item:?\s*([^\n]+?)\s*(?=R\$|\n)'
-    desc_match = re.search(desc_pattern, markdown, re.MULTILINE)
-    descricao = desc_match.group(1).strip() if desc_match else None
-    # Fallback: usa o título da imagem
-    if not descricao or 'devolvido' in descricao.lower():
-        img_desc_pattern = (
-            r'!\[([^\]]+?)\]\(https://images-na\.ssl-images-amazon\.com'
-        )
-        img_desc_match = re.search(img_desc_pattern, markdown)
-        descricao = (
-            img_desc_match.group(1).strip()
-            if img_desc_match
-            else 'Descrição não encontrada'
-        )
-    print(f'Descrição capturada (Amazon): {descricao!r}')
 
-    # Extrai loja (quem envia)
-    loja_pattern = (
-        r'Enviado de e vendido por\s*(Amazon\.com\.br|[^\n.]+?)(?:\.|\n|$)'
-    )
-    loja_match = re.search(loja_pattern, markdown)
-    nome_loja = loja_match.group(1).strip() if loja_match else 'Amazon.com.br'
-
-    # Extrai preço (prioriza priceAmount do JSON)
-    preco_final = 0.0
-    json_preco_pattern = r'"priceAmount":([\d.]+)'
-    json_preco_match = re.search(json_preco_pattern, markdown)
-    if json_preco_match:
-        try:
-            preco_final = float(json_preco_match.group(1))
-        except ValueError:
-            print(
-                f'Erro ao converter preço do JSON (Amazon): {json_preco_match.group(1)}'
-            )
-    else:
-        # Fallback: usa a regex original
-        preco_pattern = r'R\$([\d,.]+?)(?=\s*\(R\$\s*[\d,.]+/Mililitros\)|$)'
-        preco_match = re.search(preco_pattern, markdown)
-        if preco_match:
-            preco_final_str = (
-                preco_match.group(1).replace('.', '').replace(',', '.')
-            )
-            try:
-                preco_final = float(preco_final_str)
-            except ValueError:
-                print(f'Erro ao converter preço (Amazon): {preco_final_str}')
-
-    # Extrai review (fallback)
-    review_pattern = r'(\d+\.\d+)\s*(?:de\s*5\s*estrelas|out\s*of\s*5\s*stars)'
-    review_match = re.search(review_pattern, markdown)
-    review = float(review_match.group(1)) if review_match else 4.5
-
-    # Extrai imagem
-    img_pattern = r'!\[.*?\]\((https://images-na\.ssl-images-amazon\.com/images/I/.*?\.jpg)\)'
-    img_match = re.search(img_pattern, markdown)
-    imagem = img_match.group(1) if img_match else 'Imagem não encontrada'
-
-    # Monta o dicionário da loja
-    key_loja = nome_loja.lower().replace(' ', '_').replace('.', '')
-    loja = {
-        'sku': sku,
-        'loja': nome_loja,
-        'preco_final': preco_final,
-        'data_hora': datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ'),
-        'marketplace': 'Amazon',
-        'change_price': 0,
-        'key_loja': key_loja,
-        'key_sku': f'{key_loja}_{sku}',
-        'descricao': descricao,
-        'review': review,
-        'imagem': imagem,
-        'status': 'ativo',
-    }
-    lojas.append(loja)
+def extract_data_from_markdown_beleza(markdown):
+    """Extrai SKU, descrição, review, imagem e dados de lojas do Markdown (Beleza na Web)."""
+    return BelezaExtractor().extract(markdown)
 
-    return lojas
 
+def extract_data_from_markdown_meli(markdown):
+    """Extrai SKU, descrição, loja, preço, review, imagem e outros dados do Markdown (Mercado Livre)."""
+    return MeliExtractor().extract(markdown)
 
-def extract_data_from_markdown_beleza(markdown):
-    """Extrai SKU, descrição, review, imagem e dados de lojas do Markdown (Beleza na Web)."""
-    lojas = []
-
-    # Extrai SKU
-    sku_pattern = r'\*\*Cod:\*\* (MP\d+|\d+)'
-    sku_match = re.search(sku_pattern, markdown)
-    sku = sku_match.group(1) if sku_match else None
-    if not sku:
-        print('SKU não encontrado no Markdown (Beleza na Web)')
-        return []
 
-    # Extrai descrição
-    desc_pattern = r'\[Voltar para a página do produto\]\(https://www\.belezanaweb\.com\.br/(.+?)\)'
-    desc_match = re.search(desc_pattern, markdown)
-    if desc_match:
-        url_text = desc_match.group(1)
-        descricao = ' '.join(word.capitalize() for word in url_text.split('-'))
-        descricao = descricao.replace('Condicionador ', 'Condicionador - ')
-    else:
-        descricao = 'Descrição não encontrada'
-    print(f'Descrição capturada (Beleza na Web): {descricao!r}')
-
-    # Extrai review
-    review_pattern = r'Review[:\s]*(\d+[\.,]\d+|\d+)'
-    review_match = re.search(review_pattern, markdown)
-    review = (
-        float(review_match.group(1).replace(',', '.')) if review_match else 4.5
-    )
+def identificar_marketplace(url):
+    """Retorna o nome do marketplace de uma URL ou None se não reconhecido."""
+    extractor = get_extractor(url)
+    return extractor.marketplace if extractor else None
+
+
+def extrair_lojas(url, markdown_content):
+    """Aplica o extrator registrado para o domínio da URL; retorna None se a URL não for reconhecida."""
+    return extract_for_url(url, markdown_content)
+
 
-    # Extrai imagem
-    img_pattern_with_desc = r'!\[.*?\]\((https://res\.cloudinary\.com/beleza-na-web/image/upload/.*?/v1/imagens/product/.*?/.*?\.(?:png|jpg))\)'
-    img_match_with_desc = re.search(img_pattern_with_desc, markdown)
-    imagem = (
-        img_match_with_desc.group(1)
-        if img_match_with_desc
-        else 'Imagem não encontrada'
+async def extrair_lojas_no_pool(url, markdown_content, extraction_pool=None):
+    """Como extrair_lojas, mas num processo do ExtractionPool quando informado."""
+    if extraction_pool is None:
+        return extrair_lojas(url, markdown_content)
+    # O Markdown do Crawl4AI é uma subclasse de str; o filho só precisa do texto
+    texto = str(markdown_content or '')
+    return await extraction_pool.run(extract_for_url, url, texto, size=len(texto))
+
+
+async def extrair_dados_estruturados(url, html, extraction_pool=None):
+    """Lê as lojas do JSON-LD e do estado embutido no HTML; None se a página não os tiver."""
+    # Sem leitura estruturada no extrator, o HTML nem vai para o pool
+    extractor = get_extractor(url)
+    if extractor is None or not extractor.has_structured():
+        return None
+    if extraction_pool is None:
+        return extract_structured_for_url(url, html)
+    return await extraction_pool.run(
+        extract_structured_for_url, url, html, size=len(html)
     )
-    if imagem == 'Imagem não encontrada':
-        img_pattern_empty = r'!\[\]\((https?://[^\s)]+)\)'
-        img_matches_empty = re.findall(img_pattern_empty, markdown)
-        imagem = (
-            img_matches_empty[0]
-            if img_matches_empty
-            else 'Imagem não encontrada'
-        )
 
-    # Extrai lojas e preços
-    loja_pattern = r'Vendido por \*\*(.*?)\*\* Entregue por Beleza na Web'
-    preco_com_desconto_pattern = r'-[\d]+%.*?\nR\$ ([\d,\.]+)'
-    preco_venda_pattern = r'(?<!De )R\$ ([\d,\.]+)(?!\s*3x)'
-    blocos = re.split(
-        r'(?=Vendido por \*\*.*?\*\* Entregue por Beleza na Web)', markdown
+
+def lojas_completas(lojas):
+    """Indica se os dados extraídos estão completos o bastante para dispensar o navegador."""
+    return bool(lojas) and all(
+        loja['preco_final'] > 0
+        and loja['descricao'] != 'Descrição não encontrada'
+        for loja in lojas
     )
-    for bloco in blocos:
-        if 'Vendido por' not in bloco:
-            continue
-        loja_match = re.search(loja_pattern, bloco)
-        preco_com_desconto_match = re.search(preco_com_desconto_pattern, bloco)
-        preco_venda_match = re.search(preco_venda_pattern, bloco)
-        nome_loja = loja_match.group(1) if loja_match else 'Beleza na Web'
-        if preco_com_desconto_match:
-            preco_final_str = preco_com_desconto_match.group(1)
-            preco_final_str = preco_final_str.replace('.', '').replace(
-                ',', '.'
-            )
-            preco_final = float(preco_final_str)
-        elif preco_venda_match:
-            preco_final_str = preco_venda_match.group(1)
-            preco_final_str = preco_final_str.replace('.', '').replace(
-                ',', '.'
-            )
-            preco_final = float(preco_final_str)
-        else:
-            preco_final = 0.0
-        key_loja = nome_loja.lower().replace(' ', '')
-        loja = {
-            'sku': sku,
-            'loja': nome_loja,
-            'preco_final': preco_final,
-            'data_hora': datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ'),
-            'marketplace': 'Beleza na Web',
-            'change_price': 0,
-            'key_loja': key_loja,
-            'key_sku': f'{key_loja}_{sku}',
-            'descricao': descricao,
-            'review': review,
-            'imagem': imagem,
-            'status': 'ativo',
-        }
-        lojas.append(loja)
-
-    return lojas
 
 
-def extract_data_from_markdown_meli(markdown):
-    """Extrai SKU, descrição, loja, preço, review, imagem e outros dados do Markdown (Mercado Livre)."""
-    lojas = []
-
-    # Extrai SKU (catalog_product_id) da URL ou Melidata
-    sku_pattern = r'/p/([A-Z0-9]+)'
-    sku_match = re.search(sku_pattern, markdown)
-    sku = sku_match.group(1) if sku_match else None
-    if not sku:
-        print('SKU não encontrado no Markdown (Mercado Livre)')
-        return []
+@dataclass
+class ContextoExecucao:
+    """Recursos compartilhados pelas URLs de uma execução de process_urls."""
 
-    # Extrai descrição (nome do produto)
-    desc_pattern = r'# \[([^\]]+?)\]\(https://www\.mercadolivre\.com\.br/.*?\)'
-    desc_match = re.search(desc_pattern, markdown)
-    descricao = desc_match.group(1).strip() if desc_match else None
-    if not descricao:
-        # Fallback: usa o título da imagem ou texto visível
-        img_desc_pattern = r'!\[([^\]]+?)\]\(https://http2\.mlstatic\.com'
-        img_desc_match = re.search(img_desc_pattern, markdown)
-        descricao = (
-            img_desc_match.group(1).strip()
-            if img_desc_match
-            else 'Descrição não encontrada'
-        )
-    print(f'Descrição capturada (Mercado Livre): {descricao!r}')
+    scheduler: PolitenessScheduler = None
+    client: ApiClient = None
+    sink: BatchSink = None
+    http_fetcher: HttpFetcher = None
+    tier_stats: FetchTierStats = None
+    history: PriceHistory = None
+    fingerprints: FingerprintCache = None
+    validators: ConditionalCache = None
+    tab_pool: TabPool = None
+    retry_policy: RetryPolicy = None
+    volatility: VolatilityTracker = None
+    metrics: RunMetrics = None
+    archive: PageArchive = None
+    extraction_pool: ExtractionPool = None
+    dados_estruturados: bool = False
+    modo_delta: bool = False
+    simular_envio: bool = False
+    sem_alteracao: int = 0
 
-    # Extrai review (avaliações)
-    review_pattern = r'(\d+\.\d+)\s*(?:de\s*5\s*estrelas|out\s*of\s*5)'
-    review_match = re.search(review_pattern, markdown)
-    review = float(review_match.group(1)) if review_match else 4.5
 
-    # Extrai imagem
-    img_pattern = (
-        r'!\[.*?\]\((https://http2\.mlstatic\.com/D_NQ_NP_.*?\.jpg)\)'
-    )
-    img_match = re.search(img_pattern, markdown)
-    imagem = img_match.group(1) if img_match else 'Imagem não encontrada'
+async def crawl_url_http(crawler, url, contexto):
+    """Tenta extrair os dados de uma URL com um GET simples, sem renderizar a página.
 
-    # Tenta extrair dados do Melidata (JSON embutido no script)
-    melidata_pattern = r'melidata\("add",\s*"event_data",\s*(\{.*?\})\);'
-    melidata_match = re.search(melidata_pattern, markdown, re.DOTALL)
-    if melidata_match:
-        try:
-            melidata_data = json.loads(melidata_match.group(1))
-            items = melidata_data.get('items', [])
-            for item in items:
-                nome_loja = item.get('seller_name', 'Mercado Livre')
-                preco_final = float(item.get('price', 0.0))
-                item_id = item.get(
-                    'item_id', sku
-                )  # Usa item_id como SKU específico do vendedor
-                key_loja = nome_loja.lower().replace(' ', '_').replace('.', '')
-                loja = {
-                    'sku': sku,
-                    'loja': nome_loja,
-                    'preco_final': preco_final,
-                    'data_hora': datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ'),
-                    'marketplace': 'Mercado Livre',
-                    'change_price': 0,
-                    'key_loja': key_loja,
-                    'key_sku': f'{key_loja}_{item_id}',
-                    'descricao': descricao,
-                    'review': review,
-                    'imagem': imagem,
-                    'status': 'ativo',
-                }
-                lojas.append(loja)
-        except json.JSONDecodeError as e:
-            print(f'Erro ao parsear Melidata JSON: {e}')
-
-    # Fallback: extrai dados do HTML/Markdown se Melidata não estiver disponível
-    if not lojas:
-        loja_pattern = r'Vendido por\s*\*\*([^\*]+)\*\*'
-        preco_pattern = r'R\$ ([\d,.]+)'
-        blocos = re.split(r'(?=Vendido por\s*\*\*.*?\*\*)', markdown)
-        for bloco in blocos:
-            if 'Vendido por' not in bloco:
-                continue
-            loja_match = re.search(loja_pattern, bloco)
-            preco_match = re.search(preco_pattern, bloco)
-            nome_loja = (
-                loja_match.group(1).strip() if loja_match else 'Mercado Livre'
+    Retorna [] quando é preciso usar o navegador e UNCHANGED quando a página
+    não mudou desde a última execução (fingerprint ou resposta 304).
+    """
+    scheduler = contexto.scheduler
+    fingerprints = contexto.fingerprints
+    validators = contexto.validators
+    metrics = contexto.metrics or RunMetrics()
+    marketplace = identificar_marketplace(url)
+    try:
+        if scheduler:
+            await scheduler.acquire(url)
+        headers = validators.headers_for(url) if validators else None
+        with metrics.timer(STAGE_FETCH_HTTP, marketplace):
+            status, html, response_headers = await contexto.http_fetcher.fetch(
+                url, headers=headers
             )
-            preco_final = 0.0
-            if preco_match:
-                preco_final_str = (
-                    preco_match.group(1).replace('.', '').replace(',', '.')
+        bloqueada = status == 200 and is_block_html(html)
+        if scheduler:
+            scheduler.report_http(url, status=status, blocked=bloqueada)
+        if status == 304 and validators:
+            validators.not_modified += 1
+            return UNCHANGED
+        if status != 200 or bloqueada:
+            print(f'Fetch HTTP sem sucesso para {url} (Status: {status})')
+            return []
+        if fingerprints and fingerprints.check(url, html, TIER_HTTP):
+            return UNCHANGED
+        lojas = None
+        markdown_content = ''
+        if contexto.dados_estruturados:
+            with metrics.timer(STAGE_EXTRACT, marketplace):
+                lojas = await extrair_dados_estruturados(
+                    url, html, contexto.extraction_pool
                 )
-                try:
-                    preco_final = float(preco_final_str)
-                except ValueError:
-                    print(
-                        f'Erro ao converter preço (Mercado Livre): {preco_final_str}'
-                    )
-            key_loja = nome_loja.lower().replace(' ', '_').replace('.', '')
-            loja = {
-                'sku': sku,
-                'loja': nome_loja,
-                'preco_final': preco_final,
-                'data_hora': datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ'),
-                'marketplace': 'Mercado Livre',
-                'change_price': 0,
-                'key_loja': key_loja,
-                'key_sku': f'{key_loja}_{sku}',
-                'descricao': descricao,
-                'review': review,
-                'imagem': imagem,
-                'status': 'ativo',
-            }
-            lojas.append(loja)
-
-    if not lojas:
-        print('Nenhum vendedor encontrado no Markdown (Mercado Livre)')
-
-    return lojas
-
-
-async def crawl_url(crawler, url, max_retries=3):
-    """Extrai dados de uma URL usando Crawl4AI com re-tentativas."""
-    for attempt in range(max_retries):
-        try:
-            print(
-                f'Extraindo dados da URL: {url} (Tentativa {attempt + 1}/{max_retries})'
+        if lojas_completas(lojas):
+            metrics.count('extracao_estruturada', marketplace)
+        else:
+            with metrics.timer(STAGE_CONVERT, marketplace):
+                markdown_content = await render_raw_html(crawler, html)
+            metrics.observe(STAGE_MARKDOWN, marketplace, len(markdown_content))
+            with metrics.timer(STAGE_EXTRACT, marketplace):
+                lojas = await extrair_lojas_no_pool(
+                    url, markdown_content, contexto.extraction_pool
+                )
+        if contexto.archive is not None:
+            contexto.archive.append(
+                url, markdown_content, html=html, status=status, tier=TIER_HTTP
             )
-            result = await crawler.arun(
-                url=url,
-                timeout=180,
-                js_enabled=True,
-                bypass_cache=True,
-                headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                },
+        if lojas_completas(lojas):
+            # Validadores só valem quando a camada HTTP produziu os dados
+            if validators:
+                validators.update(url, response_headers)
+            return lojas
+        print(f'Dados incompletos via HTTP para {url}')
+    except Exception as e:
+        print(f'Erro no fetch HTTP de {url}: {e}')
+    return []
+
+
+# Tempo máximo (ms) de carregamento de uma página no navegador
+RENDER_TIMEOUT_MS = 180 * 1000
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+@functools.lru_cache(maxsize=256)
+def render_config(session_id=None):
+    """
+    Config do `arun` de uma página. O Crawl4AI 0.5 ignora os argumentos
+    avulsos do `arun` (session_id, bypass_cache...): sem a config, a aba do
+    TabPool não seria reaproveitada e o cache não seria ignorado. Montar
+    uma CrawlerRunConfig custa dezenas de ms, então cada sessão tem a sua.
+    """
+    return CrawlerRunConfig(
+        session_id=session_id,
+        cache_mode=CacheMode.BYPASS,
+        page_timeout=RENDER_TIMEOUT_MS,
+        user_agent=USER_AGENT,
+    )
+
+
+async def crawl_url(crawler, url, contexto=None, max_retries=3, limite=None):
+    """Extrai dados de uma URL usando Crawl4AI com re-tentativas.
+
+    Usa os recursos definidos em `contexto` (ContextoExecucao) e retorna
+    UNCHANGED quando o conteúdo não mudou desde a última execução. Cada
+    tentativa ocupa uma vaga de `limite(url)` só durante o fetch e a
+    extração; a espera pela vez do host e o backoff entre tentativas
+    acontecem fora dela.
+    """
+    marketplace = identificar_marketplace(url)
+    if marketplace is None:
+        print(f'URL não reconhecida: {url}')
+        return []
+    contexto = contexto or ContextoExecucao()
+    scheduler = contexto.scheduler
+    fingerprints = contexto.fingerprints
+    tab_pool = contexto.tab_pool
+    tier_stats = contexto.tier_stats
+    metrics = contexto.metrics or RunMetrics()
+
+    @contextlib.asynccontextmanager
+    async def vaga():
+        inicio = time.perf_counter()
+        async with limite(url) if limite else contextlib.nullcontext():
+            metrics.observe(
+                STAGE_QUEUE_WAIT, marketplace, time.perf_counter() - inicio
             )
-            markdown_content = result.markdown
-            print('Markdown gerado:')
-
-            if 'amazon' in url.lower():
-                lojas = extract_data_from_markdown_amazon(markdown_content)
-            elif 'belezanaweb' in url.lower():
-                lojas = extract_data_from_markdown_beleza(markdown_content)
-            elif 'mercadolivre' in url.lower():
-                lojas = extract_data_from_markdown_meli(markdown_content)
-            else:
-                print(f'URL não reconhecida: {url}')
-                return []
-
-            if not lojas:
-                print(f'Sem dados ou SKU não encontrado para {url}')
-                return []
+            yield
+
+    if contexto.http_fetcher is not None and (
+        scheduler is None or scheduler.http_allowed(url)
+    ):
+        async with vaga():
+            lojas = await crawl_url_http(crawler, url, contexto)
+        if lojas is UNCHANGED:
+            print(f'Conteúdo inalterado para {url}, extração dispensada')
+            return UNCHANGED
+        if lojas:
+            if tier_stats is not None:
+                tier_stats.record(marketplace, TIER_HTTP)
             return lojas
-        except PlaywrightError as e:
-            print(f'Erro do Playwright na tentativa {attempt + 1}: {e}')
-            if attempt < max_retries - 1:
-                print('Tentando novamente...')
-                await asyncio.sleep(2)
-            else:
+        print(f'Usando navegador para {url}')
+
+    retry_policy = contexto.retry_policy or RetryPolicy(
+        max_attempts=max_retries
+    )
+    attempt = 0
+    while True:
+        attempt += 1
+        print(f'Extraindo dados da URL: {url} (Tentativa {attempt})')
+        if scheduler:
+            await scheduler.acquire(url)
+        async with vaga():
+            try:
+                async with (
+                    tab_pool.borrow(url)
+                    if tab_pool
+                    else contextlib.nullcontext()
+                ) as session_id:
+                    with metrics.timer(STAGE_RENDER, marketplace):
+                        result = await crawler.arun(
+                            url=url, config=render_config(session_id)
+                        )
+                markdown_content = result.markdown
+                status = getattr(result, 'status_code', None)
+                bloqueada = is_block_page(markdown_content)
+                if scheduler:
+                    scheduler.report(url, status=status, blocked=bloqueada)
+                classe = classify_response(
+                    status,
+                    bloqueada,
+                    getattr(result, 'success', True),
+                    getattr(result, 'error_message', None),
+                )
+                if classe is None:
+                    metrics.observe(
+                        STAGE_MARKDOWN,
+                        marketplace,
+                        len(markdown_content or ''),
+                    )
+                    print('Markdown gerado:')
+                    if fingerprints and fingerprints.check(
+                        url, markdown_content, TIER_BROWSER
+                    ):
+                        print(
+                            f'Conteúdo inalterado para {url}, '
+                            'extração dispensada'
+                        )
+                        return UNCHANGED
+                    if contexto.archive is not None:
+                        contexto.archive.append(
+                            url,
+                            markdown_content,
+                            html=getattr(result, 'html', None),
+                            status=status,
+                            tier=TIER_BROWSER,
+                        )
+
+                    html = getattr(result, 'html', None)
+                    lojas = None
+                    with metrics.timer(STAGE_EXTRACT, marketplace):
+                        if contexto.dados_estruturados and html:
+                            lojas = await extrair_dados_estruturados(
+                                url, html, contexto.extraction_pool
+                            )
+                        if lojas_completas(lojas):
+                            metrics.count('extracao_estruturada', marketplace)
+                        else:
+                            lojas = await extrair_lojas_no_pool(
+                                url, markdown_content, contexto.extraction_pool
+                            )
+                    if lojas:
+                        if tier_stats is not None:
+                            tier_stats.record(marketplace, TIER_BROWSER)
+                        return lojas
+                    print(f'Sem dados ou SKU não encontrado para {url}')
+                    classe = FAIL_PARSE
+            except Exception as e:
                 print(
-                    f'Erro ao crawlear a URL {url} após {max_retries} tentativas: {e}'
+                    f'Erro ao crawlear a URL {url} na tentativa {attempt}: {e}'
                 )
-                return []
-        except Exception as e:
-            print(
-                f'Erro ao crawlear a URL {url} na tentativa {attempt + 1}: {e}'
-            )
+                classe = classify_exception(e)
+        metrics.count(f'falha_{classe}', marketplace)
+        if not await retry_policy.next_attempt(url, classe, attempt):
             return []
+        metrics.count('retentativas', marketplace)
 
 
-async def send_to_api(data):
-    """Envia os dados dos vendedores para a API (POST)."""
-    api_url = 'https://www.price.kamico.com.br/api/products'
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(api_url, json=data, headers={'Content-Type': 'application/json'}) as response:
-                print(f"Status da resposta (POST): {response.status}")
-                return response.status
-        except Exception as e:
-            print(f"Erro ao enviar dados para a API (POST): {e}")
-            return None
+async def send_to_api(data, client=None):
+    """Envia os dados dos vendedores para a API (POST).
 
+    Usa o ApiClient compartilhado da execução quando informado.
+    """
+    api_url = 'https://www.price.kamico.com.br/api/products'
+    if client is None:
+        async with ApiClient() as client:
+            return await send_to_api(data, client)
+    try:
+        status, _ = await client.post(api_url, json_data=data)
+        print(f"Status da resposta (POST): {status}")
+        return status
+    except Exception as e:
+        print(f"Erro ao enviar dados para a API (POST): {e}")
+        return None
 
-async def update_to_api(data):
-    """Atualiza os dados dos vendedores na API (PUT)."""
-    api_url = 'http://34.233.35.91:8000/api/products'
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.put(
-                api_url,
-                json=data,
-                headers={'Content-Type': 'application/json'},
-            ) as response:
-                print(f'Status da resposta (PUT): {response.status}')
-                return response.status
-        except Exception as e:
-            print(f'Erro ao enviar dados para a API (PUT): {e}')
-            return None
 
+async def update_to_api(data, client=None):
+    """Atualiza os dados dos vendedores na API (PUT).
 
-def save_sem_dados_urls(sem_dados):
-    """Salva URLs sem dados em um arquivo JSON."""
+    Usa o ApiClient compartilhado da execução quando informado.
+    """
+    api_url = 'http://34.233.35.91:8000/api/products'
+    if client is None:
+        async with ApiClient() as client:
+            return await update_to_api(data, client)
     try:
-        with open('sem_dados_urls.json', 'w', encoding='utf-8') as f:
-            json.dump(sem_dados, f, ensure_ascii=False, indent=2)
+        status, _ = await client.put(api_url, json_data=data)
+        print(f'Status da resposta (PUT): {status}')
+        return status
     except Exception as e:
-        print(f'Erro ao salvar sem_dados_urls.json: {e}')
+        print(f'Erro ao enviar dados para a API (PUT): {e}')
+        return None
+
 
+# Arquivo legado com as URLs que falharam; hoje só é lido para migrar as
+# falhas para a fila de trabalho (work_queue) na primeira execução
+SEM_DADOS_FILE = 'sem_dados_urls.json'
 
-def carregar_sem_dados_url():
+
+def carregar_sem_dados_url(path=SEM_DADOS_FILE):
     """Carrega URLs que falharam em execuções anteriores de um arquivo JSON."""
     try:
-        if os.path.exists('sem_dados_urls.json'):
-            with open('sem_dados_urls.json', 'r', encoding='utf-8') as f:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         return []
     except Exception as e:
-        print(f'Erro ao carregar sem_dados_urls.json: {e}')
+        print(f'Erro ao carregar {path}: {e}')
         return []
 
 
-async def process_urls(urls):
-    """Processa URLs de Amazon, Beleza na Web e Mercado Livre e envia os itens para a API."""
+# Limites padrão de páginas simultâneas (global e por marketplace)
+MAX_CONCORRENCIA = int(os.getenv('MAX_CONCORRENCIA', '6'))
+LIMITES_MARKETPLACE = {
+    'Amazon': 2,
+    'Beleza na Web': 3,
+    'Mercado Livre': 2,
+}
+
+
+# Tamanho máximo (registros) e espera máxima (s) de um lote enviado à API;
+# LOTE_MAX_REGISTROS=0 desativa o envio em lote
+LOTE_MAX_REGISTROS = int(os.getenv('LOTE_MAX_REGISTROS', '100'))
+LOTE_MAX_ESPERA = float(os.getenv('LOTE_MAX_ESPERA', '5'))
+
+# Estágio de envio do pipeline: workers e capacidade da fila entre a coleta
+# e o envio (WORKERS_ENVIO=0 coleta e envia cada URL no mesmo worker). Com
+# envio em lote, os workers só entregam as URLs ao lote, sem esperar o envio
+WORKERS_ENVIO = int(os.getenv('WORKERS_ENVIO', '8'))
+FILA_ENVIO = int(os.getenv('FILA_ENVIO', '16'))
+
+# Processos que extraem os dados do Markdown fora do event loop
+# (0 extrai no próprio loop)
+PROCESSOS_EXTRACAO = int(
+    os.getenv('PROCESSOS_EXTRACAO', str(DEFAULT_EXTRACTION_WORKERS))
+)
+
+# Tenta um GET simples antes de renderizar a página no navegador
+FETCH_HTTP_PRIMEIRO = os.getenv('FETCH_HTTP_PRIMEIRO', '1') == '1'
+
+# Lê os preços do JSON-LD e do estado embutido no HTML antes de recorrer ao
+# Markdown (no fetch HTTP, o Markdown nem chega a ser gerado)
+DADOS_ESTRUTURADOS = os.getenv('DADOS_ESTRUTURADOS', '1') == '1'
+
+# Histórico local de preços e envio apenas dos registros alterados
+HISTORICO_PRECOS_DB = os.getenv('HISTORICO_PRECOS_DB', PRICE_HISTORY_DB)
+MODO_DELTA = os.getenv('MODO_DELTA', '0') == '1'
+
+# Cache de conteúdo por URL para pular páginas inalteradas ('' desativa)
+FINGERPRINTS_PATH = os.getenv('FINGERPRINTS_PATH', FINGERPRINTS_FILE)
+
+# Validadores ETag/Last-Modified para GETs condicionais ('' desativa)
+VALIDATORS_PATH = os.getenv('VALIDATORS_PATH', VALIDATORS_FILE)
+
+# Bloqueia imagens, fontes, CSS e rastreadores nas páginas renderizadas
+BLOQUEIO_RECURSOS = os.getenv('BLOQUEIO_RECURSOS', '1') == '1'
 
-    sem_dado = carregar_sem_dados_url()
-    combined_urls = list(dict.fromkeys(sem_dado + urls))
-    total_urls = len(combined_urls)
+# Reaproveita abas abertas por marketplace (0 desativa o pool)
+USOS_POR_ABA = int(os.getenv('USOS_POR_ABA', str(MAX_USES_PER_TAB)))
+
+# Limites para reiniciar o navegador (0 desativa cada limite)
+MAX_RSS_NAVEGADOR_MB = int(
+    os.getenv('MAX_RSS_NAVEGADOR_MB', str(MAX_BROWSER_RSS_MB))
+)
+MAX_PAGINAS_NAVEGADOR = int(
+    os.getenv('MAX_PAGINAS_NAVEGADOR', str(MAX_PAGES_PER_BROWSER))
+)
+
+# Fila de trabalho persistente e workers dedicados à raia de retry
+FILA_DB = os.getenv('FILA_DB', WORK_QUEUE_DB)
+WORKERS_RETRY = int(os.getenv('WORKERS_RETRY', '1'))
+
+# Tempo máximo (s) de uma execução; perto do prazo nenhuma URL nova é
+# iniciada e as que estiverem em andamento voltam para a fila (0 = sem prazo)
+PRAZO_EXECUCAO = int(os.getenv('PRAZO_EXECUCAO', '0'))
+
+# Arquivo das páginas renderizadas (vazio desativa a captura) e modo replay,
+# que reprocessa as páginas do arquivo sem navegador. O replay não grava o
+# histórico de preços e só envia para a API com ENVIAR_REPLAY=1
+ARQUIVO_PAGINAS = os.getenv('ARQUIVO_PAGINAS', '')
+REPLAY = os.getenv('REPLAY', '0') == '1'
+ENVIAR_REPLAY = os.getenv('ENVIAR_REPLAY', '0') == '1'
+
+# Relatório da execução (JSON) e métricas para o Prometheus
+RELATORIO_EXECUCAO = os.getenv('RELATORIO_EXECUCAO', RUN_REPORT_FILE)
+METRICAS_PROMETHEUS = os.getenv('METRICAS_PROMETHEUS', PROMETHEUS_FILE)
+
+# Limites (s) do intervalo de recrawl adaptativo de cada URL;
+# RECRAWL_ADAPTATIVO=0 volta a processar todas as URLs em toda execução
+RECRAWL_ADAPTATIVO = os.getenv('RECRAWL_ADAPTATIVO', '1') == '1'
+INTERVALO_MIN_RECRAWL = int(
+    os.getenv('INTERVALO_MIN_RECRAWL', str(MIN_RECRAWL_INTERVAL))
+)
+INTERVALO_MAX_RECRAWL = int(
+    os.getenv('INTERVALO_MAX_RECRAWL', str(MAX_RECRAWL_INTERVAL))
+)
+
+
+async def enviar_registros(
+    registros, client=None, origem='lote', metrics=None, simular=False
+):
+    """Envia registros via POST (ou PUT se já existirem) e retorna True em caso de sucesso.
+
+    A latência de cada chamada é registrada em `metrics`, por marketplace
+    (ou 'Misto' quando o lote tem registros de mais de um). Com `simular`,
+    nada é enviado e os registros contam como entregues.
+    """
+    if simular:
+        print(f'Simulação: {len(registros)} registros de {origem} não enviados')
+        return True
+    metrics = metrics or RunMetrics()
+    marketplaces = {registro.get('marketplace') for registro in registros}
+    marketplace = marketplaces.pop() if len(marketplaces) == 1 else 'Misto'
+    with metrics.timer(STAGE_API_POST, marketplace):
+        post_status = await send_to_api(registros, client)
+    if post_status in (200, 201):
+        print(f'Dados salvos com sucesso para {origem}, POST concluído.')
+        return True
+    if post_status == 400:
+        with metrics.timer(STAGE_API_PUT, marketplace):
+            put_status = await update_to_api(registros, client)
+        if put_status != 202:
+            print(
+                f'Falha ao atualizar dados de {origem} (Status: {put_status})'
+            )
+            return False
+        print(f'Dados atualizados com sucesso para {origem}, PUT concluído.')
+        return True
+    print(f'Falha ao salvar dados de {origem} (Status: {post_status})')
+    return False
+
+
+async def coletar_url(crawler, url, contexto=None, limite=None):
+    """Crawleia uma URL e retorna os itens extraídos, [] ou UNCHANGED.
+
+    `limite(url)` produz o gerenciador de contexto assíncrono da vaga de
+    página, ocupada por cada tentativa de crawl e nunca pela espera do envio
+    nem pelo backoff. Com `contexto.metrics`, registra a espera pela vaga.
+    """
+    return await crawl_url(crawler, url, contexto, limite=limite)
+
+
+async def enviar_resultado(url, result, contexto=None, aguardar=True):
+    """Envia para a API os itens coletados de uma URL e retorna (sucesso, classe_do_erro).
+
+    Com `contexto.sink` (BatchSink), os itens são enviados junto com os de
+    outras URLs; com `aguardar=False`, retorna um future com a tupla em vez
+    de esperar o lote ser enviado. Com `contexto.history`, change_price é
+    calculado contra a última observação e, em modo delta, só os registros
+    alterados são enviados. Com `contexto.volatility`, cada extração bem-sucedida alimenta
+    as estatísticas de volatilidade que definem o próximo recrawl da URL.
+    """
+    contexto = contexto or ContextoExecucao()
+    metrics = contexto.metrics or RunMetrics()
+    if result is UNCHANGED:
+        if contexto.volatility is not None:
+            contexto.volatility.observe(url, changed=False)
+        return True, None
+    print(f'Dados extraídos de {url}:')
+    print(result)
+    if not result:
+        print(f'Sem dados para {url}, reagendando na fila de retry')
+        erro = FAIL_PARSE
+        if contexto.retry_policy is not None:
+            erro = contexto.retry_policy.last_failure.pop(url, erro)
+        return False, erro
+
+    registros = result
+    # Sem histórico de preços, qualquer extração conta como alteração
+    alterados = result
+    if contexto.history is not None:
+        alterados = contexto.history.annotate(result)
+        if contexto.modo_delta:
+            if not alterados:
+                print(f'Sem alterações para {url}, envio dispensado')
+                contexto.sem_alteracao += 1
+                if contexto.volatility is not None:
+                    contexto.volatility.observe(url, changed=False)
+                return True, None
+            registros = alterados
+
+    if contexto.sink is None:
+        sucesso = await enviar_registros(
+            registros, contexto.client, url, metrics, contexto.simular_envio
+        )
+        return concluir_envio(url, result, alterados, sucesso, contexto)
+
+    envio = await contexto.sink.add(url, registros)
+    if aguardar:
+        return concluir_envio(url, result, alterados, await envio, contexto)
+    resultado = asyncio.get_running_loop().create_future()
+
+    def concluir(envio):
+        if resultado.done():
+            return
+        if envio.cancelled():
+            resultado.cancel()
+            return
+        try:
+            resultado.set_result(
+                concluir_envio(url, result, alterados, envio.result(), contexto)
+            )
+        except Exception as e:
+            resultado.set_exception(e)
+
+    envio.add_done_callback(concluir)
+    return resultado
+
+
+def concluir_envio(url, result, alterados, sucesso, contexto):
+    """Registra o envio de uma URL nos caches e retorna (sucesso, classe_do_erro)."""
+    if not sucesso and contexto.sink is not None:
+        print(f'Falha ao enviar dados de {url} no lote')
+    if sucesso and contexto.history is not None:
+        contexto.history.record(result)
+    if sucesso and contexto.fingerprints is not None:
+        contexto.fingerprints.commit(url)
+    if sucesso and contexto.validators is not None:
+        contexto.validators.commit(url)
+    if sucesso and contexto.volatility is not None:
+        contexto.volatility.observe(url, changed=bool(alterados))
+    return sucesso, None if sucesso else 'api'
+
+
+async def processar_url(crawler, url, contexto=None, limite=None, aguardar=True):
+    """Crawleia uma URL, envia os itens para a API e retorna (sucesso, classe_do_erro)."""
+    result = await coletar_url(crawler, url, contexto, limite)
+    return await enviar_resultado(url, result, contexto, aguardar)
+
+
+async def process_urls(
+    urls,
+    max_concorrencia=MAX_CONCORRENCIA,
+    limites_marketplace=None,
+    scheduler=None,
+    lote_max_registros=LOTE_MAX_REGISTROS,
+    lote_max_espera=LOTE_MAX_ESPERA,
+    workers_envio=WORKERS_ENVIO,
+    fila_envio=FILA_ENVIO,
+    processos_extracao=PROCESSOS_EXTRACAO,
+    fetch_http_primeiro=FETCH_HTTP_PRIMEIRO,
+    dados_estruturados=DADOS_ESTRUTURADOS,
+    historico_db=HISTORICO_PRECOS_DB,
+    modo_delta=MODO_DELTA,
+    fingerprints_path=FINGERPRINTS_PATH,
+    validators_path=VALIDATORS_PATH,
+    bloqueio_recursos=BLOQUEIO_RECURSOS,
+    usos_por_aba=USOS_POR_ABA,
+    max_rss_navegador_mb=MAX_RSS_NAVEGADOR_MB,
+    max_paginas_navegador=MAX_PAGINAS_NAVEGADOR,
+    fila_db=FILA_DB,
+    workers_retry=WORKERS_RETRY,
+    recrawl_adaptativo=RECRAWL_ADAPTATIVO,
+    intervalo_min_recrawl=INTERVALO_MIN_RECRAWL,
+    intervalo_max_recrawl=INTERVALO_MAX_RECRAWL,
+    prazo_execucao=PRAZO_EXECUCAO,
+    relatorio_path=RELATORIO_EXECUCAO,
+    metricas_path=METRICAS_PROMETHEUS,
+    arquivo_paginas=ARQUIVO_PAGINAS,
+    replay=REPLAY,
+    enviar_replay=ENVIAR_REPLAY,
+    shard_index=0,
+    shard_count=1,
+):
+    """Processa URLs de Amazon, Beleza na Web e Mercado Livre e envia os itens para a API.
+
+    Os padrões das opções são as constantes do módulo (configuráveis por
+    variável de ambiente), onde cada uma está documentada. Com
+    `shard_count` > 1, processa só as URLs do shard `shard_index`, com
+    arquivos de estado próprios do shard.
+    """
+
+    sem_dados_path = shard_path(SEM_DADOS_FILE, shard_index, shard_count)
+    prazo = time.monotonic() + prazo_execucao if prazo_execucao > 0 else None
+    fila_db = shard_path(fila_db, shard_index, shard_count)
+    relatorio_path = shard_path(relatorio_path, shard_index, shard_count)
+    metricas_path = shard_path(metricas_path, shard_index, shard_count)
+    historico_db = shard_path(historico_db, shard_index, shard_count)
+    fingerprints_path = shard_path(fingerprints_path, shard_index, shard_count)
+    validators_path = shard_path(validators_path, shard_index, shard_count)
+    arquivo_paginas = shard_path(
+        arquivo_paginas or (ARCHIVE_FILE if replay else ''),
+        shard_index,
+        shard_count,
+    )
+    archive = PageArchive(arquivo_paginas) if arquivo_paginas else None
+    urls_shard = filter_shard(list(dict.fromkeys(urls)), shard_index, shard_count)
+    if shard_count > 1:
+        print(f'Shard {shard_index + 1}/{shard_count}')
+
+    if replay:
+        arquivadas = set(archive.urls())
+        urls_replay = [url for url in urls_shard if url in arquivadas]
+        queue = None
+        total_urls = len(urls_replay)
+        print(
+            f'Replay de {total_urls} URLs a partir de {arquivo_paginas}'
+            + ('' if enviar_replay else ' (envio simulado)')
+        )
+        fetch_http_primeiro = False
+        fingerprints_path = None
+        validators_path = None
+        bloqueio_recursos = False
+        usos_por_aba = 0
+        recrawl_adaptativo = False
+        prazo = None
+        # O replay não altera o estado de produção: sem histórico de preços
+        # e, a menos que `enviar_replay` seja pedido, sem envio para a API
+        historico_db = None
+    else:
+        queue = WorkQueue(fila_db, permanent_errors=PERMANENT_FAILURES)
+        queue.sync_catalog(urls_shard)
+        if queue.created:
+            queue.import_failed(
+                filter_shard(
+                    carregar_sem_dados_url(sem_dados_path),
+                    shard_index,
+                    shard_count,
+                )
+            )
+        contagem = queue.counts()
+        total_urls = sum(contagem.values())
     processed_count = 0
-    sem_dados = []
-    successful_urls = 0
 
+    if limites_marketplace is None:
+        limites_marketplace = LIMITES_MARKETPLACE
+    if scheduler is None and not replay:
+        scheduler = PolitenessScheduler()
+    semaforo_global = asyncio.Semaphore(max(1, max_concorrencia))
+    semaforos_marketplace = {
+        nome: asyncio.Semaphore(max(1, limite))
+        for nome, limite in limites_marketplace.items()
+    }
+
+    if not replay:
+        print(
+            f'Total de URLs na fila: {total_urls} ({contagem.get(LANE_RETRY, 0)} na raia de retry, {contagem.get(LANE_PARKED, 0)} estacionadas)'
+        )
     print(
-        f'Total de URLs a processar: {total_urls} (incluindo {len(sem_dados)} URLs de execuções anteriores)'
+        f'Concorrência máxima: {max_concorrencia} (por marketplace: {limites_marketplace})'
     )
-    async with AsyncWebCrawler(verbose=True) as crawler:
-        for url in combined_urls:
-            processed_count += 1
-            print(f'Processado {processed_count}/{total_urls} URLs')
-            result = await crawl_url(crawler, url)
-            print('Dados extraídos:')
-            print(result)
-            if result:
-                post_status = await send_to_api(result)
-                if post_status in (200, 201):
-                    print(
-                        f'Dados salvos com sucesso para {url}, POST concluído.'
+
+    @contextlib.asynccontextmanager
+    async def limite_crawl(url):
+        # A vaga do marketplace é obtida antes da global para que URLs de um
+        # marketplace saturado não ocupem vagas globais enquanto esperam
+        marketplace = identificar_marketplace(url)
+        semaforo_marketplace = semaforos_marketplace.get(marketplace)
+        async with semaforo_marketplace or contextlib.nullcontext():
+            async with semaforo_global:
+                yield
+
+    tier_stats = FetchTierStats()
+    metrics = RunMetrics()
+
+    def contar_processada():
+        nonlocal processed_count
+        processed_count += 1
+        print(f'Processado {processed_count}/{total_urls} URLs')
+
+    pipeline = None
+    if workers_envio > 0:
+        pipeline = Pipeline(metrics)
+        etapa_coleta = pipeline.source(
+            'coleta', workers=max(1, max_concorrencia) + workers_retry
+        )
+
+    async def processar_com_limite(crawler, contexto, url):
+        if pipeline is not None:
+            return await coletar_e_encaminhar(crawler, contexto, url)
+        # Com envio em lote, o resultado é um future resolvido quando o lote
+        # da URL for enviado; o worker já pode pegar a próxima
+        marketplace = identificar_marketplace(url)
+        inicio = time.perf_counter()
+
+        def finalizar(_):
+            metrics.observe(STAGE_URL, marketplace, time.perf_counter() - inicio)
+            contar_processada()
+
+        try:
+            resultado = await processar_url(
+                crawler, url, contexto, limite_crawl, aguardar=False
+            )
+        except Exception as e:
+            print(f'Erro geral ao processar {url}: {e}')
+            finalizar(None)
+            return False, type(e).__name__
+        if isinstance(resultado, asyncio.Future):
+            resultado.add_done_callback(finalizar)
+        else:
+            finalizar(None)
+        return resultado
+
+    async def coletar_e_encaminhar(crawler, contexto, url):
+        # Coleta a URL e a entrega ao estágio de envio; devolve o future do
+        # resultado para que o worker já possa pegar a próxima URL
+        marketplace = identificar_marketplace(url)
+        inicio = time.perf_counter()
+
+        def finalizar(_):
+            metrics.observe(STAGE_URL, marketplace, time.perf_counter() - inicio)
+            contar_processada()
+
+        try:
+            with etapa_coleta.busy():
+                result = await coletar_url(crawler, url, contexto, limite_crawl)
+        except Exception as e:
+            print(f'Erro geral ao processar {url}: {e}')
+            finalizar(None)
+            return False, type(e).__name__
+        future = await pipeline.put((url, result))
+        future.add_done_callback(finalizar)
+        return future
+
+    async def esvaziar():
+        # Sem novas URLs, o último lote parcial é enviado sem esperar o timer
+        if pipeline is not None:
+            await pipeline.join()
+        if contexto.sink is not None:
+            await contexto.sink.flush()
+
+    async def resultado_final(url, resultado):
+        if isinstance(resultado, asyncio.Future):
+            try:
+                return await resultado
+            except Exception as e:
+                print(f'Erro geral ao processar {url}: {e}')
+                return False, type(e).__name__
+        return resultado
+
+    async with (
+        (
+            ReplayCrawler(archive)
+            if replay
+            else BrowserWatchdog(
+                lambda: AsyncWebCrawler(verbose=True),
+                max_rss_mb=max_rss_navegador_mb,
+                max_pages=max_paginas_navegador,
+            )
+        ) as crawler,
+        ApiClient() as client,
+        HttpFetcher() as fetcher,
+    ):
+        blocker = ResourceBlocker() if bloqueio_recursos else None
+        if blocker is not None:
+            crawler.on_start(blocker.install)
+        contexto = ContextoExecucao(
+            scheduler=scheduler,
+            client=client,
+            http_fetcher=fetcher if fetch_http_primeiro else None,
+            tier_stats=tier_stats,
+            metrics=metrics,
+            archive=archive if not replay else None,
+            extraction_pool=ExtractionPool(processos_extracao),
+            dados_estruturados=dados_estruturados,
+            # No replay a página é sempre a mesma: não há o que retentar
+            retry_policy=RetryPolicy(max_attempts=1 if replay else None),
+            volatility=(
+                VolatilityTracker(
+                    fila_db,
+                    min_interval=intervalo_min_recrawl,
+                    max_interval=intervalo_max_recrawl,
+                )
+                if recrawl_adaptativo
+                else None
+            ),
+            history=PriceHistory(historico_db) if historico_db else None,
+            modo_delta=modo_delta,
+            simular_envio=replay and not enviar_replay,
+            fingerprints=(
+                FingerprintCache(fingerprints_path)
+                if fingerprints_path
+                else None
+            ),
+            validators=(
+                ConditionalCache(validators_path)
+                if validators_path and fetch_http_primeiro
+                else None
+            ),
+            tab_pool=(
+                TabPool(
+                    crawler,
+                    tabs_per_marketplace=limites_marketplace,
+                    max_uses=usos_por_aba,
+                )
+                if usos_por_aba > 0
+                else None
+            ),
+        )
+        if lote_max_registros > 0:
+
+            async def enviar_lote(registros):
+                return await enviar_registros(
+                    registros,
+                    client,
+                    metrics=metrics,
+                    simular=contexto.simular_envio,
+                )
+
+            contexto.sink = BatchSink(
+                enviar_lote,
+                max_records=lote_max_registros,
+                max_wait=lote_max_espera,
+            )
+        if pipeline is not None:
+
+            async def enviar(item):
+                url, result = item
+                try:
+                    return await enviar_resultado(
+                        url, result, contexto, aguardar=False
                     )
-                    successful_urls += 1
-                elif post_status == 400:
-                    put_status = await update_to_api(result)
-                    if put_status != 202:
-                        print(
-                            f'Falha ao atualizar dados de {url} (Status: {put_status})'
-                        )
-                        sem_dados.append(url)
-                    else:
-                        print(
-                            f'Dados atualizados com sucesso para {url}, PUT concluído.'
+                except Exception as e:
+                    print(f'Erro geral ao enviar {url}: {e}')
+                    return False, type(e).__name__
+
+            pipeline.add_stage(
+                'envio', enviar, workers=workers_envio, capacity=fila_envio
+            )
+        try:
+            async with pipeline or contextlib.nullcontext():
+                if replay:
+                    entregues = await asyncio.gather(
+                        *(
+                            processar_com_limite(crawler, contexto, url)
+                            for url in urls_replay
                         )
-                        successful_urls += 1
+                    )
+                    await esvaziar()
+                    resultados = [
+                        await resultado_final(url, resultado)
+                        for url, resultado in zip(urls_replay, entregues)
+                    ]
+                    sucessos = [
+                        url
+                        for url, (sucesso, _) in zip(urls_replay, resultados)
+                        if sucesso
+                    ]
+                    falhas = [url for url in urls_replay if url not in sucessos]
+                    interrompidas = []
                 else:
-                    print(
-                        f'Falha ao salvar dados de {url} (Status: {post_status})'
+                    sucessos, falhas, interrompidas = await run_workers(
+                        queue,
+                        lambda url: processar_com_limite(
+                            crawler, contexto, url
+                        ),
+                        owner=f'{socket.gethostname()}-{os.getpid()}',
+                        workers=max(1, max_concorrencia),
+                        retry_workers=workers_retry,
+                        interval_for=(
+                            contexto.volatility.interval
+                            if contexto.volatility is not None
+                            else None
+                        ),
+                        deadline=prazo,
+                        on_drain=esvaziar,
                     )
-                    sem_dados.append(url)
-            else:
-                print(
-                    f'Sem dados para {url}, marcando para lista de URLs sem dados'
-                )
-                sem_dados.append(url)
+        finally:
+            queue_pendentes = 0
+            if queue is not None:
+                queue_pendentes = queue.due_count()
+                queue.close()
+            if archive is not None:
+                resumo_arquivo = archive.summary()
+                archive.close()
+            if contexto.sink is not None:
+                await contexto.sink.close()
+            if contexto.history is not None:
+                contexto.history.close()
+            if contexto.fingerprints is not None:
+                contexto.fingerprints.save()
+            if contexto.validators is not None:
+                contexto.validators.save()
+            if contexto.tab_pool is not None:
+                await contexto.tab_pool.close()
+            if contexto.volatility is not None:
+                resumo_recrawl = contexto.volatility.summary()
+                contexto.volatility.close()
+            contexto.extraction_pool.close()
 
-    save_sem_dados_urls(sem_dados)
     print(
         f'Processamento concluído: {processed_count}/{total_urls} URLs processadas'
     )
     print(
-        f'Resultados: {successful_urls} URLs bem-sucedidas, {len(sem_dados)} URLs falharam, {len(sem_dados)} URLs sem dados'
+        f'Resultados: {len(sucessos)} URLs bem-sucedidas, {len(falhas)} URLs falharam (reagendadas na raia de retry)'
     )
+    if prazo is not None:
+        print(
+            f'Prazo de {prazo_execucao}s: {len(interrompidas)} URLs interrompidas, '
+            f'{queue_pendentes} URLs vencidas ficaram para a próxima execução'
+        )
+    if modo_delta:
+        print(
+            f'Modo delta: {contexto.sem_alteracao} URLs sem alterações não foram reenviadas'
+        )
+    if contexto.fingerprints is not None:
+        print(
+            f'Conteúdo inalterado: {contexto.fingerprints.skipped} URLs puladas sem extração'
+        )
+    if contexto.validators is not None:
+        print(
+            f'Não modificado (304): {contexto.validators.not_modified} URLs puladas sem download'
+        )
+    print(f'Camadas de fetch: {tier_stats.summary()}')
+    print(f'Falhas por classe: {contexto.retry_policy.summary()}')
+    if contexto.volatility is not None:
+        print(f'Recrawl adaptativo: {resumo_recrawl}')
+    if blocker is not None:
+        print(f'Recursos bloqueados: {blocker.summary()}')
+    if contexto.tab_pool is not None:
+        print(f'Pool de abas: {contexto.tab_pool.summary()}')
+    print(f'Navegador: {crawler.summary()}')
+    if archive is not None and not replay:
+        print(f'Arquivo de páginas: {resumo_arquivo}')
+    print(f'Etapas: {metrics.summary()}')
+    print(f'Pool de extração: {contexto.extraction_pool.summary()}')
+    if pipeline is not None:
+        print(f'Pipeline: {pipeline.summary()}')
+
+    metrics.set('urls_na_fila', total_urls)
+    metrics.set('urls_processadas', processed_count)
+    metrics.set('sucessos', len(sucessos))
+    metrics.set('falhas', len(falhas))
+    metrics.set('interrompidas', len(interrompidas))
+    metrics.set('vencidas_pendentes', queue_pendentes)
+    metrics.set('sem_alteracao', contexto.sem_alteracao)
+    if contexto.fingerprints is not None:
+        metrics.set('conteudo_inalterado', contexto.fingerprints.skipped)
+    if contexto.validators is not None:
+        metrics.set('nao_modificado_304', contexto.validators.not_modified)
+    metrics.set('camadas_fetch', tier_stats.counts)
+    metrics.set('extracoes_no_pool', contexto.extraction_pool.offloaded)
+    metrics.set('reinicios_navegador', getattr(crawler, 'restarts', 0))
+    if blocker is not None:
+        metrics.set('recursos_bloqueados', blocker.stats)
+    if contexto.tab_pool is not None:
+        metrics.set('abas_criadas', contexto.tab_pool.created)
+        metrics.set('abas_reutilizadas', contexto.tab_pool.reused)
+    if pipeline is not None:
+        for estagio, resumo in pipeline.report().items():
+            metrics.set(f'utilizacao_{estagio}', resumo['utilizacao'])
+            metrics.set(
+                f'backpressure_{estagio}_segundos', resumo['bloqueado_segundos']
+            )
+            metrics.set(
+                f'fila_{estagio}_profundidade_max', resumo['profundidade_max']
+            )
+    relatorio = metrics.report()
+    try:
+        if relatorio_path:
+            metrics.write_json(relatorio_path, relatorio)
+        if metricas_path:
+            metrics.write_prometheus(metricas_path, relatorio)
+    except Exception as e:
+        print(f'Erro ao salvar o relatório da execução: {e}')
@@ -0,0 +1,72 @@
+import argparse
+import hashlib
+import os
+
+
+def url_key(url):
+    """Normaliza a URL para o hash (sem esquema, www. ou barra final)."""
+    chave = url.strip().lower()
+    for prefixo in ('https://', 'http://'):
+        if chave.startswith(prefixo):
+            chave = chave[len(prefixo):]
+    if chave.startswith('www.'):
+        chave = chave[4:]
+    return chave.rstrip('/')
+
+
+def shard_for(url, shard_count):
+    """
+    Retorna o shard da URL por rendezvous hashing.
+
+    Cada URL fica sempre no mesmo shard enquanto `shard_count` não muda, e
+    ao mudar o número de shards só as URLs do shard adicionado/removido
+    trocam de lugar.
+    """
+    if shard_count <= 1:
+        return 0
+    chave = url_key(url)
+    return max(
+        range(shard_count),
+        key=lambda shard: hashlib.blake2b(
+            f'{shard}:{chave}'.encode('utf-8'), digest_size=8
+        ).digest(),
+    )
+
+
+def filter_shard(urls, shard_index, shard_count):
+    """Mantém apenas as URLs que pertencem ao shard informado."""
+    return [url for url in urls if shard_for(url, shard_count) == shard_index]
+
+
+def shard_path(path, shard_index, shard_count):
+    """Deriva o nome do arquivo de estado do shard ('x.json' -> 'x.shard-0-of-4.json')."""
+    if not path or shard_count <= 1:
+        return path
+    base, ext = os.path.splitext(path)
+    return f'{base}.shard-{shard_index}-of-{shard_count}{ext}'
+
+
+def parse_shard_args(argv=None):
+    """
+    Lê --shard-index/--shard-count da linha de comando, com SHARD_INDEX e
+    SHARD_COUNT do ambiente como padrão. Retorna (shard_index, shard_count).
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--shard-index',
+        type=int,
+        default=int(os.getenv('SHARD_INDEX', '0')),
+        help='índice deste shard (0 a shard-count - 1)',
+    )
+    parser.add_argument(
+        '--shard-count',
+        type=int,
+        default=int(os.getenv('SHARD_COUNT', '1')),
+        help='número total de shards',
+    )
+    args = parser.parse_args(argv)
+    if args.shard_count < 1:
+        parser.error('--shard-count deve ser >= 1')
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error('--shard-index deve estar entre 0 e shard-count - 1')
+    return args.shard_index, args.shard_count
@@ -0,0 +1,113 @@
+import asyncio
+import contextlib
+import itertools
+
+from extractors import get_extractor
+
+# Quantidade padrão de abas mantidas por marketplace
+DEFAULT_TABS_PER_MARKETPLACE = 2
+# Depois de tantas URLs, a aba é fechada e substituída por uma nova
+MAX_USES_PER_TAB = 25
+
+
+class Tab:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.uses = 0
+
+
+class TabPool:
+    """
+    Pool de abas quentes do AsyncWebCrawler, separado por marketplace.
+
+    Cada aba é uma sessão do Crawl4AI (`session_id`): a página permanece
+    aberta entre chamadas de `arun` e é reaproveitada pela próxima URL do
+    mesmo marketplace, de forma que o custo de criar a página é pago uma vez
+    por aba e não por URL. Abas de marketplaces diferentes nunca são
+    compartilhadas, mantendo cookies e estado de cada loja isolados. Uma aba
+    é descartada após `max_uses` URLs ou quando a renderização falha.
+    """
+
+    def __init__(
+        self,
+        crawler,
+        tabs_per_marketplace=None,
+        default_tabs=DEFAULT_TABS_PER_MARKETPLACE,
+        max_uses=MAX_USES_PER_TAB,
+    ):
+        self.crawler = crawler
+        self.tabs_per_marketplace = tabs_per_marketplace or {}
+        self.default_tabs = default_tabs
+        self.max_uses = max_uses
+        self.queues = {}
+        self.counter = itertools.count(1)
+        self.created = 0
+        self.reused = 0
+
+    def new_tab(self, marketplace):
+        self.created += 1
+        nome = (marketplace or 'outros').lower().replace(' ', '_')
+        return Tab(f'{nome}-{next(self.counter)}')
+
+    def queue_for(self, marketplace):
+        if marketplace not in self.queues:
+            tamanho = max(
+                1, self.tabs_per_marketplace.get(marketplace, self.default_tabs)
+            )
+            queue = asyncio.Queue()
+            for _ in range(tamanho):
+                queue.put_nowait(None)  # aba criada sob demanda
+            self.queues[marketplace] = queue
+        return self.queues[marketplace]
+
+    async def kill(self, tab):
+        """
+        Fecha a página da aba. O kill_session do Crawl4AI 0.5 fecha também o
+        contexto do navegador, que é compartilhado pelas abas com a mesma
+        config, então a sessão é removida e só a página é fechada.
+        """
+        strategy = self.crawler.crawler_strategy
+        manager = getattr(strategy, 'browser_manager', None)
+        sessions = getattr(manager, 'sessions', None)
+        with contextlib.suppress(Exception):
+            if sessions is None:
+                await strategy.kill_session(tab.session_id)
+                return
+            sessao = sessions.pop(tab.session_id, None)
+            if sessao is not None:
+                _, page, _ = sessao
+                await page.close()
+
+    @contextlib.asynccontextmanager
+    async def borrow(self, url):
+        """Empresta uma aba do marketplace da URL; produz o session_id a usar em `arun`."""
+        extractor = get_extractor(url)
+        marketplace = extractor.marketplace if extractor else None
+        queue = self.queue_for(marketplace)
+        tab = await queue.get()
+        if tab is None:
+            tab = self.new_tab(marketplace)
+        elif tab.uses:
+            self.reused += 1
+        try:
+            yield tab.session_id
+            tab.uses += 1
+            if tab.uses >= self.max_uses:
+                await self.kill(tab)
+                tab = None
+        except BaseException:
+            await self.kill(tab)
+            tab = None
+            raise
+        finally:
+            queue.put_nowait(tab)
+
+    async def close(self):
+        for queue in self.queues.values():
+            while not queue.empty():
+                tab = queue.get_nowait()
+                if tab is not None:
+                    await self.kill(tab)
+
+    def summary(self):
+        return f'{self.created} abas criadas, {self.reused} reutilizações'
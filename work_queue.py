@@ -0,0 +1,384 @@
+import asyncio
+import os
+import sqlite3
+import time
+
+# Banco com a fila de trabalho persistente
+WORK_QUEUE_DB = 'work_queue.db'
+
+LANE_NORMAL = 'normal'
+LANE_RETRY = 'retry'
+# URLs com falhas permanentes repetidas: nenhum worker serve esta raia
+LANE_PARKED = 'parked'
+
+# Intervalo mínimo até uma URL processada com sucesso voltar a ser elegível.
+# Maior que o prazo de uma execução, para que ela não reprocesse a URL; com
+# prazo, a execução também pega as URLs que vencem antes dele, então uma URL
+# concluída no fim da execução anterior não espera um ciclo a mais do cron
+SUCCESS_INTERVAL = 10 * 60
+# Backoff exponencial das URLs com falha: base * 2^(tentativas - 1), até o teto
+RETRY_BASE = 5 * 60
+RETRY_MAX = 6 * 60 * 60
+# Falhas seguidas de uma classe permanente (página removida, sem ofertas)
+# até a URL ser estacionada, e tempo até ela ser verificada de novo
+PARK_AFTER = 3
+PARK_INTERVAL = 7 * 24 * 60 * 60
+# Tempo de vida de um lease; após isso, a URL de um worker que morreu volta à fila
+LEASE_TTL = 15 * 60
+# Custo estimado (s) de uma URL sem histórico de latência e peso da
+# medição mais recente na média móvel
+DEFAULT_COST = 30.0
+LATENCY_ALPHA = 0.3
+# Com prazo, os workers param de pegar URLs quando restam menos de tantos
+# segundos, deixando tempo para enviar lotes e salvar o estado
+DEADLINE_MARGIN = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    url TEXT PRIMARY KEY,
+    lane TEXT NOT NULL DEFAULT 'normal',
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_eligible REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    lease_owner TEXT,
+    lease_expires REAL,
+    active INTEGER NOT NULL DEFAULT 1,
+    updated_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_lease
+    ON jobs (active, lane, next_eligible, priority);
+CREATE TABLE IF NOT EXISTS latency (
+    url TEXT PRIMARY KEY,
+    mean_seconds REAL NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class WorkQueue:
+    """
+    Fila de URLs persistente em SQLite.
+
+    Cada URL guarda a raia (normal ou retry), prioridade, número de
+    tentativas, próximo horário elegível e a classe do último erro. `lease`
+    reserva uma URL de forma atômica (BEGIN IMMEDIATE), então workers
+    concorrentes — inclusive em processos diferentes — nunca processam a
+    mesma URL. Falhas vão para a raia de retry com backoff exponencial, para
+    que uma URL quebrada não seja a primeira da fila a cada execução. Se o
+    erro for de uma classe de `permanent_errors` (como o 404),
+    após `park_after` tentativas a URL é estacionada e só volta à raia de
+    retry depois de `park_interval` segundos, para uma única verificação.
+
+    A latência de cada URL é acompanhada por média móvel; dentro da mesma
+    prioridade, as URLs mais baratas saem primeiro e `lease(max_cost=...)`
+    só entrega URLs cujo custo estimado cabe no tempo restante.
+    """
+
+    def __init__(
+        self,
+        path=WORK_QUEUE_DB,
+        lease_ttl=LEASE_TTL,
+        permanent_errors=(),
+        park_after=PARK_AFTER,
+        park_interval=PARK_INTERVAL,
+    ):
+        self.path = path
+        self.lease_ttl = lease_ttl
+        self.permanent_errors = frozenset(permanent_errors)
+        self.park_after = park_after
+        self.park_interval = park_interval
+        self.created = path == ':memory:' or not os.path.exists(path)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write(self, sql, params=()):
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            cursor = self.conn.execute(sql, params)
+            self.conn.execute('COMMIT')
+            return cursor
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def sync_catalog(self, urls, priority=0):
+        """Insere URLs novas, desativa as que saíram do catálogo e devolve à
+        raia de retry as estacionadas cuja verificação venceu."""
+        agora = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.execute('UPDATE jobs SET active = 0')
+            self.conn.execute(
+                'UPDATE jobs SET lane = ? WHERE lane = ? AND next_eligible <= ?',
+                (LANE_RETRY, LANE_PARKED, agora),
+            )
+            self.conn.executemany(
+                'INSERT INTO jobs (url, priority, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET active = 1',
+                [(url, priority, agora) for url in urls],
+            )
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def import_failed(self, urls, error='legado'):
+        """Coloca na raia de retry URLs com falha vindas dos arquivos JSON antigos."""
+        for url in urls:
+            self._write(
+                'UPDATE jobs SET lane = ?, attempts = attempts + 1, last_error = ? '
+                'WHERE url = ?',
+                (LANE_RETRY, error, url),
+            )
+
+    def lease(
+        self, owner, lane=LANE_NORMAL, max_cost=None, due_by=None, since=None
+    ):
+        """
+        Reserva a próxima URL elegível da raia, por prioridade e custo
+        estimado; retorna None se não houver. Com `max_cost`, ignora URLs
+        cuja latência estimada (s) ultrapassa esse valor. Com `due_by`
+        (instante de `time.time()`), também entrega URLs que vencem até esse
+        instante, depois das já vencidas, desde que não tenham sido
+        atualizadas a partir de `since`.
+        """
+        agora = time.time()
+        limite = max(agora, due_by) if due_by is not None else agora
+        custo = f'COALESCE(latency.mean_seconds, {float(DEFAULT_COST)})'
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute(
+                'SELECT jobs.url FROM jobs '
+                'LEFT JOIN latency ON latency.url = jobs.url '
+                'WHERE active = 1 AND lane = ? '
+                'AND (next_eligible <= ? OR (next_eligible <= ? '
+                'AND (? IS NULL OR updated_at < ?))) '
+                'AND (lease_expires IS NULL OR lease_expires < ?) '
+                f'AND (? IS NULL OR {custo} <= ?) '
+                'ORDER BY priority DESC, next_eligible > ? ASC, '
+                f'{custo} ASC, next_eligible ASC '
+                'LIMIT 1',
+                (
+                    lane,
+                    agora,
+                    limite,
+                    since,
+                    since,
+                    agora,
+                    max_cost,
+                    max_cost,
+                    agora,
+                ),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    'UPDATE jobs SET lease_owner = ?, lease_expires = ? '
+                    'WHERE url = ?',
+                    (owner, agora + self.lease_ttl, row['url']),
+                )
+            self.conn.execute('COMMIT')
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        return row['url'] if row is not None else None
+
+    def complete(self, url, interval=SUCCESS_INTERVAL):
+        """Marca a URL como processada; volta à raia normal após `interval` segundos."""
+        agora = time.time()
+        self._write(
+            'UPDATE jobs SET lane = ?, attempts = 0, last_error = NULL, '
+            'next_eligible = ?, lease_owner = NULL, lease_expires = NULL, '
+            'updated_at = ? WHERE url = ?',
+            (LANE_NORMAL, agora + interval, agora, url),
+        )
+
+    def fail(self, url, error, delay=None):
+        """
+        Registra uma falha da classe `error` e agenda a URL na raia de retry
+        com backoff, ou a estaciona se a classe for permanente e já tiver
+        esgotado as tentativas. Retorna a raia da URL.
+        """
+        agora = time.time()
+        row = self.conn.execute(
+            'SELECT attempts FROM jobs WHERE url = ?', (url,)
+        ).fetchone()
+        tentativas = (row['attempts'] if row else 0) + 1
+        raia = LANE_RETRY
+        if error in self.permanent_errors and tentativas >= self.park_after:
+            raia = LANE_PARKED
+            delay = self.park_interval
+        elif delay is None:
+            delay = min(RETRY_MAX, RETRY_BASE * 2 ** (tentativas - 1))
+        self._write(
+            'UPDATE jobs SET lane = ?, attempts = ?, last_error = ?, '
+            'next_eligible = ?, lease_owner = NULL, lease_expires = NULL, '
+            'updated_at = ? WHERE url = ?',
+            (raia, tentativas, error, agora + delay, agora, url),
+        )
+        return raia
+
+    def record_latency(self, url, seconds):
+        """Atualiza a latência média (s) de processamento da URL."""
+        self._write(
+            'INSERT INTO latency (url, mean_seconds, samples) VALUES (?, ?, 1) '
+            'ON CONFLICT(url) DO UPDATE SET '
+            'mean_seconds = ? * excluded.mean_seconds + ? * mean_seconds, '
+            'samples = samples + 1',
+            (url, seconds, LATENCY_ALPHA, 1 - LATENCY_ALPHA),
+        )
+
+    def release(self, url):
+        """Devolve uma URL reservada sem alterar seu estado."""
+        self._write(
+            'UPDATE jobs SET lease_owner = NULL, lease_expires = NULL '
+            'WHERE url = ?',
+            (url,),
+        )
+
+    def due_count(self):
+        """Quantidade de URLs ativas já elegíveis e não reservadas."""
+        agora = time.time()
+        return self.conn.execute(
+            'SELECT COUNT(*) FROM jobs WHERE active = 1 AND lane != ? '
+            'AND next_eligible <= ? '
+            'AND (lease_expires IS NULL OR lease_expires < ?)',
+            (LANE_PARKED, agora, agora),
+        ).fetchone()[0]
+
+    def counts(self):
+        """Quantidade de URLs ativas por raia."""
+        return {
+            row['lane']: row['total']
+            for row in self.conn.execute(
+                'SELECT lane, COUNT(*) AS total FROM jobs WHERE active = 1 '
+                'GROUP BY lane'
+            )
+        }
+
+
+async def run_workers(
+    queue,
+    handle,
+    owner,
+    workers=1,
+    retry_workers=1,
+    interval_for=None,
+    deadline=None,
+    margin=DEADLINE_MARGIN,
+    on_drain=None,
+):
+    """
+    Consome a fila com `workers` na raia normal e `retry_workers` na raia de
+    retry, de forma que retentativas não atrasem as URLs saudáveis.
+
+    `handle(url)` retorna (sucesso, classe_do_erro) ou um future com essa
+    tupla, quando o resto do processamento da URL segue num estágio
+    posterior (Pipeline): o worker passa para a próxima URL e o resultado é
+    gravado na fila quando o future é resolvido. `interval_for(url)`,
+    se informado, define em quantos segundos uma URL processada com sucesso
+    volta a ser elegível. Com `deadline` (instante de `time.monotonic()`),
+    os workers só pegam URLs cujo custo estimado cabe no tempo restante
+    menos `margin`, os da raia normal também pegam as URLs que vencem antes
+    do prazo (exceto as já concluídas nesta execução), e o que ainda estiver
+    em andamento no prazo é cancelado e devolvido à fila para a próxima
+    execução. `on_drain()`, se informado, é aguardado quando os workers
+    terminam e antes dos futures pendentes (para enviar um lote parcial, por
+    exemplo). Retorna as listas de URLs com sucesso, com falha e
+    interrompidas pelo prazo, nesta ordem.
+    """
+    sucessos = []
+    falhas = []
+    interrompidas = []
+    pendentes = []
+    inicio_execucao = time.time()
+
+    def concluir(url, sucesso, erro):
+        if sucesso:
+            queue.complete(
+                url,
+                interval_for(url) if interval_for else SUCCESS_INTERVAL,
+            )
+            sucessos.append(url)
+        else:
+            if queue.fail(url, erro) == LANE_PARKED:
+                print(f'URL estacionada após falhas seguidas ({erro}): {url}')
+            falhas.append(url)
+
+    def concluir_future(url, future):
+        if future.cancelled():
+            queue.release(url)
+            interrompidas.append(url)
+        elif future.exception() is not None:
+            concluir(url, False, type(future.exception()).__name__)
+        else:
+            concluir(url, *future.result())
+
+    async def worker(lane):
+        while True:
+            max_cost = None
+            due_by = None
+            if deadline is not None:
+                max_cost = deadline - time.monotonic() - margin
+                if max_cost <= 0:
+                    return
+                if lane == LANE_NORMAL:
+                    due_by = time.time() + max_cost
+            url = queue.lease(
+                owner, lane, max_cost, due_by=due_by, since=inicio_execucao
+            )
+            if url is None:
+                return
+            inicio = time.monotonic()
+            try:
+                resultado = await handle(url)
+            except asyncio.CancelledError:
+                # O tempo até o cancelamento é um piso da latência da URL
+                queue.record_latency(url, time.monotonic() - inicio)
+                queue.release(url)
+                interrompidas.append(url)
+                raise
+            except Exception as e:
+                resultado = False, type(e).__name__
+            queue.record_latency(url, time.monotonic() - inicio)
+            if isinstance(resultado, asyncio.Future):
+                resultado.add_done_callback(
+                    lambda future, url=url: concluir_future(url, future)
+                )
+                pendentes.append(resultado)
+            else:
+                concluir(url, *resultado)
+
+    todos = asyncio.gather(
+        *(worker(LANE_NORMAL) for _ in range(workers)),
+        *(worker(LANE_RETRY) for _ in range(retry_workers)),
+    )
+    if deadline is None:
+        await todos
+    else:
+        try:
+            await asyncio.wait_for(
+                todos, timeout=max(0.0, deadline - time.monotonic())
+            )
+        except asyncio.TimeoutError:
+            if time.monotonic() < deadline:
+                raise
+            print(
+                f'Prazo da execução atingido: {len(interrompidas)} URLs em '
+                'andamento devolvidas à fila'
+            )
+    # URLs que ainda estão nos estágios seguintes terminam de ser processadas
+    if on_drain is not None:
+        await on_drain()
+    await asyncio.gather(*pendentes, return_exceptions=True)
+    return sucessos, falhas, interrompidas